@@ -1,15 +1,340 @@
 # -*- coding: utf-8 -*-
+import io
+import os
+import time
 import streamlit as st
 import numpy as np
-import matplotlib.pyplot as plt
-import pandas as pd
-from io import BytesIO
-from Methodes_num_EDOS import Methodes_num_EDOS
 from methodes_num_EDO import methodes_num_EDO
+from Methodes_num_EDOS import Methodes_num_EDOS
+from compilateur_EDO import compiler_edo, compiler_solution_exacte, compiler_systeme, evaluer_constante
+from convergence_EDO import H_VALUES, etude_convergence
+from cache_EDO import CacheSolutions
+from stats_EDO import StatsSolveur
+from export_EDO import bouton_figure, bouton_telechargement, options_export
+from precision_EDO import options_precision
+from trace_EDO import options_trace, reduire
+from raide_EDO import METHODES_ADAPTATIVES
+from symplectique_EDO import derive_energie
+from taches_EDO import Executeur, TacheAnnulee
 
 # Configuration générale
 st.set_page_config(page_title="Simulateur EDOs et Systèmes", layout="wide", page_icon="🧮")
 
+# Cache des solutions, partagé entre les réexécutions et les sessions
+# (écrit aussi sur disque si la variable CACHE_EDO_DOSSIER est définie)
+@st.cache_resource
+def cache_solutions():
+    return CacheSolutions(dossier=os.environ.get("CACHE_EDO_DOSSIER"))
+
+
+# matplotlib.pyplot n'est importé qu'au premier tracé, une fois par processus
+@st.cache_resource
+def pyplot():
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    return plt
+
+
+# Une figure de résultats ne change plus une fois publiée : son image PNG est
+# gardée d'une réexécution à l'autre, la clé identifiant la tache, la méthode,
+# la figure et les options de tracé
+@st.cache_data(max_entries=256, show_spinner=False)
+def image_figure(cle, _tracer):
+    """Image PNG de la figure dessinée par _tracer(ax) (seule cle est hachée)."""
+    plt = pyplot()
+    fig, ax = plt.subplots(figsize=(10, 6))
+    _tracer(ax)
+    tampon = io.BytesIO()
+    fig.savefig(tampon, format="png", dpi=150, bbox_inches="tight")
+    plt.close(fig)
+    return tampon.getvalue()
+
+
+# Les simulations tournent en arrière-plan (voir taches_EDO) : la page reste
+# réactive, la tache survit aux réexécutions et son identifiant est gardé
+# dans st.session_state
+@st.cache_resource
+def executeur():
+    return Executeur()
+
+
+def periode_rappel(N):
+    """
+    Pas entre deux appels du suivi pour les noyaux générés (voir stats_EDO) :
+    environ 2000 appels par résolution, mais des blocs d'au moins 100 pas.
+    """
+    return max(100, N // 2000)
+
+
+def simulation_edo(tache, methodes, edo, solution_exacte, t0, y0, T, h, rtol, atol, cache, precision):
+    """Résout l'EDO avec chaque méthode (publiée dès qu'elle est prête), puis étudie la convergence."""
+    N = int(T / h)
+    part = 0.8 / len(methodes)
+    for k, methode in enumerate(methodes):
+        tache.avancer(k * part, f"Résolution avec la méthode {methode}")
+        stats = StatsSolveur(rappel=tache.suivi_solveur(methode, t0, t0 + N * h, k * part, part),
+                             periode_rappel=periode_rappel(N))
+        debut = time.perf_counter()
+        try:
+            t, y = cache.resoudre(methodes_num_EDO, methode, edo, t0, y0, h, N, rtol=rtol, atol=atol, stats=stats,
+                                  **precision)
+        except TacheAnnulee:
+            raise
+        except Exception as e:
+            tache.publier(methode, {'erreur': e})
+            continue
+        tache.publier(methode, {'solution': (t, y), 'duree': time.perf_counter() - debut,
+                                'stats': stats if stats.n_pas else None})
+
+    # Étude de convergence sur les pas H_VALUES, répartie sur plusieurs processus
+    tache.avancer(0.8, "Étude de convergence")
+    etudes = etude_convergence(methodes, edo, solution_exacte, t0, y0, T, h_values=H_VALUES, cache=cache,
+                               rappel=lambda faites, total: tache.avancer(0.8 + 0.2 * faites / total),
+                               rtol=rtol, atol=atol, **precision)
+    for methode, etude in etudes.items():
+        if 'solution' in tache.resultats[methode]:
+            tache.publier(methode, {**tache.resultats[methode], 'etude': etude})
+
+
+def simulation_systeme(tache, methodes, edos, y0, T, h, rtol, atol, cache, precision):
+    """Résout le système avec chaque méthode, publiée dès qu'elle est prête."""
+    N = int(T / h)
+    part = 1.0 / len(methodes)
+    for k, methode in enumerate(methodes):
+        tache.avancer(k * part, f"Résolution avec la méthode {methode}")
+        stats = StatsSolveur(rappel=tache.suivi_solveur(methode, 0, N * h, k * part, part),
+                             periode_rappel=periode_rappel(N))
+        try:
+            t, y = cache.resoudre(Methodes_num_EDOS, methode, edos, 0, y0, h, N,
+                                  tampons=True, rtol=rtol, atol=atol, stats=stats, **precision)
+        except TacheAnnulee:
+            raise
+        except Exception as e:
+            tache.publier(methode, {'erreur': e})
+            continue
+        tache.publier(methode, {'solution': (t, y), 'stats': stats if stats.n_pas else None})
+
+
+def afficher_suivi(tache):
+    """Progression et bouton d'annulation d'une tache en cours, ou son issue."""
+    if not tache.terminee:
+        st.progress(tache.progression, text=f"{tache.message} — {tache.duree:.1f} s")
+        if st.button("Annuler la simulation", key=f"annuler_{tache.identifiant}"):
+            tache.annuler()
+    elif tache.etat == 'annulée':
+        st.warning(f"Simulation annulée après {tache.duree:.1f} s : seuls les résultats déjà calculés sont affichés.")
+    elif tache.erreur is not None:
+        st.error(f"Erreur lors de la simulation : {tache.erreur}")
+
+
+def afficher_partiel(tache, methode):
+    """Trajectoire partielle d'une méthode en cours de résolution."""
+    partiel = tache.partiels.get(methode)
+    if tache.terminee:
+        st.caption("Non calculée")
+        return
+    if not partiel or min(len(partiel[0]), len(partiel[1])) < 2:
+        st.caption("En attente")
+        return
+    n = min(len(partiel[0]), len(partiel[1]))
+    plt = pyplot()
+    fig, ax = plt.subplots(figsize=(10, 4))
+    ax.plot(partiel[0][:n], np.array(partiel[1][:n]))
+    ax.set_title(f"Résultat partiel avec la méthode {methode}")
+    ax.set_xlabel("Temps \( t \)")
+    ax.grid()
+    st.pyplot(fig)
+    plt.close(fig)
+
+
+def suivre_tache(cle, afficher, *args):
+    """
+    Affiche la tache dont l'identifiant est dans st.session_state[cle], dans un
+    fragment rafraîchi chaque seconde tant qu'elle tourne. Renvoie la tache.
+    """
+    tache = executeur().tache(st.session_state.get(cle))
+    if tache is None:
+        return None
+    en_cours = not tache.terminee
+
+    @st.fragment(run_every=1.0 if en_cours else None)
+    def suivi():
+        if en_cours and tache.terminee:
+            # Affichage complet de la page, sans rafraîchissement périodique
+            st.rerun()
+        afficher_suivi(tache)
+        afficher(tache, *args)
+
+    suivi()
+    return tache
+
+
+def lancer(cle, fonction, *args, **options):
+    """Soumet une simulation en remplaçant (et annulant) la précédente de la même session."""
+    if cle in st.session_state:
+        executeur().oublier(st.session_state[cle])
+    st.session_state[cle] = executeur().soumettre(fonction, *args, **options).identifiant
+
+
+def afficher_stats_cache():
+    stats_cache = cache_solutions().stats()
+    st.sidebar.caption(f"Cache : {stats_cache['succes'] + stats_cache['succes_disque']} succès, "
+                       f"{stats_cache['echecs']} échecs, {stats_cache['octets'] / 2**20:.1f} Mo")
+
+
+def afficher_edo(tache, n_points_trace, reduction, format_export, decimation):
+    parametres = tache.parametres
+    T, h = parametres['T'], parametres['h']
+    y_exact = compiler_solution_exacte(parametres['solution_exacte']) if parametres['solution_exacte'] else None
+    h_values = H_VALUES
+
+    # Résultats de chaque méthode, affichés dès qu'ils sont publiés
+    for methode in parametres['methodes']:
+        st.markdown(f"### Résultats pour la méthode : **{methode}**")
+        resultat = tache.resultats.get(methode)
+        if resultat is None:
+            afficher_partiel(tache, methode)
+            continue
+        if 'erreur' in resultat:
+            st.error(f"Erreur lors de la simulation : {resultat['erreur']}")
+            continue
+
+        # Résolution de l'EDO
+        t, y = resultat['solution']
+        if resultat['stats'] is None:
+            st.caption("Solution lue dans le cache")
+        else:
+            st.caption(f"Temps de calcul : {resultat['duree']:.3f} s")
+            st.caption(f"Statistiques : {resultat['stats']}")
+
+        if methode in METHODES_ADAPTATIVES:
+            st.write(f"Pas acceptés : {len(t) - 1} (contre {int(T/h)} à pas fixe)")
+
+        # Graphique des solutions
+        def tracer_solution(ax_sol):
+            ax_sol.plot(*reduire(t, y, n_points_trace, reduction), label="Solution numérique", linewidth=2)
+            if y_exact:
+                ax_sol.plot(*reduire(t, y_exact(t), n_points_trace, reduction), "--", label="Solution exacte", color="orange")
+            ax_sol.set_title(f"Solutions numériques avec la méthode {methode}")
+            ax_sol.set_xlabel("Temps \( t \)")
+            ax_sol.set_ylabel("Valeurs de \( y(t) \)")
+            ax_sol.legend()
+            ax_sol.grid()
+
+        cle = (tache.identifiant, tache.debut, methode)
+        png_sol = image_figure(cle + ("solution", n_points_trace, reduction), tracer_solution)
+        st.image(png_sol)
+
+        etude = resultat.get('etude')
+        if etude is None:
+            if not tache.terminee:
+                st.caption("Étude de convergence en cours…")
+            else:
+                bouton_figure(st, png_sol, f"solution_{methode}", f"Télécharger le graphique des solutions ({methode})")
+                bouton_telechargement(st, t, y, f"valeurs_solution_{methode}", "Télécharger les valeurs numériques",
+                                      format_export, decimation=decimation)
+            continue
+
+        # Erreurs pour les différents \( h \) et ordre de convergence (moindres carrés)
+        errors = list(etude.erreurs)
+        ordre = etude.ordre
+
+        # Affichage de l'ordre de convergence
+        if etude.adaptative:
+            st.caption(f"{methode} est adaptative (h n'est que le pas initial) : pas d'ordre de convergence en h.")
+        elif np.isfinite(ordre):
+            st.write(f"**Ordre de convergence pour {methode}** : {round(ordre)} ({ordre:.2f})")
+
+        # Graphique des erreurs
+        def tracer_erreurs(ax_err):
+            ax_err.plot(h_values, errors, "-o", label="Erreur maximale")
+            ax_err.set_title(f"Erreurs maximales pour la méthode {methode}")
+            ax_err.set_xlabel("Pas \( h \)")
+            ax_err.set_ylabel("Erreur \( ||e||_\infty \)")
+            ax_err.legend()
+            ax_err.grid()
+
+        png_err = image_figure(cle + ("erreurs",), tracer_erreurs)
+        st.image(png_err)
+
+        # Graphique de convergence
+        def tracer_convergence(ax_conv):
+            ax_conv.loglog(h_values, errors, "-o", label="Convergence log-log")
+            ax_conv.set_title(f"Convergence log-log pour la méthode {methode}")
+            ax_conv.set_xlabel("log(h)")
+            ax_conv.set_ylabel("log(||e||_∞)")
+            ax_conv.legend()
+            ax_conv.grid()
+
+        png_conv = image_figure(cle + ("convergence",), tracer_convergence)
+        st.image(png_conv)
+
+        # Options de téléchargement des graphiques et données
+        bouton_figure(st, png_sol, f"solution_{methode}", f"Télécharger le graphique des solutions ({methode})")
+        bouton_figure(st, png_err, f"erreurs_{methode}", f"Télécharger le graphique des erreurs ({methode})")
+        bouton_figure(st, png_conv, f"convergence_{methode}", f"Télécharger le graphique de convergence ({methode})")
+        bouton_telechargement(st, t, y, f"valeurs_solution_{methode}", "Télécharger les valeurs numériques",
+                              format_export, decimation=decimation)
+
+
+def afficher_systeme(tache, n_points_trace, reduction, format_export, decimation):
+    parametres = tache.parametres
+    T, h, nb_eqs = parametres['T'], parametres['h'], parametres['nb_eqs']
+    for methode in parametres['methodes']:
+        st.markdown(f"### Résultats pour la méthode : **{methode}**")
+        resultat = tache.resultats.get(methode)
+        if resultat is None:
+            afficher_partiel(tache, methode)
+            continue
+        if 'erreur' in resultat:
+            st.error(f"Erreur lors de la simulation : {resultat['erreur']}")
+            continue
+
+        # Résolution
+        t, y = resultat['solution']
+        stats = resultat['stats']
+        st.caption(f"Statistiques : {stats}" if stats is not None else "Solution lue dans le cache")
+
+        if methode in METHODES_ADAPTATIVES:
+            st.write(f"Pas acceptés : {len(t) - 1} (contre {int(T / h)} à pas fixe)")
+
+        # Tracé des solutions
+        def tracer_solutions(ax):
+            for i in range(nb_eqs):
+                ax.plot(*reduire(t, y[:, i], n_points_trace, reduction), label=f"y[{i+1}](t)", linewidth=2)
+            ax.set_title(f"Solutions numériques avec la méthode {methode}")
+            ax.set_xlabel("Temps \( t \)")
+            ax.set_ylabel("Valeurs de \( y(t) \)")
+            ax.legend()
+            ax.grid()
+
+        cle = (tache.identifiant, tache.debut, methode)
+        png = image_figure(cle + ("solutions", n_points_trace, reduction), tracer_solutions)
+        st.image(png)
+
+        # Dérive relative de l'énergie le long de la trajectoire
+        if parametres.get('hamiltonien'):
+            derive = derive_energie(t, y, parametres['hamiltonien'])
+            st.write(f"**Dérive relative maximale de l'énergie** : {derive.max():.2e}")
+
+            def tracer_derive(ax):
+                ax.semilogy(*reduire(t, derive, n_points_trace, reduction), linewidth=1)
+                ax.set_title(f"Dérive relative de l'énergie avec la méthode {methode}")
+                ax.set_xlabel("Temps \( t \)")
+                ax.set_ylabel("|H(t, y) - H(t0, y0)| / |H(t0, y0)|")
+                ax.grid()
+
+            st.image(image_figure(cle + ("energie", n_points_trace, reduction), tracer_derive))
+
+        # Téléchargement des graphiques et des données numériques, une fois la simulation finie
+        if tache.terminee:
+            bouton_figure(st, png, f"solutions_{methode}", f"Télécharger le graphique des solutions ({methode})")
+            bouton_telechargement(st, t, y, f"donnees_{methode}", f"Télécharger les données numériques ({methode})",
+                                  format_export, noms=[f"y[{i+1}](t)" for i in range(nb_eqs)],
+                                  decimation=decimation)
+
+
 # Titre principal
 st.title("Simulateur de Résolution Numérique d'EDOs et de Systèmes d'EDOs")
 st.markdown("---")
@@ -26,7 +351,7 @@ if choix == "Une seule EDO":
     edo_input = st.text_area("Entrez l'EDO sous la forme `f(t, y)` en langage python (ex: `-y * np.sin(t)`)", value="-y * np.sin(t)")
 
     try:
-        f = eval(f"lambda t, y: {edo_input}")
+        f = compiler_edo(edo_input)
         f(0, 1)  # Vérification rapide
     except Exception as e:
         st.error("Erreur : L'expression de l'EDO est invalide.")
@@ -36,7 +361,7 @@ if choix == "Une seule EDO":
     solution_exacte_input = st.text_area("Entrez la solution exacte si connue en langage python (ex: `np.exp(np.cos(t))`)", value="np.exp(np.cos(t))")
     if solution_exacte_input:
         try:
-            y_exact = eval(f"lambda t: {solution_exacte_input}")
+            y_exact = compiler_solution_exacte(solution_exacte_input)
             y_exact(0)  # Vérification rapide
         except Exception as e:
             st.error("Erreur : L'expression de la solution exacte est invalide.")
@@ -53,104 +378,42 @@ if choix == "Une seule EDO":
         y0_input = st.sidebar.text_input("Condition initiale y0", value="np.exp(1)")
 
         try:
-            y0 = eval(y0_input)
+            y0 = evaluer_constante(y0_input)
         except Exception as e:
             st.sidebar.error("Condition initiale invalide.")
             y0 = None
 
         # Sélection des méthodes numériques
         st.sidebar.markdown("### Méthodes numériques")
-        methodes = ['Euler', 'Trapèze', 'RK4', 'AB3', 'Pred-Cor']
-        nb_methodes = st.sidebar.number_input("Nombre de méthodes à comparer", min_value=1, max_value=5, value=1)
+        methodes = ['Euler', 'Trapèze', 'RK4', 'DOPRI5', 'AB3', 'Pred-Cor', 'BDF', 'Rosenbrock', 'Auto']
+        nb_methodes = st.sidebar.number_input("Nombre de méthodes à comparer", min_value=1, max_value=6, value=1)
         methodes_choisies = [st.sidebar.selectbox(f"Méthode {i+1}", options=methodes) for i in range(nb_methodes)]
 
-        # Bouton Simuler
+        # Tolérances de la méthode adaptative
+        rtol, atol = 1e-6, 1e-9
+        if any(m in METHODES_ADAPTATIVES for m in methodes_choisies):
+            rtol = st.sidebar.number_input("Tolérance relative (méthodes adaptatives)", value=1e-6, format="%.1e")
+            atol = st.sidebar.number_input("Tolérance absolue (méthodes adaptatives)", value=1e-9, format="%.1e")
+
+        # Précision du stockage (le calcul d'une EDO scalaire reste en float64)
+        precision = options_precision(st.sidebar, calcul=False)
+
+        # Export des valeurs numériques et réduction des courbes tracées
+        format_export, decimation = options_export(st.sidebar)
+        n_points_trace, reduction = options_trace(st.sidebar)
+
+        # Bouton Simuler : la simulation est lancée en arrière-plan
         if y0 is not None and st.sidebar.button("Simuler"):
-            try:
-                h_values = [0.25, 0.125, 0.0625, 0.03125, 0.015625]  # Différents pas pour la convergence
-                errors_all_methods = {}
-                orders_all_methods = {}
-
-                # Résolution et tracé pour chaque méthode
-                for methode in methodes_choisies:
-                    st.markdown(f"### Résultats pour la méthode : **{methode}**")
-                    
-                    # Résolution de l'EDO
-                    t, y = methodes_num_EDO(methode, f, t0, y0, h, int(T/h))
-
-                    # Graphique des solutions
-                    fig_sol, ax_sol = plt.subplots(figsize=(10, 6))
-                    ax_sol.plot(t, y, label="Solution numérique", linewidth=2)
-                    if y_exact:
-                        ax_sol.plot(t, y_exact(t), "--", label="Solution exacte", color="orange")
-                    ax_sol.set_title(f"Solutions numériques avec la méthode {methode}")
-                    ax_sol.set_xlabel("Temps \( t \)")
-                    ax_sol.set_ylabel("Valeurs de \( y(t) \)")
-                    ax_sol.legend()
-                    ax_sol.grid()
-                    st.pyplot(fig_sol)
-
-                    # Calcul des erreurs pour les différents \( h \)
-                    errors = []
-                    for h_i in h_values:
-                        N = int(T / h_i)
-                        t_temp, y_temp = methodes_num_EDO(methode, f, t0, y0, h_i, N)
-                        if y_exact:
-                            errors.append(np.max(np.abs(y_exact(t_temp) - y_temp)))
-                        else:
-                            errors.append(np.nan)
-                    errors_all_methods[methode] = errors
-
-                    # Calcul de l'ordre de convergence
-                    if len(errors) > 1:
-                        orders = np.log(np.array(errors[:-1]) / np.array(errors[1:])) / np.log(np.array(h_values[:-1]) / np.array(h_values[1:]))
-                        orders_all_methods[methode] = orders[-1]
-                    else:
-                        orders_all_methods[methode] = np.nan
-
-                    # Affichage de l'ordre de convergence
-                    st.write(f"**Ordre de convergence pour {methode}** : {round(orders_all_methods[methode])}")
-
-                    # Graphique des erreurs
-                    fig_err, ax_err = plt.subplots(figsize=(10, 6))
-                    ax_err.plot(h_values, errors, "-o", label="Erreur maximale")
-                    ax_err.set_title(f"Erreurs maximales pour la méthode {methode}")
-                    ax_err.set_xlabel("Pas \( h \)")
-                    ax_err.set_ylabel("Erreur \( ||e||_\infty \)")
-                    ax_err.legend()
-                    ax_err.grid()
-                    st.pyplot(fig_err)
-
-                    # Graphique de convergence
-                    fig_conv, ax_conv = plt.subplots(figsize=(10, 6))
-                    ax_conv.loglog(h_values, errors, "-o", label="Convergence log-log")
-                    ax_conv.set_title(f"Convergence log-log pour la méthode {methode}")
-                    ax_conv.set_xlabel("log(h)")
-                    ax_conv.set_ylabel("log(||e||_∞)")
-                    ax_conv.legend()
-                    ax_conv.grid()
-                    st.pyplot(fig_conv)
-
-                    # Téléchargement des graphiques et données
-                    def download_plot(fig, filename, label):
-                        buf = BytesIO()
-                        fig.savefig(buf, format="png")
-                        buf.seek(0)
-                        st.download_button(label=label, data=buf, file_name=filename, mime="image/png")
-                    
-                    def download_values(t, y, filename):
-                        df = pd.DataFrame({"t": t, "y": y})
-                        csv = df.to_csv(index=False)
-                        st.download_button(label="Télécharger les valeurs numériques", data=csv, file_name=filename, mime="text/csv")
-
-                    # Options de téléchargement
-                    download_plot(fig_sol, f"solution_{methode}.png", f"Télécharger le graphique des solutions ({methode})")
-                    download_plot(fig_err, f"erreurs_{methode}.png", f"Télécharger le graphique des erreurs ({methode})")
-                    download_plot(fig_conv, f"convergence_{methode}.png", f"Télécharger le graphique de convergence ({methode})")
-                    download_values(t, y, f"valeurs_solution_{methode}.csv")
+            methodes_uniques = list(dict.fromkeys(methodes_choisies))
+            exacte = solution_exacte_input if y_exact else None
+            lancer('tache_edo', simulation_edo, methodes_uniques, edo_input, exacte, t0, y0, T, h, rtol, atol,
+                   cache_solutions(), precision, description="Résolution d'une EDO",
+                   parametres={'methodes': methodes_uniques, 'solution_exacte': exacte, 'T': T, 'h': h})
 
-            except Exception as e:
-                st.error(f"Erreur lors de la simulation : {e}")
+        # Suivi de la simulation en cours, ou résultats de la dernière simulation
+        tache = suivre_tache('tache_edo', afficher_edo, n_points_trace, reduction, format_export, decimation)
+        if tache is not None and tache.terminee:
+            afficher_stats_cache()
 
 
 
@@ -175,8 +438,7 @@ elif choix == "Un système d'EDOs":
         edos.append(eq)
 
     try:
-        def system(t, y):
-            return [eval(eq) for eq in edos]
+        system = compiler_systeme(edos)
         system(0, [1.0] * nb_eqs)  # Vérification rapide
     except Exception as e:
         st.error("❌ Erreur : Une ou plusieurs EDOs sont invalides.")
@@ -189,49 +451,44 @@ elif choix == "Un système d'EDOs":
         y0 = [st.sidebar.number_input(f"Condition initiale y0[{i+1}]", value=1.0) for i in range(nb_eqs)]
 
         # Sélection des méthodes numériques
-        methodes = ['Euler', 'Trapèze', 'RK4', 'AB3', 'Pred-Cor']
-        nb_methodes = st.sidebar.number_input("Nombre de méthodes à comparer", min_value=1, max_value=5, value=1)
+        methodes = ['Euler', 'Trapèze', 'RK4', 'DOPRI5', 'AB3', 'Pred-Cor', 'BDF', 'Rosenbrock', 'Auto',
+                    'Verlet', 'Yoshida4', 'Point-Milieu']
+        nb_methodes = st.sidebar.number_input("Nombre de méthodes à comparer", min_value=1, max_value=6, value=1)
         methodes_choisies = [st.sidebar.selectbox(f"Méthode {i+1}", options=methodes) for i in range(nb_methodes)]
 
-        # Lancer la simulation
-        if st.sidebar.button("Simuler"):
+        # Tolérances de la méthode adaptative
+        rtol, atol = 1e-6, 1e-9
+        if any(m in METHODES_ADAPTATIVES for m in methodes_choisies):
+            rtol = st.sidebar.number_input("Tolérance relative (méthodes adaptatives)", value=1e-6, format="%.1e")
+            atol = st.sidebar.number_input("Tolérance absolue (méthodes adaptatives)", value=1e-9, format="%.1e")
+
+        # Énergie dont on suit la dérive (systèmes hamiltoniens : y = positions puis impulsions)
+        hamiltonien = st.sidebar.text_input(
+            "Énergie H(t, y) (optionnel)", value="",
+            help="Ex : 0.5 * y[1]**2 - np.cos(y[0]). Verlet et Yoshida4 supposent y = (positions, impulsions).")
+        if hamiltonien:
             try:
-                # Préparer les figures pour chaque méthode
-                for methode in methodes_choisies:
-                    st.markdown(f"### Résultats pour la méthode : **{methode}**")
-
-                    # Résolution
-                    t, y = Methodes_num_EDOS(methode, system, 0, y0, h, int(T / h))
-
-                    # Tracé des solutions
-                    fig, ax = plt.subplots(figsize=(10, 6))
-                    for i in range(nb_eqs):
-                        ax.plot(t, y[:, i], label=f"y[{i+1}](t)", linewidth=2)
-                    ax.set_title(f"Solutions numériques avec la méthode {methode}")
-                    ax.set_xlabel("Temps \( t \)")
-                    ax.set_ylabel("Valeurs de \( y(t) \)")
-                    ax.legend()
-                    ax.grid()
-                    st.pyplot(fig)
-
-                    # Téléchargement des graphiques
-                    def download_plot(fig, filename, label):
-                        buf = BytesIO()
-                        fig.savefig(buf, format="png")
-                        buf.seek(0)
-                        st.download_button(label=label, data=buf, file_name=filename, mime="image/png")
-
-                    download_plot(fig, f"solutions_{methode}.png", f"Télécharger le graphique des solutions ({methode})")
-
-                    # Téléchargement des données numériques
-                    df = pd.DataFrame(y, columns=[f"y[{i+1}](t)" for i in range(nb_eqs)], index=t)
-                    csv = df.to_csv(index=True)
-                    st.download_button(
-                        label=f"Télécharger les données numériques ({methode})",
-                        data=csv,
-                        file_name=f"donnees_{methode}.csv",
-                        mime="text/csv",
-                    )
-
+                compiler_edo(hamiltonien)(0.0, np.array(y0))  # Vérification rapide
             except Exception as e:
-                st.error(f"Erreur lors de la simulation : {e}")
+                st.sidebar.error("Expression de l'énergie invalide.")
+                hamiltonien = ""
+
+        # Précision du stockage et du calcul
+        precision = options_precision(st.sidebar)
+
+        # Export des valeurs numériques et réduction des courbes tracées
+        format_export, decimation = options_export(st.sidebar)
+        n_points_trace, reduction = options_trace(st.sidebar)
+
+        # Lancer la simulation en arrière-plan
+        if st.sidebar.button("Simuler"):
+            methodes_uniques = list(dict.fromkeys(methodes_choisies))
+            lancer('tache_systeme', simulation_systeme, methodes_uniques, list(edos), y0, T, h, rtol, atol,
+                   cache_solutions(), precision, description="Résolution d'un système d'EDOs",
+                   parametres={'methodes': methodes_uniques, 'T': T, 'h': h, 'nb_eqs': nb_eqs,
+                               'hamiltonien': hamiltonien})
+
+        # Suivi de la simulation en cours, ou résultats de la dernière simulation
+        tache = suivre_tache('tache_systeme', afficher_systeme, n_points_trace, reduction, format_export, decimation)
+        if tache is not None and tache.terminee:
+            afficher_stats_cache()
@@ -1,85 +1,318 @@
+import inspect
+import time
 import numpy as np
-from scipy.optimize import fsolve
+from compilateur_EDO import compiler_rhs
+from newton_EDO import NewtonSimplifie
+from adaptatif_EDO import dormand_prince
+from raide_EDO import auto, bdf, rosenbrock
+from symplectique_EDO import point_milieu, stormer_verlet, yoshida_4
+from stats_EDO import suivre
+from noyaux_EDO import resoudre_par_noyau
+from precision_EDO import METHODES_CALCUL_FLOAT32, en_precision, etat_initial, type_flottant
+from evenements_EDO import resoudre_avec_evenements
+from dense_EDO import echantillonner, echantillonner_par_noyau
 
-def Methodes_num_EDOS(methode, f, t0, y0, h, N):
+def Methodes_num_EDOS(methode, f, t0, y0, h, N, tampons=False, jac=None, rtol=1e-6, atol=1e-9, stats=None,
+                      noyau=True, dtype=None, dtype_calcul=None, evenements=None, t_eval=None):
     """
     Résout une EDO ou un système d'EDOs avec la méthode spécifiée.
-    - methode : spécifie la méthode ('Euler', 'Trapèze', 'RK4', 'AB3', 'Pred-Cor').
-    - f : fonction f(t, y), où y peut être un scalaire ou un vecteur.
+    - methode : spécifie la méthode ('Euler', 'Trapèze', 'RK4', 'DOPRI5', 'AB3', 'Pred-Cor',
+                'BDF', 'Rosenbrock', 'Auto', 'Verlet', 'Yoshida4', 'Point-Milieu').
+    - f : fonction f(t, y), où y peut être un scalaire ou un vecteur,
+          ou liste d'expressions (compilée une seule fois, voir compilateur_EDO),
+          ou couple (vitesse, force) d'un système hamiltonien sous forme séparée,
+          d'état y = (q, p) (voir symplectique_EDO).
     - t0, y0 : conditions initiales.
     - h : pas de temps.
     - N : nombre d'itérations.
+    - tampons : pour Euler et RK4 sur un système, utilise les noyaux sans
+                allocation (vecteurs d'étapes préalloués, f(t, y, out=...)).
+    - jac : jacobien optionnel jac(t, y) pour les méthodes implicites (Trapèze, BDF, Rosenbrock, Auto,
+            Point-Milieu).
+    - rtol, atol : tolérances des méthodes adaptatives DOPRI5, BDF, Rosenbrock et Auto
+                   (h est alors le pas initial).
+    - stats : StatsSolveur optionnel rempli pendant la résolution (voir stats_EDO).
+    - noyau : si f est une liste d'expressions, utilise le noyau généré qui
+              fusionne la boucle de la méthode et f (voir noyaux_EDO) quand il existe.
+    - dtype : type des points stockés ('float64' ou 'float32', par défaut celui du calcul).
+    - dtype_calcul : type de l'état de travail ('float64' par défaut, 'float32'
+                     pour les méthodes explicites à pas fixe, voir precision_EDO).
+    - evenements : Evenements optionnel (zéros de fonctions g(t, y), arrêt
+                   anticipé, garde-fous), rempli pendant la résolution ; la
+                   trajectoire est tronquée en cas d'arrêt (voir evenements_EDO).
+    - t_eval : instants croissants de [t0, t0 + N h] ; seuls ces points sont
+               stockés et renvoyés, calculés par la sortie dense de la
+               méthode (voir dense_EDO). Ne se combine pas avec evenements.
     """
+    f = compiler_rhs(f)
+    calcul = type_flottant(dtype_calcul)
+    if methode not in METHODES_CALCUL_FLOAT32 or np.ndim(y0) == 0:
+        calcul = np.dtype(np.float64)
+    stockage = type_flottant(dtype, defaut=calcul)
+    if calcul == np.float32:
+        f, y0 = en_precision(f, calcul), np.asarray(y0, dtype=calcul)
+    elif noyau and evenements is None:
+        solution = (resoudre_par_noyau(methode, f, t0, y0, h, N, stats, stockage) if t_eval is None else
+                    echantillonner_par_noyau(methode, f, t0, y0, h, N, t_eval, stats, stockage))
+        if solution is not None:
+            return solution
+    if t_eval is not None:
+        if evenements is not None:
+            raise ValueError("t_eval et evenements ne peuvent pas être utilisés ensemble.")
+        return echantillonner(methode, f, t0, y0, h, N, t_eval, jac, rtol, atol, stats, stockage)
+    arguments = (f, methode, t0, y0, h, N, tampons, jac, rtol, atol, stockage)
+    if evenements is not None:
+        return resoudre_avec_evenements(evenements, stats, methode, _resoudre, arguments)
+    if stats is not None:
+        return suivre(stats, methode, _resoudre, *arguments)
+    return _resoudre(*arguments)
+
+
+def _resoudre(f, methode, t0, y0, h, N, tampons, jac, rtol, atol, dtype=None, stats=None):
     if methode == 'Euler':
-        return euler_explicite(f, t0, y0, h, N)
+        return euler_explicite(f, t0, y0, h, N, tampons, stats=stats, dtype=dtype)
     elif methode == 'Trapèze':
-        return trapeze_implicite(f, t0, y0, h, N)
+        return trapeze_implicite(f, t0, y0, h, N, jac, stats=stats, dtype=dtype)
     elif methode == 'RK4':
-        return rungekutta_4(f, t0, y0, h, N)
+        return rungekutta_4(f, t0, y0, h, N, tampons, stats=stats, dtype=dtype)
+    elif methode == 'DOPRI5':
+        return dormand_prince(f, t0, y0, h, N, rtol, atol, stats=stats, dtype=dtype)
     elif methode == 'AB3':
-        return AB_3(f, t0, y0, h, N)
+        return AB_3(f, t0, y0, h, N, stats=stats, dtype=dtype)
     elif methode == 'Pred-Cor':
-        return predcor_4(f, t0, y0, h, N)
+        return predcor_4(f, t0, y0, h, N, stats=stats, dtype=dtype)
+    elif methode == 'BDF':
+        return bdf(f, t0, y0, h, N, rtol, atol, jac, stats=stats, dtype=dtype)
+    elif methode == 'Rosenbrock':
+        return rosenbrock(f, t0, y0, h, N, rtol, atol, jac, stats=stats, dtype=dtype)
+    elif methode == 'Auto':
+        return auto(f, t0, y0, h, N, rtol, atol, jac, stats=stats, dtype=dtype)
+    elif methode == 'Verlet':
+        return stormer_verlet(f, t0, y0, h, N, stats=stats, dtype=dtype)
+    elif methode == 'Yoshida4':
+        return yoshida_4(f, t0, y0, h, N, stats=stats, dtype=dtype)
+    elif methode == 'Point-Milieu':
+        return point_milieu(f, t0, y0, h, N, jac, stats=stats, dtype=dtype)
     else:
-        raise ValueError("Méthode inconnue. Choisissez parmi : Euler, Trapèze, RK4, AB3, Pred-Cor.")
+        raise ValueError("Méthode inconnue. Choisissez parmi : Euler, Trapèze, RK4, DOPRI5, AB3, Pred-Cor, "
+                         "BDF, Rosenbrock, Auto, Verlet, Yoshida4, Point-Milieu.")
+
+# Évaluation du second membre dans un vecteur fourni
+def _rhs_out(f):
+    """
+    Renvoie une fonction rhs(t, y, out) qui écrit f(t, y) dans `out`.
+    Si f accepte déjà un argument `out` (systèmes compilés), il est utilisé tel quel.
+    """
+    try:
+        if 'out' in inspect.signature(f).parameters:
+            return f
+    except (TypeError, ValueError):
+        pass
+
+    def rhs(t, y, out):
+        out[:] = f(t, y)
+        return out
+    return rhs
+
+# Trajectoire préallouée et état de travail
+# L'état courant yi est gardé dans le type de calcul (celui de y0, voir
+# precision_EDO) et seulement recopié dans y, qui peut être moins précis :
+# les pas suivants ne relisent jamais la trajectoire stockée.
+def _allouer(y0, N, dtype=None):
+    yi = etat_initial(y0)
+    y = np.zeros((N + 1,) + yi.shape, dtype=dtype or yi.dtype)
+    y[0] = yi
+    return yi, y
 
 # Méthode d'Euler explicite
-def euler_explicite(f, t0, y0, h, N):
+def euler_explicite(f, t0, y0, h, N, tampons=False, stats=None, dtype=None):
     t = np.linspace(t0, t0 + N * h, N + 1)
-    y = np.zeros((N + 1, len(y0))) if isinstance(y0, (list, np.ndarray)) else np.zeros(N + 1)
-    y[0] = y0
+    yi, y = _allouer(y0, N, dtype)
+    rappel = getattr(stats, 'rappel', None)
+    if tampons and y.ndim >= 2:
+        n = _euler_tampons(_rhs_out(f), t, yi, y, h, N, rappel)
+        return t[:n], y[:n]
     for i in range(N):
-        y[i + 1] = y[i] + h * np.array(f(t[i], y[i]))
+        yi = y[i + 1] = yi + h * np.array(f(t[i], yi))
+        if rappel is not None and rappel(i + 1, t[i + 1], y[i + 1]):
+            t, y = t[:i + 2], y[:i + 2]
+            break
     return t, y
 
 # Méthode du trapèze implicite
-def trapeze_implicite(f, t0, y0, h, N):
+# Chaque pas résout y[i+1] = y[i] + h/2 * (f(t[i], y[i]) + f(t[i+1], y[i+1])) par
+# Newton simplifié (voir newton_EDO), en partant de y[i] et en réutilisant le
+# jacobien factorisé d'un pas à l'autre. f(t[i], y[i]) n'est évalué qu'une fois.
+def trapeze_implicite(f, t0, y0, h, N, jac=None, stats=None, dtype=None):
     t = np.linspace(t0, t0 + N * h, N + 1)
-    y = np.zeros((N + 1, len(y0))) if isinstance(y0, (list, np.ndarray)) else np.zeros(N + 1)
-    y[0] = y0
-
-    def g(yi, ti, yi_prev):
-        return yi - yi_prev - 0.5 * h * (np.array(f(ti, yi_prev)) + np.array(f(ti + h, yi)))
-
+    yi, y = _allouer(y0, N, dtype)
+    rappel = getattr(stats, 'rappel', None)
+    newton = NewtonSimplifie(f, jac)
+    fi = np.array(f(t[0], yi))
     for i in range(N):
-        y[i + 1] = fsolve(g, y[i], args=(t[i], y[i]))
+        yi = y[i + 1] = newton.resoudre(t[i + 1], yi + 0.5 * h * fi, 0.5 * h, yi)
+        fi = np.array(f(t[i + 1], yi))
+        if rappel is not None and rappel(i + 1, t[i + 1], y[i + 1]):
+            t, y = t[:i + 2], y[:i + 2]
+            break
+    if stats is not None:
+        stats.ajouter_newton(newton)
     return t, y
 
+# Noyau Euler sans allocation : une seule dérivée k réutilisée à chaque pas
+# Si la trajectoire a le type de calcul, le pas est écrit directement dans
+# y[i + 1], qui devient l'état courant ; sinon yi est mis à jour en place et recopié.
+def _euler_tampons(rhs, t, yi, y, h, N, rappel=None):
+    k = np.empty_like(yi)
+    direct = y.dtype == yi.dtype
+    for i in range(N):
+        rhs(t[i], yi, k)
+        k *= h
+        if direct:
+            yi = np.add(yi, k, out=y[i + 1])
+        else:
+            yi += k
+            y[i + 1] = yi
+        if rappel is not None and rappel(i + 1, t[i + 1], y[i + 1]):
+            return i + 2
+    return N + 1
+
 # Méthode de Runge-Kutta d'ordre 4
-def rungekutta_4(f, t0, y0, h, N):
+def rungekutta_4(f, t0, y0, h, N, tampons=False, stats=None, dtype=None):
     t = np.linspace(t0, t0 + N * h, N + 1)
-    y = np.zeros((N + 1, len(y0))) if isinstance(y0, (list, np.ndarray)) else np.zeros(N + 1)
-    y[0] = y0
+    yi, y = _allouer(y0, N, dtype)
+    rappel = getattr(stats, 'rappel', None)
+    if tampons and y.ndim >= 2:
+        n = _rk4_tampons(_rhs_out(f), t, yi, y, h, N, rappel)
+        return t[:n], y[:n]
     for i in range(N):
-        k1 = np.array(f(t[i], y[i]))
-        k2 = np.array(f(t[i] + h / 2, y[i] + h * k1 / 2))
-        k3 = np.array(f(t[i] + h / 2, y[i] + h * k2 / 2))
-        k4 = np.array(f(t[i] + h, y[i] + h * k3))
-        y[i + 1] = y[i] + (h / 6) * (k1 + 2 * k2 + 2 * k3 + k4)
+        k1 = np.array(f(t[i], yi))
+        k2 = np.array(f(t[i] + h / 2, yi + h * k1 / 2))
+        k3 = np.array(f(t[i] + h / 2, yi + h * k2 / 2))
+        k4 = np.array(f(t[i] + h, yi + h * k3))
+        yi = y[i + 1] = yi + (h / 6) * (k1 + 2 * k2 + 2 * k3 + k4)
+        if rappel is not None and rappel(i + 1, t[i + 1], y[i + 1]):
+            t, y = t[:i + 2], y[:i + 2]
+            break
     return t, y
 
+# Noyau RK4 sans allocation : k1..k4 et l'état intermédiaire z sont alloués une fois
+def _rk4_tampons(rhs, t, yi, y, h, N, rappel=None):
+    k1, k2, k3, k4, z = (np.empty_like(yi) for _ in range(5))
+    direct = y.dtype == yi.dtype
+    for i in range(N):
+        ti = t[i]
+        rhs(ti, yi, k1)
+        np.multiply(k1, h / 2, out=z)
+        z += yi
+        rhs(ti + h / 2, z, k2)
+        np.multiply(k2, h / 2, out=z)
+        z += yi
+        rhs(ti + h / 2, z, k3)
+        np.multiply(k3, h, out=z)
+        z += yi
+        rhs(ti + h, z, k4)
+        # y[i + 1] = y[i] + (h / 6) * (k1 + 2 * k2 + 2 * k3 + k4)
+        np.add(k2, k3, out=z)
+        z *= 2
+        z += k1
+        z += k4
+        z *= h / 6
+        if direct:
+            yi = np.add(yi, z, out=y[i + 1])
+        else:
+            yi += z
+            y[i + 1] = yi
+        if rappel is not None and rappel(i + 1, t[i + 1], y[i + 1]):
+            return i + 2
+    return N + 1
+
+# Démarrage des méthodes multipas : n pas de RK4 dans le type de calcul (les
+# premiers points servent d'historique). L'étape k1 de chaque pas est
+# f(t[j], y[j]) : ces dérivées sont renvoyées pour amorcer le tampon F.
+def _demarrage_rk4(f, t, y0, h, n, rappel=None):
+    y_temp, derivees = [y0], []
+    for i in range(n):
+        yi = y_temp[i]
+        k1 = np.array(f(t[i], yi))
+        k2 = np.array(f(t[i] + h / 2, yi + h * k1 / 2))
+        k3 = np.array(f(t[i] + h / 2, yi + h * k2 / 2))
+        k4 = np.array(f(t[i] + h, yi + h * k3))
+        y_temp.append(yi + (h / 6) * (k1 + 2 * k2 + 2 * k3 + k4))
+        derivees.append(k1)
+        if rappel is not None and rappel(i + 1, t[i + 1], y_temp[-1]):
+            break
+    return np.array(y_temp), derivees
+
+# Compteur d'appels au second membre
+def _compter_appels(f):
+    def g(t, y):
+        g.n += 1
+        return f(t, y)
+    g.n = 0
+    return g
+
 # Méthode d'Adams-Bashforth d'ordre 3
-def AB_3(f, t0, y0, h, N):
+# Les dérivées des trois derniers points sont conservées dans un tampon circulaire F
+# (F[i % 3] = f(t[i], y[i])) : un seul appel à f par pas.
+def AB_3(f, t0, y0, h, N, compter=False, stats=None, dtype=None):
+    if compter:
+        f = _compter_appels(f)
     t = np.linspace(t0, t0 + N * h, N + 1)
-    y = np.zeros((N + 1, len(y0))) if isinstance(y0, (list, np.ndarray)) else np.zeros(N + 1)
-    y[0] = y0
-    if N >= 2:
-        _, y_temp = rungekutta_4(f, t0, y0, h, 2)
-        y[1:3] = y_temp[1:3]
+    yi, y = _allouer(y0, N, dtype)
+    rappel = getattr(stats, 'rappel', None)
+    y_temp = yi[np.newaxis]
+    if N >= 1:
+        debut = time.perf_counter()
+        y_temp, derivees = _demarrage_rk4(f, t, yi, h, min(N, 2), rappel)
+        y[1:len(y_temp)] = y_temp[1:]
+        yi = y_temp[-1]
+        if len(y_temp) <= min(N, 2):
+            # Arrêt demandé par le rappel pendant le démarrage
+            N = len(y_temp) - 1
+            t, y = t[:N + 1], y[:N + 1]
+        if stats is not None:
+            stats.phases['demarrage'] = time.perf_counter() - debut
+    F = np.zeros((3,) + yi.shape, dtype=yi.dtype)
+    if N > 2:
+        F[:2] = derivees
     for i in range(2, N):
-        y[i + 1] = y[i] + h * (23 * np.array(f(t[i], y[i])) - 16 * np.array(f(t[i - 1], y[i - 1])) + 5 * np.array(f(t[i - 2], y[i - 2]))) / 12
-    return t, y
+        F[i % 3] = f(t[i], yi)
+        yi = y[i + 1] = yi + h * (23 * F[i % 3] - 16 * F[(i - 1) % 3] + 5 * F[(i - 2) % 3]) / 12
+        if rappel is not None and rappel(i + 1, t[i + 1], y[i + 1]):
+            t, y = t[:i + 2], y[:i + 2]
+            break
+    return (t, y, f.n) if compter else (t, y)
 
 # Méthode Prédicteur-Correcteur d'ordre 4
-def predcor_4(f, t0, y0, h, N):
+# Même principe avec un tampon circulaire de quatre dérivées : deux appels à f
+# par pas (point courant et prédiction).
+def predcor_4(f, t0, y0, h, N, compter=False, stats=None, dtype=None):
+    if compter:
+        f = _compter_appels(f)
     t = np.linspace(t0, t0 + N * h, N + 1)
-    y = np.zeros((N + 1, len(y0))) if isinstance(y0, (list, np.ndarray)) else np.zeros(N + 1)
-    y[0] = y0
-    if N >= 3:
-        _, y_temp = rungekutta_4(f, t0, y0, h, 3)
-        y[1:4] = y_temp[1:4]
+    yi, y = _allouer(y0, N, dtype)
+    rappel = getattr(stats, 'rappel', None)
+    y_temp = yi[np.newaxis]
+    if N >= 1:
+        debut = time.perf_counter()
+        y_temp, derivees = _demarrage_rk4(f, t, yi, h, min(N, 3), rappel)
+        y[1:len(y_temp)] = y_temp[1:]
+        yi = y_temp[-1]
+        if len(y_temp) <= min(N, 3):
+            # Arrêt demandé par le rappel pendant le démarrage
+            N = len(y_temp) - 1
+            t, y = t[:N + 1], y[:N + 1]
+        if stats is not None:
+            stats.phases['demarrage'] = time.perf_counter() - debut
+    F = np.zeros((4,) + yi.shape, dtype=yi.dtype)
+    if N > 3:
+        F[:3] = derivees
     for i in range(3, N):
-        y_pred = y[i] + h * (55 * np.array(f(t[i], y[i])) - 59 * np.array(f(t[i - 1], y[i - 1])) + 37 * np.array(f(t[i - 2], y[i - 2])) - 9 * np.array(f(t[i - 3], y[i - 3]))) / 24
-        y[i + 1] = y[i] + h * (9 * np.array(f(t[i + 1], y_pred)) + 19 * np.array(f(t[i], y[i])) - 5 * np.array(f(t[i - 1], y[i - 1])) + np.array(f(t[i - 2], y[i - 2]))) / 24
-    return t, y
-
+        F[i % 4] = f(t[i], yi)
+        y_pred = yi + h * (55 * F[i % 4] - 59 * F[(i - 1) % 4] + 37 * F[(i - 2) % 4] - 9 * F[(i - 3) % 4]) / 24
+        yi = y[i + 1] = yi + h * (9 * np.array(f(t[i + 1], y_pred)) + 19 * F[i % 4] - 5 * F[(i - 1) % 4] + F[(i - 2) % 4]) / 24
+        if rappel is not None and rappel(i + 1, t[i + 1], y[i + 1]):
+            t, y = t[:i + 2], y[:i + 2]
+            break
+    return (t, y, f.n) if compter else (t, y)
@@ -1,13 +1,24 @@
+import os
 import streamlit as st
 import numpy as np
 import matplotlib.pyplot as plt
-import pandas as pd
-from io import BytesIO
-from methodes_num_EDO import methodes_num_EDO  # Importez vos fonctions depuis le fichier externe
+from compilateur_EDO import compiler_edo, compiler_solution_exacte, evaluer_constante
+from convergence_EDO import H_VALUES, etude_convergence
+from cache_EDO import CacheSolutions
+from export_EDO import bouton_figure, bouton_telechargement, options_export
+from trace_EDO import options_trace, reduire
+from raide_EDO import METHODES_ADAPTATIVES
 
 # Configurer Streamlit
 st.set_page_config(page_title="Simulateur EDO", layout="wide")
 
+# Cache des solutions, partagé entre les réexécutions et les sessions
+# (écrit aussi sur disque si la variable CACHE_EDO_DOSSIER est définie)
+@st.cache_resource
+def cache_solutions():
+    return CacheSolutions(dossier=os.environ.get("CACHE_EDO_DOSSIER"))
+
+
 # Titre de l'application
 st.title("Simulateur de Résolution Numérique des EDOs")
 
@@ -21,7 +32,7 @@ Choisissez les paramètres, la méthode numérique et visualisez les solutions.
 edo_input = st.text_area("Entrez l'EDO sous la forme f(t, y) (ex: -y * np.sin(t))", value="-y * np.sin(t)")
 
 try:
-    f = eval(f"lambda t, y: {edo_input}")
+    f = compiler_edo(edo_input)
     f(0, 1)  # Vérification rapide
 except Exception as e:
     st.error("Erreur : L'expression de l'EDO est invalide. Assurez-vous d'utiliser une syntaxe Python correcte, ex. : `-y * np.sin(t)`.")
@@ -32,7 +43,7 @@ solution_exacte_input = st.text_area("Entrez la solution exacte ",value = "np.ex
 
 if solution_exacte_input:
     try:
-        y_exact = eval(f"lambda t: {solution_exacte_input}")
+        y_exact = compiler_solution_exacte(solution_exacte_input)
         y_exact(0)  # Vérification rapide
     except Exception as e:
         st.error("Erreur : L'expression de la solution exacte est invalide. Assurez-vous d'utiliser une syntaxe Python correcte.")
@@ -52,19 +63,29 @@ if f is not None:
     # Saisie et validation de y0
     y0_input = st.sidebar.text_input("Condition initiale y0", value="np.exp(1)")  # Expression par défaut
     try:
-        y0 = eval(y0_input)
+        y0 = evaluer_constante(y0_input)
     except Exception as e:
         st.error("Erreur : L'expression de la condition initiale y0 est invalide. Assurez-vous d'utiliser une valeur numérique ou une expression valide.")
         y0 = None
 
     # Sélection des méthodes numériques
-    methodes = ['Euler', 'Trapèze', 'RK4', 'AB3', 'Pred-Cor']
-    nb_methodes = st.sidebar.number_input("Combien de méthodes à comparer ?", min_value=1, max_value=5, value=1, step=1)
+    methodes = ['Euler', 'Trapèze', 'RK4', 'DOPRI5', 'AB3', 'Pred-Cor', 'BDF', 'Rosenbrock', 'Auto']
+    nb_methodes = st.sidebar.number_input("Combien de méthodes à comparer ?", min_value=1, max_value=6, value=1, step=1)
     methodes_choisies = [st.sidebar.selectbox(f"Méthode {i+1}", options=methodes) for i in range(nb_methodes)]
 
+    # Tolérances de la méthode adaptative
+    rtol, atol = 1e-6, 1e-9
+    if any(m in METHODES_ADAPTATIVES for m in methodes_choisies):
+        rtol = st.sidebar.number_input("Tolérance relative (méthodes adaptatives)", value=1e-6, format="%.1e")
+        atol = st.sidebar.number_input("Tolérance absolue (méthodes adaptatives)", value=1e-9, format="%.1e")
+
+    # Export des valeurs numériques et réduction des courbes tracées
+    format_export, decimation = options_export(st.sidebar)
+    n_points_trace, reduction = options_trace(st.sidebar)
+
     # Résolution et affichage des résultats
     if y0 is not None and st.sidebar.button("Simuler"):
-        h_values = [0.25, 0.125, 0.0625, 0.03125, 0.015625]  # Différentes valeurs de h pour l'ordre de convergence
+        h_values = H_VALUES  # Différentes valeurs de h pour l'ordre de convergence
         errors_all_methods = {}  # Pour stocker les erreurs de chaque méthode
 
         # Préparation des subplots
@@ -77,29 +98,31 @@ if f is not None:
             if nb_methodes == 1:
                 axes_error = [axes_error]
 
-        # Résolution et tracé pour chaque méthode
+        # Résolution pour chaque méthode et chaque h, répartie sur plusieurs processus
+        etudes = etude_convergence(methodes_choisies, edo_input, solution_exacte_input if y_exact else None,
+                                   t0, y0, T, h_values=h_values, h_solution=h_values[-1], rtol=rtol, atol=atol,
+                                   cache=cache_solutions())
+
+        # Tracé pour chaque méthode
         for i, methode in enumerate(methodes_choisies):
             st.subheader(f"Résolution avec la méthode : {methode}")
 
-            errors = []
-            for h in h_values:
-                N = int(T / h)
-                try:
-                    t, y = methodes_num_EDO(methode, f, t0, y0, h, N)
-                    if y_exact:
-                        errors.append(np.max(np.abs(y_exact(t) - y)))
-                    else:
-                        errors.append(np.nan)
-                except Exception as e:
-                    st.error(f"Erreur lors de la simulation avec la méthode {methode} : {e}")
-                    continue
+            etude = etudes[methode]
+            for e in etude.erreurs_execution.values():
+                st.error(f"Erreur lors de la simulation avec la méthode {methode} : {e}")
+            if etude.solution is None:
+                continue
+            t, y = etude.solution
+            if etude.stats is not None:
+                st.caption(f"Statistiques : {etude.stats}")
+            errors = list(etude.erreurs)
 
             errors_all_methods[methode] = errors
 
             # Tracé des solutions numériques
-            axes[i].plot(t, y, label=f"Solution numérique ({methode})", linewidth=2)
+            axes[i].plot(*reduire(t, y, n_points_trace, reduction), label=f"Solution numérique ({methode})", linewidth=2)
             if y_exact:
-                axes[i].plot(t, y_exact(t), '--', label="Solution exacte", color='k')
+                axes[i].plot(*reduire(t, y_exact(t), n_points_trace, reduction), '--', label="Solution exacte", color='k')
             axes[i].set_xlabel("Temps t")
             axes[i].set_ylabel("y(t)")
             axes[i].set_title(f"Solutions pour {methode}")
@@ -123,11 +146,14 @@ if f is not None:
         if y_exact:
             fig_loglog, ax_loglog = plt.subplots(figsize=(10, 6))
             for methode in methodes_choisies:
-                errors = errors_all_methods[methode]
+                errors = list(etudes[methode].erreurs)
                 ax_loglog.loglog(h_values, errors, '-o', label=f"Erreur {methode}")
-                if len(errors) > 1:
-                    p = np.log(errors[-2] / errors[-1]) / np.log(h_values[-2] / h_values[-1])
-                    st.write(f"Ordre de convergence pour la méthode {methode} : {round(p)}")
+                p = etudes[methode].ordre  # Pente des moindres carrés
+                if etudes[methode].adaptative:
+                    st.caption(f"La méthode {methode} est adaptative (h n'est que le pas initial) : "
+                               "pas d'ordre de convergence en h.")
+                elif np.isfinite(p):
+                    st.write(f"Ordre de convergence pour la méthode {methode} : {round(p)} ({p:.2f})")
 
             ax_loglog.set_xlabel('log(h)')
             ax_loglog.set_ylabel('log(||e||_∞)')
@@ -137,25 +163,11 @@ if f is not None:
             st.pyplot(fig_loglog)
 
         # **Option de téléchargement des graphiques**
-        def download_plot(fig, filename, label):
-            # Sauvegarde le graphique dans un buffer et le renvoie sous forme de fichier téléchargeable
-            buf = BytesIO()
-            fig.savefig(buf, format="png")
-            buf.seek(0)
-            st.download_button(label=label, data=buf, file_name=filename, mime="image/png")
-        
-        # Téléchargement des graphiques des solutions et des erreurs
-        download_plot(fig, "solutions.png", "Télécharger le graphique des solutions")
+        bouton_figure(st, fig, "solutions", "Télécharger le graphique des solutions")
         if y_exact:
-            download_plot(fig_error, "erreurs.png", "Télécharger le graphique des erreurs")
-        
-        # **Option de téléchargement des valeurs**
-        def download_values(t, y, filename):
-            # Sauvegarde des valeurs dans un fichier CSV
-            df = pd.DataFrame({"t": t, "y": y})
-            csv = df.to_csv(index=False)
-            st.download_button(label="Télécharger les valeurs", data=csv, file_name=filename, mime="text/csv")
-        
-        # Téléchargement des valeurs des solutions numériques
-        download_values(t, y, "valeurs_solution.csv")
+            bouton_figure(st, fig_error, "erreurs", "Télécharger le graphique des erreurs")
+
+        # **Option de téléchargement des valeurs** (solution de la dernière méthode)
+        bouton_telechargement(st, t, y, "valeurs_solution", "Télécharger les valeurs", format_export,
+                              decimation=decimation)
 
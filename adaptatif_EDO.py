@@ -0,0 +1,127 @@
+# -*- coding: utf-8 -*-
+"""
+Méthode de Runge-Kutta adaptative de Dormand-Prince 5(4).
+
+Le pas est ajusté à chaque itération à partir de l'estimation d'erreur fournie
+par la formule emboîtée d'ordre 4, de façon à respecter les tolérances
+rtol/atol. La dernière étape d'un pas accepté est réutilisée comme première
+étape du pas suivant (propriété FSAL) : 6 appels à f par pas accepté.
+"""
+
+import numpy as np
+
+# Tableau de Butcher de Dormand-Prince
+C = np.array([0, 1 / 5, 3 / 10, 4 / 5, 8 / 9, 1, 1])
+A = [
+    [],
+    [1 / 5],
+    [3 / 40, 9 / 40],
+    [44 / 45, -56 / 15, 32 / 9],
+    [19372 / 6561, -25360 / 2187, 64448 / 6561, -212 / 729],
+    [9017 / 3168, -355 / 33, 46732 / 5247, 49 / 176, -5103 / 18656],
+    [35 / 384, 0, 500 / 1113, 125 / 192, -2187 / 6784, 11 / 84],
+]
+B = np.array([35 / 384, 0, 500 / 1113, 125 / 192, -2187 / 6784, 11 / 84, 0])
+# Différence entre les poids d'ordre 5 et d'ordre 4 (estimation de l'erreur locale)
+E = np.array([71 / 57600, 0, -71 / 16695, 71 / 1920, -17253 / 339200, 22 / 525, -1 / 40])
+
+# Contrôleur PI du pas (Hairer & Wanner) : h *= SECURITE * err^-ALPHA * err_prec^BETA
+SECURITE = 0.9
+BETA = 0.04
+ALPHA = 0.2 - 0.75 * BETA
+FACTEUR_MIN = 0.2
+FACTEUR_MAX = 10.0
+
+
+def dormand_prince(f, t0, y0, h, N, rtol=1e-6, atol=1e-9, compter=False, stats=None, dtype=np.float64):
+    """
+    Intègre sur [t0, t0 + N * h] avec contrôle automatique du pas.
+    - f : fonction f(t, y)
+    - t0, y0 : conditions initiales (y0 scalaire ou vecteur)
+    - h : pas initial proposé ; N : nombre de pas fixes équivalent (T = N * h)
+    - rtol, atol : tolérances relative et absolue sur l'erreur locale
+    - compter : si vrai, renvoie aussi un dictionnaire (n_acceptes, n_rejetes, nfev)
+    - stats : StatsSolveur optionnel (voir stats_EDO)
+    - dtype : type des points stockés (le calcul reste en float64, voir precision_EDO)
+    Renvoie la grille des temps acceptés et les solutions correspondantes.
+    """
+    compteurs = {}
+    rappel = getattr(stats, 'rappel', None)
+    liste_t, liste_y = [float(t0)], [np.array(y0, dtype=dtype)]
+    # Chaque point est converti dès qu'il est accepté : la liste ne garde pas de copie float64
+    convertir = np.ndim(y0) > 0 and np.dtype(dtype) != np.float64
+    for t, y in pas_dormand_prince(f, t0, y0, t0 + N * h, h, rtol, atol, compteurs):
+        liste_t.append(t)
+        liste_y.append(y.astype(dtype) if convertir else y)
+        if rappel is not None and rappel(len(liste_t) - 1, t, y):
+            break
+
+    t_out, y_out = np.array(liste_t), np.array(liste_y, dtype=dtype)
+    if stats is not None:
+        stats.n_rejetes += compteurs['n_rejetes']
+    return (t_out, y_out, compteurs) if compter else (t_out, y_out)
+
+
+def pas_dormand_prince(f, t0, y0, t_fin, h, rtol=1e-6, atol=1e-9, compteurs=None):
+    """
+    Générateur des pas acceptés (t, y) de Dormand-Prince entre t0 et t_fin.
+    - compteurs : dictionnaire optionnel mis à jour au fil de l'intégration
+                  (n_acceptes, n_rejetes, nfev, et etapes : les sept étapes
+                  k du dernier pas accepté, pour la sortie dense de dense_EDO)
+    """
+    compteurs = {} if compteurs is None else compteurs
+    # EDO scalaire : flottants Python, bien plus rapides que des tableaux 0-d
+    scalaire = np.ndim(y0) == 0
+    if scalaire:
+        y = float(y0)
+        evaluer = lambda t, y: float(f(t, y))
+    else:
+        y = np.array(y0, dtype=float)
+        evaluer = lambda t, y: np.asarray(f(t, y), dtype=float)
+    t = float(t0)
+    h = min(abs(h), t_fin - t) if t_fin > t else 0.0
+    k = [None] * 7
+    k[0] = evaluer(t, y)
+    compteurs.update(n_acceptes=0, n_rejetes=0, nfev=1)
+    norme_prec = 1e-4
+    rejet_prec = False
+    # Coefficients non nuls, en flottants Python
+    noeuds = C.tolist()
+    etapes = [[(a, s) for s, a in enumerate(A[i]) if a] for i in range(7)]
+    poids_erreur = [(e, s) for s, e in enumerate(E.tolist()) if e]
+
+    while t_fin - t > 1e-12 * max(1.0, abs(t_fin)):
+        h = min(h, t_fin - t)
+        if h <= 10 * np.finfo(float).eps * max(1.0, abs(t)):
+            raise RuntimeError(f"Pas de temps trop petit à t = {t:g} : tolérances inatteignables.")
+        for s in range(1, 7):
+            ys = y + h * sum(a * k[j] for a, j in etapes[s])
+            k[s] = evaluer(t + noeuds[s] * h, ys)
+        compteurs['nfev'] += 6
+        y_nouv = ys  # la 7e étape est évaluée au point d'ordre 5 (FSAL)
+        erreur = h * sum(e * k[j] for e, j in poids_erreur)
+        if scalaire:
+            norme = abs(erreur) / (atol + rtol * max(abs(y), abs(y_nouv)))
+        else:
+            echelle = atol + rtol * np.maximum(np.abs(y), np.abs(y_nouv))
+            norme = np.sqrt(np.mean((erreur / echelle) ** 2))
+
+        if norme <= 1.0:
+            compteurs['etapes'] = k[:]
+            t += h
+            y = y_nouv
+            k[0] = k[6]
+            compteurs['n_acceptes'] += 1
+            norme = max(norme, 1e-10)
+            facteur = min(FACTEUR_MAX, max(FACTEUR_MIN, SECURITE * norme ** -ALPHA * norme_prec ** BETA))
+            if rejet_prec:
+                # Pas d'augmentation juste après un rejet
+                facteur = min(facteur, 1.0)
+            norme_prec = norme
+            rejet_prec = False
+            h *= facteur
+            yield t, y
+        else:
+            compteurs['n_rejetes'] += 1
+            h *= max(FACTEUR_MIN, SECURITE * norme ** -ALPHA)
+            rejet_prec = True
@@ -1,12 +1,25 @@
 # -*- coding: utf-8 -*-
+import os
 import streamlit as st
 import numpy as np
 import matplotlib.pyplot as plt
-from methodes_num_EDO import methodes_num_EDO  # Importez vos fonctions depuis le fichier externe
+from compilateur_EDO import compiler_edo, compiler_solution_exacte, evaluer_constante
+from convergence_EDO import H_VALUES, etude_convergence
+from cache_EDO import CacheSolutions
+from export_EDO import bouton_figure, bouton_telechargement, options_export
+from trace_EDO import options_trace, reduire
+from raide_EDO import METHODES_ADAPTATIVES
 
 # Configurer Streamlit
 st.set_page_config(page_title="Simulateur EDO", layout="wide")
 
+# Cache des solutions, partagé entre les réexécutions et les sessions
+# (écrit aussi sur disque si la variable CACHE_EDO_DOSSIER est définie)
+@st.cache_resource
+def cache_solutions():
+    return CacheSolutions(dossier=os.environ.get("CACHE_EDO_DOSSIER"))
+
+
 # Titre de l'application
 st.title("Simulateur de Résolution Numérique des EDOs")
 
@@ -24,7 +37,7 @@ solution_exacte_input = st.text_area("Entrez la solution exacte sous la forme y_
 
 # Définir une fonction à partir de l'EDO donnée par l'utilisateur
 try:
-    f = eval(f"lambda t, y: {edo_input}")
+    f = compiler_edo(edo_input)
 except Exception as e:
     st.error(f"Erreur dans l'expression de l'EDO : {e}")
     f = None
@@ -32,7 +45,7 @@ except Exception as e:
 # Définir la solution exacte si elle est donnée
 if solution_exacte_input:
     try:
-        y_exact = eval(f"lambda t: {solution_exacte_input}")
+        y_exact = compiler_solution_exacte(solution_exacte_input)
     except Exception as e:
         st.error(f"Erreur dans l'expression de la solution exacte : {e}")
         y_exact = None
@@ -56,19 +69,29 @@ if f is not None:
 
    # Convertir l'entrée de y0 en une valeur numérique
     try:
-        y0 = eval(y0_input)  # Évaluer l'expression mathématique
+        y0 = evaluer_constante(y0_input)  # Évaluer l'expression mathématique
     except Exception as e:
         st.error(f"Erreur dans l'expression de la condition initiale y0 : {e}")
         y0 = None
 
     # Sélection des méthodes
-    methodes = ['Euler', 'Trapèze', 'RK4', 'AB3', 'Pred-Cor']
-    nb_methodes = st.sidebar.number_input("Combien de méthodes comparer ?", min_value=1, max_value=5, value=2, step=1)
+    methodes = ['Euler', 'Trapèze', 'RK4', 'DOPRI5', 'AB3', 'Pred-Cor', 'BDF', 'Rosenbrock', 'Auto']
+    nb_methodes = st.sidebar.number_input("Combien de méthodes comparer ?", min_value=1, max_value=6, value=2, step=1)
     methodes_choisies = [st.sidebar.selectbox(f"Méthode {i+1}", options=methodes) for i in range(nb_methodes)]
 
+    # Tolérances de la méthode adaptative
+    rtol, atol = 1e-6, 1e-9
+    if any(m in METHODES_ADAPTATIVES for m in methodes_choisies):
+        rtol = st.sidebar.number_input("Tolérance relative (méthodes adaptatives)", value=1e-6, format="%.1e")
+        atol = st.sidebar.number_input("Tolérance absolue (méthodes adaptatives)", value=1e-9, format="%.1e")
+
+    # Export des valeurs numériques et réduction des courbes tracées
+    format_export, decimation = options_export(st.sidebar)
+    n_points_trace, reduction = options_trace(st.sidebar)
+
     # Résolution et affichage
     if st.sidebar.button("Simuler"):
-        h_values = [0.25, 0.125, 0.0625, 0.03125, 0.015625]  # Différentes valeurs de h pour estimer l'ordre
+        h_values = H_VALUES  # Différentes valeurs de h pour estimer l'ordre
         errors_all_methods = {}  # Dictionnaire pour stocker les erreurs pour chaque méthode
 
         # Créer des subplots avec un nombre de colonnes égal au nombre de méthodes sélectionnées
@@ -81,27 +104,29 @@ if f is not None:
         if nb_methodes == 1:
             axes_error = [axes_error]  # Assurer que 'axes_error' soit toujours une liste
 
-        # Pour chaque méthode sélectionnée, résoudre l'EDO et afficher les résultats
+        # Résoudre l'EDO pour chaque méthode et chaque h (calculs répartis sur plusieurs processus)
+        etudes = etude_convergence(methodes_choisies, edo_input, solution_exacte_input if y_exact else None,
+                                   t0, y0, T, h_values=h_values, h_solution=h_values[-1], rtol=rtol, atol=atol,
+                                   cache=cache_solutions())
+
+        # Pour chaque méthode sélectionnée, afficher les résultats
         for i, methode in enumerate(methodes_choisies):
             st.subheader(f"Résolution avec la méthode : {methode}")
             
-            errors = []  # Liste des erreurs pour les différentes valeurs de h
-            for h in h_values:
-                N = int(T / h)
-                t, y = methodes_num_EDO(methode, f, t0, y0, h, N)
-                
-                # Calcul de l'erreur maximale si une solution exacte est donnée
-                if y_exact:
-                    errors.append(np.max(np.abs(y_exact(t) - y)))
-                else:
-                    errors.append(np.nan)  # Pas d'erreur si la solution exacte n'est pas disponible
+            etude = etudes[methode]
+            if etude.solution is None:
+                raise next(iter(etude.erreurs_execution.values()))
+            t, y = etude.solution  # Solution pour le plus petit pas
+            if etude.stats is not None:
+                st.caption(f"Statistiques : {etude.stats}")
+            errors = list(etude.erreurs)  # Erreurs pour les différentes valeurs de h (nan sans solution exacte)
             
             errors_all_methods[methode] = errors  # Stocker les erreurs de cette méthode pour calculer l'ordre de convergence
 
             # Tracé de la solution numérique et exacte sur chaque subplot
-            axes[i].plot(t, y, label=f"Solution numérique ({methode})", linewidth=2)
+            axes[i].plot(*reduire(t, y, n_points_trace, reduction), label=f"Solution numérique ({methode})", linewidth=2)
             if y_exact:  # Si une solution exacte est donnée, la tracer
-                axes[i].plot(t, y_exact(t), '--', label="Solution exacte", color='k')
+                axes[i].plot(*reduire(t, y_exact(t), n_points_trace, reduction), '--', label="Solution exacte", color='k')
             axes[i].set_xlabel("Temps t")
             axes[i].set_ylabel("y(t)")
             axes[i].set_title(f"Comparaison pour {methode}")
@@ -117,6 +142,11 @@ if f is not None:
             axes_error[i].legend()
             axes_error[i].grid()
 
+            # Téléchargement des valeurs de la solution
+            bouton_telechargement(st, t, y, f"valeurs_solution_{methode}",
+                                  f"Télécharger les valeurs numériques ({methode})", format_export, decimation=decimation,
+                                  key=f"valeurs_{i}")
+
         # Afficher les graphiques
         st.pyplot(fig)
         st.pyplot(fig_error)
@@ -128,10 +158,13 @@ if f is not None:
             # Tracé des erreurs pour chaque méthode
             ax_loglog.loglog(h_values, errors, '-o', label=f"Erreur {methode}")
             
-            # Calcul de l'ordre de convergence basé sur les deux dernières erreurs
-            if len(errors) > 1:
-                p = np.log(errors[-2] / errors[-1]) / np.log(h_values[-2] / h_values[-1])
-                st.write(f"Ordre de convergence pour la méthode {methode} : {round(p)}")
+            # Ordre de convergence : pente des moindres carrés sur tous les pas
+            p = etudes[methode].ordre
+            if etudes[methode].adaptative:
+                st.caption(f"La méthode {methode} est adaptative (h n'est que le pas initial) : "
+                           "pas d'ordre de convergence en h.")
+            elif np.isfinite(p):
+                st.write(f"Ordre de convergence pour la méthode {methode} : {round(p)} ({p:.2f})")
         
         ax_loglog.set_xlabel('log(h)')
         ax_loglog.set_ylabel('log(||e||_∞)')
@@ -139,3 +172,8 @@ if f is not None:
         ax_loglog.legend()
         ax_loglog.grid(True, which="both", linestyle='--')
         st.pyplot(fig_loglog)
+
+        # Téléchargement des graphiques
+        bouton_figure(st, fig, "solutions", "Télécharger le graphique des solutions")
+        bouton_figure(st, fig_error, "erreurs", "Télécharger le graphique des erreurs")
+        bouton_figure(st, fig_loglog, "convergence", "Télécharger le graphique de convergence")
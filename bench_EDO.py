@@ -0,0 +1,217 @@
+# -*- coding: utf-8 -*-
+"""
+Banc d'essai de toutes les méthodes de methodes_num_EDO et Methodes_num_EDOS.
+
+Pour chaque problème à solution connue, chaque dimension, chaque nombre de pas
+N et chaque méthode, on mesure :
+- le temps d'exécution (meilleur de plusieurs répétitions)
+- le nombre d'appels au second membre
+- le pic de mémoire relevé par tracemalloc (trajectoire comprise)
+- l'erreur maximale par rapport à la solution exacte
+
+Problèmes :
+- scalaire : y' = -y sin(t), y(0) = e, solution exp(cos(t)) (methodes_num_EDO)
+- oscillateur : y1' = y2, y2' = -y1, solution (cos t, -sin t)
+- decroissance : y' = -lambda y, second membre léger (expressions compilées)
+- lineaire_dense : y' = A y avec A symétrique dense, second membre coûteux
+- raide : y_i' = -lambda_i (y_i - cos t) - sin t, lambda_i jusqu'à 1e4,
+  solution cos t (méthodes implicites et adaptatives seulement)
+Les méthodes symplectiques Verlet et Yoshida4 ne sont mesurées que sur
+l'oscillateur (système hamiltonien séparable), et aucune méthode symplectique
+sur le problème scalaire (methodes_num_EDO ne les propose pas).
+
+Les résultats peuvent être enregistrés en JSON (--enregistrer) et comparés à
+une référence (--comparer) : les écarts de temps au-delà de --seuil, les
+erreurs plus grandes et les nombres d'appels différents sont signalés, et le
+code de sortie vaut 1 en cas de régression. Avec --generique, les noyaux
+générés (voir noyaux_EDO) sont désactivés, pour mesurer le chemin générique.
+Usage : python bench_EDO.py [--N 1000 10000] [--dims 2 10 100] [--enregistrer ref.json] [--comparer ref.json]
+"""
+
+import argparse
+import json
+import platform
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+from compilateur_EDO import compiler_rhs
+from methodes_num_EDO import methodes_num_EDO
+from Methodes_num_EDOS import Methodes_num_EDOS
+from symplectique_EDO import METHODES_SYMPLECTIQUES
+
+METHODES = ['Euler', 'Trapèze', 'RK4', 'DOPRI5', 'AB3', 'Pred-Cor', 'BDF', 'Rosenbrock', 'Auto',
+            'Verlet', 'Yoshida4', 'Point-Milieu']
+METHODES_SCALAIRES = [m for m in METHODES if m not in METHODES_SYMPLECTIQUES]
+METHODES_NON_SEPAREES = [m for m in METHODES if m not in ('Verlet', 'Yoshida4')]
+METHODES_RAIDES = ['Trapèze', 'BDF', 'Rosenbrock', 'Auto', 'Point-Milieu']
+T = 10.0
+
+
+def probleme_scalaire(dim=1):
+    return "-y * np.sin(t)", np.exp(1), lambda t: np.exp(np.cos(t))
+
+
+def probleme_oscillateur(dim=2):
+    return ["y[1]", "-y[0]"], [1.0, 0.0], lambda t: np.column_stack([np.cos(t), -np.sin(t)])
+
+
+def probleme_decroissance(dim):
+    lambdas = np.linspace(0.5, 2.0, dim)
+    f = [f"-{float(l)!r} * y[{i}]" for i, l in enumerate(lambdas)]
+    return f, np.ones(dim), lambda t: np.exp(-np.outer(t, lambdas))
+
+
+def probleme_lineaire_dense(dim):
+    rng = np.random.default_rng(0)
+    M = rng.standard_normal((dim, dim)) / np.sqrt(dim)
+    A = -(M @ M.T + 0.5 * np.eye(dim))
+    valeurs, vecteurs = np.linalg.eigh(A)
+    y0 = np.ones(dim)
+    c = vecteurs.T @ y0
+
+    def f(t, y):
+        return A @ y
+
+    return f, y0, lambda t: (vecteurs @ (c[:, np.newaxis] * np.exp(np.outer(valeurs, t)))).T
+
+
+def probleme_raide(dim):
+    lambdas = np.logspace(0, 4, dim)
+    f = [f"-{float(l)!r} * (y[{i}] - np.cos(t)) - np.sin(t)" for i, l in enumerate(lambdas)]
+    return f, np.ones(dim), lambda t: np.repeat(np.cos(t)[:, np.newaxis], dim, axis=1)
+
+
+# (module, problème, dimensions fixes ou None pour utiliser --dims, méthodes mesurées)
+PROBLEMES = {
+    'scalaire': ('methodes_num_EDO', probleme_scalaire, [1], METHODES_SCALAIRES),
+    'oscillateur': ('Methodes_num_EDOS', probleme_oscillateur, [2], METHODES),
+    'decroissance': ('Methodes_num_EDOS', probleme_decroissance, None, METHODES_NON_SEPAREES),
+    'lineaire_dense': ('Methodes_num_EDOS', probleme_lineaire_dense, None, METHODES_NON_SEPAREES),
+    'raide': ('Methodes_num_EDOS', probleme_raide, None, METHODES_RAIDES),
+}
+
+SOLVEURS = {'methodes_num_EDO': methodes_num_EDO, 'Methodes_num_EDOS': Methodes_num_EDOS}
+
+
+def _compter_appels(f):
+    def g(t, y):
+        g.n += 1
+        return f(t, y)
+    g.n = 0
+    return g
+
+
+def mesurer(solveur, methode, f, y0, y_exact, N, repetitions, noyau=True):
+    """Temps, appels au second membre, pic mémoire et erreur d'une résolution."""
+    f = compiler_rhs(f)
+    h = T / N
+    duree = np.inf
+    for _ in range(repetitions):
+        debut = time.perf_counter()
+        t, y = solveur(methode, f, 0.0, y0, h, N, noyau=noyau)
+        duree = min(duree, time.perf_counter() - debut)
+    erreur = float(np.max(np.abs(y_exact(t) - y)))
+
+    # Passages instrumentés séparés (le compteur et tracemalloc ralentissent l'exécution)
+    compteur = _compter_appels(f)
+    solveur(methode, compteur, 0.0, y0, h, N)
+    tracemalloc.start()
+    solveur(methode, f, 0.0, y0, h, N, noyau=noyau)
+    _, pic = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        'duree': duree,
+        'nfev': compteur.n,
+        'memoire_pic': pic,
+        'erreur': erreur,
+        'pas': len(t) - 1,
+        'pas_par_seconde': (len(t) - 1) / duree,
+    }
+
+
+def executer(problemes, methodes, dims, valeurs_N, repetitions, afficher=print, noyau=True):
+    resultats = {}
+    afficher(f"{'module':<18}{'problème':<16}{'méthode':<14}{'dim':>5}{'N':>8}{'temps (s)':>11}"
+             f"{'appels f':>10}{'mémoire (o)':>13}{'erreur':>11}")
+    for nom in problemes:
+        module, probleme, dims_fixes, applicables = PROBLEMES[nom]
+        for dim in dims_fixes or dims:
+            f, y0, y_exact = probleme(dim)
+            for N in valeurs_N:
+                for methode in (m for m in methodes if m in applicables):
+                    try:
+                        r = mesurer(SOLVEURS[module], methode, f, y0, y_exact, N, repetitions, noyau)
+                    except Exception as e:
+                        afficher(f"{module:<18}{nom:<16}{methode:<14}{dim:>5}{N:>8}  échec : {e}")
+                        continue
+                    resultats[f"{module}/{nom}/{methode}/dim={dim}/N={N}"] = r
+                    afficher(f"{module:<18}{nom:<16}{methode:<14}{dim:>5}{N:>8}{r['duree']:>11.4f}"
+                             f"{r['nfev']:>10}{r['memoire_pic']:>13}{r['erreur']:>11.2e}")
+    return resultats
+
+
+def comparer(resultats, reference, seuil=0.2):
+    """
+    Compare des résultats à une référence et renvoie la liste des régressions
+    (messages). Les améliorations de temps notables sont aussi affichées.
+    """
+    regressions = []
+    for cle, r in resultats.items():
+        ref = reference.get(cle)
+        if ref is None:
+            continue
+        rapport = r['duree'] / ref['duree']
+        # Les écarts inférieurs à la milliseconde relèvent du bruit de mesure
+        if rapport > 1 + seuil and r['duree'] - ref['duree'] > 1e-3:
+            regressions.append(f"{cle} : temps x{rapport:.2f} ({ref['duree']:.4f} s -> {r['duree']:.4f} s)")
+        elif rapport < 1 / (1 + seuil):
+            print(f"amélioration {cle} : temps x{rapport:.2f}")
+        if r['nfev'] != ref['nfev']:
+            regressions.append(f"{cle} : appels à f {ref['nfev']} -> {r['nfev']}")
+        # Tolérance relative et plancher d'arrondi pour l'erreur
+        if r['erreur'] > 1.5 * ref['erreur'] + 1e-13:
+            regressions.append(f"{cle} : erreur {ref['erreur']:.3e} -> {r['erreur']:.3e}")
+        if r['memoire_pic'] > (1 + seuil) * ref['memoire_pic'] + 2**16:
+            regressions.append(f"{cle} : mémoire {ref['memoire_pic']} -> {r['memoire_pic']} o")
+    return regressions
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--problemes', nargs='+', default=list(PROBLEMES), choices=list(PROBLEMES))
+    parser.add_argument('--methodes', nargs='+', default=METHODES, choices=METHODES)
+    parser.add_argument('--dims', type=int, nargs='+', default=[2, 10, 100])
+    parser.add_argument('--N', type=int, nargs='+', default=[1000, 10000])
+    parser.add_argument('--repetitions', type=int, default=3)
+    parser.add_argument('--enregistrer', help="fichier JSON où écrire les résultats")
+    parser.add_argument('--comparer', help="fichier JSON de référence")
+    parser.add_argument('--seuil', type=float, default=0.2, help="écart de temps relatif toléré")
+    parser.add_argument('--generique', action='store_true', help="sans les noyaux générés")
+    args = parser.parse_args()
+
+    resultats = executer(args.problemes, args.methodes, args.dims, args.N, args.repetitions,
+                         noyau=not args.generique)
+
+    if args.enregistrer:
+        with open(args.enregistrer, 'w', encoding='utf-8') as fichier:
+            json.dump({
+                'environnement': {
+                    'python': platform.python_version(),
+                    'numpy': np.__version__,
+                    'machine': platform.machine(),
+                    'systeme': platform.platform(),
+                },
+                'resultats': resultats,
+            }, fichier, indent=1, ensure_ascii=False)
+
+    if args.comparer:
+        with open(args.comparer, encoding='utf-8') as fichier:
+            reference = json.load(fichier)['resultats']
+        regressions = comparer(resultats, reference, args.seuil)
+        for message in regressions:
+            print(f"RÉGRESSION {message}")
+        print(f"{len(regressions)} régression(s) sur {len(set(resultats) & set(reference))} mesures comparées")
+        sys.exit(1 if regressions else 0)
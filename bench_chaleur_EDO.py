@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+"""
+Équation de la chaleur 1-D : jacobien dense et jacobiens creux (voir creux_EDO).
+
+u_t = u_xx sur ]0, 1[, u = 0 aux bords, u(0, x) = sin(pi x), discrétisée par
+différences finies sur n points intérieurs (méthode des lignes) : un système
+raide de n équations dont le jacobien est tridiagonal. Pour chaque n et
+chaque variante, on mesure le temps de calcul, les appels au second membre,
+les jacobiens et factorisations, et l'erreur par rapport à la solution
+exacte du système discrétisé, exp(lambda t) sin(pi x) avec
+lambda = -4 sin^2(pi dx / 2) / dx^2.
+
+Variantes :
+- dense : différences finies colonne par colonne (n appels à f par
+  jacobien) et LU dense, limité à --dim-max-dense
+- bande, lu : JacobienCreux sur le motif tridiagonal (3 groupes de colonnes,
+  un seul appel à f vectorisée), LU bande LAPACK ou LU creuse
+- bande-non-vectorise : même motif, un appel à f par groupe de colonnes
+Usage : python bench_chaleur_EDO.py [--n 100 1000 10000 100000] [--methodes Trapèze BDF]
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from Methodes_num_EDOS import Methodes_num_EDOS
+from creux_EDO import JacobienCreux
+from stats_EDO import StatsSolveur
+
+VARIANTES = ('dense', 'bande', 'lu', 'bande-non-vectorise')
+
+
+def chaleur(n):
+    """Second membre vectorisé (y de forme (n,) ou (n, k)), motif tridiagonal et condition initiale."""
+    dx = 1.0 / (n + 1)
+
+    def f(t, y):
+        d = -2.0 * y
+        d[1:] += y[:-1]
+        d[:-1] += y[1:]
+        return d / dx**2
+
+    motif = [tuple(j for j in (i - 1, i, i + 1) if 0 <= j < n) for i in range(n)]
+    x = np.linspace(dx, 1.0 - dx, n)
+    valeur_propre = -4.0 * np.sin(np.pi * dx / 2) ** 2 / dx**2
+    return f, motif, np.sin(np.pi * x), valeur_propre
+
+
+def mesurer(methode, variante, n, T, h):
+    f, motif, u0, valeur_propre = chaleur(n)
+    jac = None
+    debut = time.perf_counter()
+    if variante != 'dense':
+        jac = JacobienCreux(motif, vectorise=variante != 'bande-non-vectorise',
+                            solveur='lu' if variante == 'lu' else 'bande')
+    preparation = time.perf_counter() - debut
+    stats = StatsSolveur()
+    debut = time.perf_counter()
+    t, u = Methodes_num_EDOS(methode, f, 0.0, u0, h, int(round(T / h)), jac=jac, stats=stats)
+    duree = time.perf_counter() - debut
+    erreur = np.max(np.abs(u[-1] - np.exp(valeur_propre * t[-1]) * u0))
+    return {'duree': duree, 'preparation': preparation, 'nfev': stats.nfev,
+            'jacobiens': stats.n_jacobiens, 'lu': stats.n_factorisations, 'erreur': erreur}
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--n', type=int, nargs='+', default=[100, 1000, 10_000, 100_000])
+    parser.add_argument('--methodes', nargs='+', default=['Trapèze', 'BDF'])
+    parser.add_argument('--variantes', nargs='+', default=list(VARIANTES), choices=VARIANTES)
+    parser.add_argument('--T', type=float, default=0.1)
+    parser.add_argument('--h', type=float, default=1e-3)
+    parser.add_argument('--dim-max-dense', type=int, default=2000)
+    args = parser.parse_args()
+
+    print(f"{'n':>8} {'méthode':<10}{'variante':<21}{'temps (s)':>10}{'motif (s)':>10}"
+          f"{'appels f':>10}{'jacobiens':>10}{'LU':>6}{'erreur':>11}")
+    for n in args.n:
+        for methode in args.methodes:
+            for variante in args.variantes:
+                if variante == 'dense' and n > args.dim_max_dense:
+                    continue
+                r = mesurer(methode, variante, n, args.T, args.h)
+                print(f"{n:>8} {methode:<10}{variante:<21}{r['duree']:>10.3f}{r['preparation']:>10.3f}"
+                      f"{r['nfev']:>10}{r['jacobiens']:>10}{r['lu']:>6}{r['erreur']:>11.2e}")
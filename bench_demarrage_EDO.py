@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+"""
+Temps de démarrage et de réexécution de l'interface Application_EDO.
+
+Chaque répétition lance un processus neuf (démarrage à froid) qui exécute
+l'application avec streamlit.testing et mesure :
+- import : import de streamlit seul (hors application)
+- premiere : première exécution du script (imports des modules de l'application compris)
+- reexecution : réexécution sans changement (un clic, un widget modifié)
+- saisie : réexécution après modification de l'EDO
+- resultats : première réexécution une fois la simulation terminée
+- resultats_reexecution : réexécution avec ces résultats affichés
+On relève aussi les modules lourds (scipy, pyarrow, pandas, matplotlib)
+chargés après la première exécution. La médiane des répétitions est affichée
+et peut être enregistrée en JSON (--enregistrer) pour comparer deux versions.
+Usage : python bench_demarrage_EDO.py [--repetitions 5] [--enregistrer demarrage.json]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+APPLICATION = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'Application_EDO.py')
+MODULES_LOURDS = ('scipy', 'pyarrow', 'pandas', 'matplotlib')
+MESURES = ('import', 'premiere', 'reexecution', 'saisie', 'resultats', 'resultats_reexecution')
+
+
+def mesurer_processus():
+    """Mesures d'un démarrage à froid (exécuté dans le processus enfant)."""
+    horloge = time.perf_counter
+    debut = horloge()
+    from streamlit.testing.v1 import AppTest
+    mesures = {'import': horloge() - debut}
+
+    at = AppTest.from_file(APPLICATION, default_timeout=120)
+    debut = horloge()
+    at.run()
+    mesures['premiere'] = horloge() - debut
+    mesures['modules'] = [m for m in MODULES_LOURDS if m in sys.modules]
+
+    debut = horloge()
+    at.run()
+    mesures['reexecution'] = horloge() - debut
+
+    debut = horloge()
+    at.text_area[0].set_value("-y * np.cos(t)").run()
+    mesures['saisie'] = horloge() - debut
+
+    # Simulation en arrière-plan : on attend la fin avant de mesurer l'affichage
+    at.text_area[0].set_value("-y * np.sin(t)").run()
+    at.sidebar.button[0].click().run()
+    limite = horloge() + 60
+    while at.get('progress') and horloge() < limite:
+        time.sleep(0.05)
+        at.run()
+    debut = horloge()
+    at.run()
+    mesures['resultats'] = horloge() - debut
+    debut = horloge()
+    at.run()
+    mesures['resultats_reexecution'] = horloge() - debut
+    return mesures
+
+
+if __name__ == '__main__':
+    if sys.argv[1:] == ['--enfant']:
+        print(json.dumps(mesurer_processus()))
+        sys.exit(0)
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repetitions', type=int, default=5)
+    parser.add_argument('--enregistrer', help="fichier JSON où écrire les résultats")
+    args = parser.parse_args()
+
+    environnement = {**os.environ, 'PYTHONWARNINGS': 'ignore'}
+    series = []
+    for _ in range(args.repetitions):
+        sortie = subprocess.run([sys.executable, __file__, '--enfant'], capture_output=True, text=True,
+                                env=environnement, check=True).stdout
+        series.append(json.loads(sortie.strip().splitlines()[-1]))
+
+    resultats = {m: statistics.median(s[m] for s in series) for m in MESURES}
+    resultats['modules'] = series[0]['modules']
+    for m in MESURES:
+        print(f"{m:<24}{resultats[m]:>9.3f} s")
+    print(f"modules lourds après la première exécution : {', '.join(resultats['modules']) or 'aucun'}")
+    if args.enregistrer:
+        with open(args.enregistrer, 'w', encoding='utf-8') as fichier:
+            json.dump(resultats, fichier, indent=1, ensure_ascii=False)
@@ -0,0 +1,51 @@
+# -*- coding: utf-8 -*-
+"""
+Trajectoire complète contre échantillonnage t_eval par sortie dense (voir dense_EDO).
+
+Pendule simple sur [0, T] avec N pas : pour chaque méthode, la trajectoire
+complète (N + 1 points) est comparée à la résolution qui ne garde que
+--points instants régulièrement espacés. On mesure le temps, la taille de ce
+qui est stocké, l'écart en T et l'écart maximal aux instants demandés, par
+rapport à une référence DOPRI5 à tolérances serrées. Avec t_eval, la
+mémoire ne dépend plus de N : le pas redevient un pur choix de précision.
+Usage : python bench_dense_EDO.py [--N 200000] [--T 1000] [--points 500] [--methodes Euler RK4 AB3 Pred-Cor DOPRI5]
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from Methodes_num_EDOS import Methodes_num_EDOS
+
+PENDULE = ["y[1]", "-np.sin(y[0])"]
+
+
+def mesurer(resoudre):
+    debut = time.perf_counter()
+    t, y = resoudre()
+    return t, y, time.perf_counter() - debut
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--N', type=int, default=200_000)
+    parser.add_argument('--T', type=float, default=1000.0)
+    parser.add_argument('--points', type=int, default=500)
+    parser.add_argument('--methodes', nargs='+', default=['Euler', 'RK4', 'AB3', 'Pred-Cor', 'DOPRI5'])
+    args = parser.parse_args()
+    h = args.T / args.N
+    t_eval = np.linspace(0.0, args.T, args.points)
+    _, reference = Methodes_num_EDOS('DOPRI5', PENDULE, 0.0, [1.0, 0.0], h, args.N, rtol=1e-12, atol=1e-12,
+                                     t_eval=t_eval)
+
+    print(f"Pendule, T = {args.T:g}, N = {args.N}, {args.points} instants demandés")
+    print(f"{'méthode':<10}{'sortie':<10}{'temps (s)':>10}{'stocké (Mo)':>13}{'écart en T':>12}{'écart max':>11}")
+    for methode in args.methodes:
+        for sortie, options in (('complète', {}), ('t_eval', {'t_eval': t_eval})):
+            t, y, duree = mesurer(lambda: Methodes_num_EDOS(methode, PENDULE, 0.0, [1.0, 0.0], h, args.N, **options))
+            # Le dernier instant (T) est commun aux deux sorties ; l'écart sur tous
+            # les instants demandés n'a de sens que pour t_eval
+            ecart_max = np.max(np.abs(y - reference)) if options else np.nan
+            print(f"{methode:<10}{sortie:<10}{duree:>10.3f}{(t.nbytes + y.nbytes) / 2**20:>13.2f}"
+                  f"{np.max(np.abs(y[-1] - reference[-1])):>12.1e}{ecart_max:>11.1e}")
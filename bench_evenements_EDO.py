@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+"""
+Arrêt anticipé par événement terminal et garde-fou (voir evenements_EDO).
+
+Deux études de seuil, chaque trajectoire étant résolue sur tout l'horizon
+puis avec arrêt anticipé :
+- seuil : croissance logistique y' = r y (1 - y) depuis y0 = 0.01 pour
+  --cas valeurs de r ; événement terminal y = 0.9 (instant d'atteinte
+  ln(9 * 99) / r, comparé à la valeur exacte)
+- divergence : y' = y^2 depuis y0 dans [1, 2] (explosion en t = 1 / y0) ;
+  garde-fou norme_max = 1e8 au lieu d'un calcul qui remplit le reste de la
+  trajectoire de inf et nan. Sans garde-fou, les méthodes adaptatives
+  échouent (pas trop petit) : ces cas sont comptés à part.
+Les deux études portent sur l'horizon [0, 100], le seuil ou l'explosion
+étant atteints avant t = 5.
+Pour chaque méthode : temps total, pas effectués, erreur maximale sur
+l'instant d'atteinte du seuil et surcoût du suivi d'un événement qui ne se
+déclenche jamais. La variante « rappel » vérifie qu'un rappel de
+l'utilisateur (StatsSolveur.rappel) qui demande l'arrêt après --arret pas
+l'emporte sur le suivi des événements.
+Usage : python bench_evenements_EDO.py [--cas 20] [--N 20000] [--arret 10] [--methodes RK4 DOPRI5]
+"""
+
+import argparse
+import time
+import warnings
+
+import numpy as np
+
+from Methodes_num_EDOS import Methodes_num_EDOS
+from evenements_EDO import Evenement, Evenements
+from stats_EDO import StatsSolveur
+
+EXPLOSION = ["y[0] ** 2"]
+
+
+def chronometrer(resoudre, cas):
+    """Durée totale, nombre de points et nombre d'échecs de resoudre(c) pour chaque c de cas."""
+    points = echecs = 0
+    debut = time.perf_counter()
+    for c in cas:
+        try:
+            points += len(resoudre(c)[0])
+        except RuntimeError:
+            echecs += 1
+    return time.perf_counter() - debut, points, echecs
+
+
+def logistique(r):
+    return [f"{float(r)!r} * y[0] * (1 - y[0])"]
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--cas', type=int, default=20, help="trajectoires par étude")
+    parser.add_argument('--N', type=int, default=20_000, help="pas de l'horizon complet")
+    parser.add_argument('--arret', type=int, default=10, help="pas avant l'arrêt demandé par le rappel")
+    parser.add_argument('--methodes', nargs='+', default=['RK4', 'DOPRI5'])
+    args = parser.parse_args()
+    taux = np.linspace(1.0, 5.0, args.cas)
+    departs = np.linspace(1.0, 2.0, args.cas)
+    T = 100.0
+    h = T / args.N
+    warnings.simplefilter('ignore', RuntimeWarning)
+
+    print(f"{'étude':<12}{'méthode':<10}{'variante':<12}{'temps (s)':>10}{'points':>10}{'échecs':>8}{'erreur':>10}")
+    for methode in args.methodes:
+        def seuil(r, evenements=None, stats=None):
+            return Methodes_num_EDOS(methode, logistique(r), 0.0, [0.01], h, args.N, noyau=False,
+                                     evenements=evenements, stats=stats)
+
+        duree, points, echecs = chronometrer(seuil, taux)
+        print(f"{'seuil':<12}{methode:<10}{'complet':<12}{duree:>10.3f}{points:>10}{echecs:>8}{'':>10}")
+        erreurs = []
+
+        def seuil_arret(r):
+            evenements = Evenements(Evenement("y[0] - 0.9", terminal=True))
+            t, y = seuil(r, evenements)
+            erreurs.append(abs(evenements.t_arret - np.log(9 * 99) / r))
+            return t, y
+
+        duree, points, echecs = chronometrer(seuil_arret, taux)
+        print(f"{'seuil':<12}{methode:<10}{'événement':<12}{duree:>10.3f}{points:>10}{echecs:>8}{max(erreurs):>10.1e}")
+        duree, points, echecs = chronometrer(lambda r: seuil(r, Evenements(Evenement("y[0] - 2.0"))), taux)
+        print(f"{'seuil':<12}{methode:<10}{'suivi seul':<12}{duree:>10.3f}{points:>10}{echecs:>8}{'':>10}")
+        arrets = StatsSolveur(rappel=lambda i, t, y: i >= args.arret)
+        duree, points, echecs = chronometrer(lambda r: seuil(r, Evenements(Evenement("y[0] - 2.0")), arrets), taux)
+        print(f"{'seuil':<12}{methode:<10}{'rappel':<12}{duree:>10.3f}{points:>10}{echecs:>8}{'':>10}")
+        if points != (args.arret + 1) * (len(taux) - echecs):
+            raise SystemExit(f"{methode} : l'arrêt demandé par le rappel n'a pas été respecté avec evenements=.")
+
+        def explosion(y0, evenements=None):
+            return Methodes_num_EDOS(methode, EXPLOSION, 0.0, [y0], h, args.N, noyau=False,
+                                     evenements=evenements)
+
+        duree, points, echecs = chronometrer(explosion, departs)
+        print(f"{'divergence':<12}{methode:<10}{'complet':<12}{duree:>10.3f}{points:>10}{echecs:>8}{'':>10}")
+        duree, points, echecs = chronometrer(lambda y0: explosion(y0, Evenements(norme_max=1e8)), departs)
+        print(f"{'divergence':<12}{methode:<10}{'garde-fou':<12}{duree:>10.3f}{points:>10}{echecs:>8}{'':>10}")
@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+"""
+Parareal contre résolution fine séquentielle (voir parareal_EDO).
+
+Pour chaque problème et chaque nombre de pas grossiers par tranche : nombre
+d'itérations, écart en T à la résolution fine séquentielle (RK4 au même pas),
+temps mesurés et accélération estimée sur --coeurs cœurs à partir des durées
+mesurées des propagateurs. Sur une machine qui a moins de cœurs que de
+tranches, l'accélération mesurée est inférieure à 1 : seule l'estimation dit
+si Parareal paie sur une machine plus large. Parareal paie quand le
+propagateur grossier est bien moins coûteux que le fin (second membre
+coûteux ; --sans-noyau l'imite en passant par le chemin générique) et
+qu'il reste assez précis pour converger en peu d'itérations.
+Usage : python bench_parareal_EDO.py [--N 1000000] [--T 100] [--tranches 32] [--grossiers 100 400]
+                                     [--processus 4] [--coeurs 8 32] [--tol 1e-8] [--sans-noyau]
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from Methodes_num_EDOS import Methodes_num_EDOS
+from parareal_EDO import parareal
+
+PROBLEMES = {
+    'pendule': (["y[1]", "-np.sin(y[0])"], [1.0, 0.0]),
+    'pendule amorti': (["y[1]", "-0.1 * y[1] - np.sin(y[0])"], [1.0, 0.0]),
+    'Van der Pol': (["y[1]", "2 * (1 - y[0] ** 2) * y[1] - y[0]"], [2.0, 0.0]),
+}
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--N', type=int, default=1_000_000)
+    parser.add_argument('--T', type=float, default=100.0)
+    parser.add_argument('--tranches', type=int, default=32)
+    parser.add_argument('--grossiers', type=int, nargs='+', default=[100, 400], help="pas grossiers par tranche")
+    parser.add_argument('--processus', type=int, default=None)
+    parser.add_argument('--coeurs', type=int, nargs='+', default=[8, 32])
+    parser.add_argument('--tol', type=float, default=1e-8)
+    parser.add_argument('--sans-noyau', action='store_true', help="propagateur fin sans noyau généré")
+    args = parser.parse_args()
+    h = args.T / args.N
+    options = {'noyau': False} if args.sans_noyau else {}
+
+    print(f"T = {args.T:g}, N = {args.N}, {args.tranches} tranches, tol = {args.tol:g}")
+    print(f"{'problème':<16}{'grossiers':>10}{'itér.':>7}{'écart en T':>12}{'séq. (s)':>10}{'para. (s)':>11}"
+          f"{'gross. (s)':>11}{'mesurée':>9}" + "".join(f"{f'est. {c}':>10}" for c in args.coeurs))
+    for nom, (f, y0) in PROBLEMES.items():
+        debut = time.perf_counter()
+        _, y = Methodes_num_EDOS('RK4', f, 0.0, y0, h, args.N, **options)
+        sequentiel = time.perf_counter() - debut
+        for grossiers in args.grossiers:
+            r = parareal(f, 0.0, y0, h, args.N, tranches=args.tranches, pas_grossiers=grossiers, tol=args.tol,
+                         processus=args.processus, **options)
+            iterations = f"{r.iterations}" + ("" if r.converge else "*")
+            print(f"{nom:<16}{grossiers:>10}{iterations:>7}{np.max(np.abs(r.y[-1] - y[-1])):>12.1e}"
+                  f"{sequentiel:>10.3f}{r.temps_total:>11.3f}{r.temps_grossier:>11.3f}{sequentiel / r.temps_total:>9.2f}"
+                  + "".join(f"{r.acceleration_estimee(c):>10.2f}" for c in args.coeurs))
+    print("* : non convergé (divergence du propagateur grossier)")
@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+"""
+Mémoire, vitesse et précision selon le type flottant (voir precision_EDO).
+
+Trois configurations (stockage / calcul) sont comparées :
+float64/float64 (défaut), float32/float64 et float32/float32.
+- longue : pendule simple sur N pas (système de 2 équations), RK4 et Pred-Cor
+  par le chemin générique : temps, taille de la trajectoire et écart maximal
+  à la trajectoire float64/float64
+- ensemble : --membres pendules résolus ensemble par RK4 (tampons), mêmes
+  mesures et pic mémoire (tracemalloc, mesuré par une seconde exécution : le
+  suivi des allocations ralentit fortement les boucles longues)
+- convergence : étude de convergence (convergence_EDO) sur l'oscillateur
+  harmonique : erreur maximale par pas et ordre estimé. En calcul float32
+  l'erreur plafonne vers 1e-6 quand h diminue ; le stockage float32 seul
+  ajoute une erreur d'arrondi de l'ordre de 1e-8.
+Usage : python bench_precision_EDO.py [--N 200000] [--membres 100000] [--parties longue ensemble convergence]
+"""
+
+import argparse
+import time
+import tracemalloc
+
+import numpy as np
+
+from Methodes_num_EDOS import Methodes_num_EDOS
+from convergence_EDO import etude_convergence
+from ensemble_EDOS import Methodes_num_EDOS_ensemble
+
+CONFIGURATIONS = [('float64', 'float64'), ('float32', 'float64'), ('float32', 'float32')]
+PENDULE = ["y[1]", "-np.sin(y[0])"]
+OSCILLATEUR = ["y[1]", "-y[0]"]
+SOLUTION_OSCILLATEUR = "np.array([np.cos(t), -np.sin(t)])"
+PARTIES = ('longue', 'ensemble', 'convergence')
+
+
+def mesurer(resoudre, pic=False):
+    """y, durée et, si pic est vrai, pic mémoire en Mo (nan sinon) de resoudre()."""
+    debut = time.perf_counter()
+    _, y = resoudre()
+    duree = time.perf_counter() - debut
+    if not pic:
+        return y, duree, np.nan
+    tracemalloc.start()
+    resoudre()
+    pic = tracemalloc.get_traced_memory()[1] / 2**20
+    tracemalloc.stop()
+    return y, duree, pic
+
+
+def comparer(titre, resoudre, pic=False):
+    """Mesure resoudre(dtype, dtype_calcul) pour chaque configuration."""
+    print(f"\n{titre}")
+    print(f"{'stockage':<10}{'calcul':<10}{'temps (s)':>10}{'trajectoire (Mo)':>18}{'pic (Mo)':>10}{'écart':>10}")
+    reference = None
+    for dtype, dtype_calcul in CONFIGURATIONS:
+        y, duree, pic_mo = mesurer(lambda: resoudre(dtype, dtype_calcul), pic)
+        if reference is None:
+            reference = y
+        ecart = np.max(np.abs(y - reference))
+        print(f"{dtype:<10}{dtype_calcul:<10}{duree:>10.3f}{y.nbytes / 2**20:>18.1f}{pic_mo:>10.1f}{ecart:>10.1e}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--N', type=int, default=200_000, help="pas de la simulation longue")
+    parser.add_argument('--membres', type=int, default=100_000, help="taille de l'ensemble")
+    parser.add_argument('--parties', nargs='+', default=list(PARTIES), choices=PARTIES)
+    args = parser.parse_args()
+
+    if 'longue' in args.parties:
+        for methode in ('RK4', 'Pred-Cor'):
+            comparer(f"Pendule, {methode}, {args.N} pas",
+                     lambda dtype, dtype_calcul: Methodes_num_EDOS(
+                         methode, PENDULE, 0.0, [1.0, 0.0], 0.01, args.N, noyau=False,
+                         dtype=dtype, dtype_calcul=dtype_calcul))
+
+    if 'ensemble' in args.parties:
+        y0 = np.random.default_rng(0).uniform(-1.0, 1.0, (args.membres, 2))
+        comparer(f"Ensemble de {args.membres} pendules, RK4, 200 pas",
+                 lambda dtype, dtype_calcul: Methodes_num_EDOS_ensemble(
+                     'RK4', PENDULE, 0.0, y0, 0.01, 200, tampons=True, dtype=dtype, dtype_calcul=dtype_calcul),
+                 pic=True)
+
+    if 'convergence' in args.parties:
+        h_values = [0.1, 0.05, 0.025, 0.0125, 0.00625]
+        print(f"\nConvergence, oscillateur harmonique sur [0, 10], h = {', '.join(map(str, h_values))}")
+        for dtype, dtype_calcul in CONFIGURATIONS:
+            etudes = etude_convergence(['Euler', 'RK4', 'Pred-Cor'], OSCILLATEUR, SOLUTION_OSCILLATEUR, 0.0,
+                                       [1.0, 0.0], 10.0, h_values=h_values, processus=1,
+                                       dtype=dtype, dtype_calcul=dtype_calcul)
+            for methode, r in etudes.items():
+                erreurs = " ".join(f"{e:9.2e}" for e in r.erreurs)
+                print(f"{dtype:<9}{dtype_calcul:<9}{methode:<10}{erreurs}   ordre {r.ordre:.2f}")
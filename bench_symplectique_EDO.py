@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+"""
+Dérive de l'énergie sur de longues durées : méthodes classiques et symplectiques.
+
+Pour chaque problème hamiltonien, chaque méthode et chaque pas h, on mesure
+le temps de calcul, le nombre d'appels au second membre et la dérive relative
+maximale de l'énergie sur [0, T]. On affiche ensuite, pour chaque méthode, le
+plus grand pas qui garde la dérive sous --seuil et le temps correspondant :
+c'est le coût d'une simulation longue à précision donnée.
+
+Problèmes (donnés sous forme séparée (vitesse, force), voir symplectique_EDO) :
+- pendule : q' = p, p' = -sin(q), H = p^2 / 2 - cos(q)
+- kepler : orbite d'excentricité 0,5, H = |p|^2 / 2 - 1 / |q|
+Usage : python bench_symplectique_EDO.py [--T 1000] [--h 0.2 0.1 0.05] [--seuil 1e-3]
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from Methodes_num_EDOS import Methodes_num_EDOS
+from stats_EDO import StatsSolveur
+from symplectique_EDO import derive_energie
+
+METHODES = ['Euler', 'RK4', 'AB3', 'Verlet', 'Yoshida4', 'Point-Milieu']
+
+RAYON_3 = "(y[0]**2 + y[1]**2) ** 1.5"
+PROBLEMES = {
+    'pendule': ((["y[0]"], ["-np.sin(y[0])"]), [2.0, 0.0], "0.5 * y[1]**2 - np.cos(y[0])"),
+    'kepler': ((["y[0]", "y[1]"], [f"-y[0] / {RAYON_3}", f"-y[1] / {RAYON_3}"]), [0.5, 0.0, 0.0, np.sqrt(3.0)],
+               "0.5 * (y[2]**2 + y[3]**2) - 1 / np.sqrt(y[0]**2 + y[1]**2)"),
+}
+
+
+def mesurer(methode, f, y0, hamiltonien, h, T):
+    stats = StatsSolveur()
+    debut = time.perf_counter()
+    with np.errstate(all='ignore'):
+        t, y = Methodes_num_EDOS(methode, f, 0.0, y0, h, int(T / h), stats=stats)
+        derive = derive_energie(t, y, hamiltonien).max()
+    return {
+        'duree': time.perf_counter() - debut,
+        'nfev': stats.nfev,
+        'derive': float(derive) if np.isfinite(derive) else np.inf,
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--problemes', nargs='+', default=list(PROBLEMES), choices=list(PROBLEMES))
+    parser.add_argument('--methodes', nargs='+', default=METHODES, choices=METHODES)
+    parser.add_argument('--T', type=float, default=1000.0)
+    parser.add_argument('--h', type=float, nargs='+', default=[0.2, 0.1, 0.05, 0.025])
+    parser.add_argument('--seuil', type=float, default=1e-3, help="dérive relative d'énergie tolérée")
+    args = parser.parse_args()
+
+    for nom in args.problemes:
+        f, y0, hamiltonien = PROBLEMES[nom]
+        print(f"\n{nom} (T = {args.T:g})")
+        print(f"{'méthode':<14}{'h':>8}{'temps (s)':>11}{'appels f':>10}{'dérive max':>12}")
+        meilleurs = {}
+        for methode in args.methodes:
+            for h in sorted(args.h, reverse=True):
+                r = mesurer(methode, f, y0, hamiltonien, h, args.T)
+                print(f"{methode:<14}{h:>8g}{r['duree']:>11.3f}{r['nfev']:>10}{r['derive']:>12.2e}")
+                if r['derive'] <= args.seuil and methode not in meilleurs:
+                    meilleurs[methode] = (h, r['duree'])
+        print(f"Plus grand pas avec une dérive <= {args.seuil:g} :")
+        for methode in args.methodes:
+            if methode in meilleurs:
+                h, duree = meilleurs[methode]
+                print(f"  {methode:<14} h = {h:<8g} {duree:.3f} s")
+            else:
+                print(f"  {methode:<14} aucun des pas essayés")
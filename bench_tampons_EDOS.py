@@ -0,0 +1,53 @@
+# -*- coding: utf-8 -*-
+"""
+Comparaison des noyaux Euler / RK4 de Methodes_num_EDOS avec et sans tampons.
+
+Pour chaque dimension et chaque nombre de pas, on mesure le temps d'exécution
+et le pic de mémoire temporaire (hors trajectoire) relevé par tracemalloc.
+Usage : python bench_tampons_EDOS.py [--dims 2 10 100 1000] [--N 1000 10000 100000 1000000]
+"""
+
+import argparse
+import time
+import tracemalloc
+
+import numpy as np
+from Methodes_num_EDOS import euler_explicite, rungekutta_4
+
+
+# Second membre linéaire y' = -y, capable d'écrire dans `out`
+def f(t, y, out=None):
+    return np.negative(y, out=out)
+
+
+def mesurer(methode, dim, N, tampons, h=1e-3):
+    y0 = np.ones(dim)
+    debut = time.perf_counter()
+    methode(f, 0.0, y0, h, N, tampons)
+    duree = time.perf_counter() - debut
+
+    # Deuxième passage instrumenté (tracemalloc ralentit l'exécution)
+    tracemalloc.start()
+    methode(f, 0.0, y0, h, N, tampons)
+    _, pic = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    trajectoire = (N + 1) * (dim + 1) * 8
+    return duree, max(pic - trajectoire, 0)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--dims', type=int, nargs='+', default=[2, 10, 100, 1000])
+    parser.add_argument('--N', type=int, nargs='+', default=[1000, 10000, 100000, 1000000])
+    parser.add_argument('--memoire-max', type=float, default=2.0, help="taille maximale de trajectoire (Go)")
+    args = parser.parse_args()
+
+    print(f"{'méthode':<8}{'dim':>6}{'N':>10}{'t sans (s)':>13}{'t avec (s)':>13}{'gain':>7}{'tmp sans (o)':>15}{'tmp avec (o)':>15}")
+    for nom, methode in [('Euler', euler_explicite), ('RK4', rungekutta_4)]:
+        for dim in args.dims:
+            for N in args.N:
+                if (N + 1) * dim * 8 > args.memoire_max * 1e9:
+                    continue
+                t_sans, m_sans = mesurer(methode, dim, N, False)
+                t_avec, m_avec = mesurer(methode, dim, N, True)
+                print(f"{nom:<8}{dim:>6}{N:>10}{t_sans:>13.4f}{t_avec:>13.4f}{t_sans / t_avec:>7.2f}{m_sans:>15}{m_avec:>15}")
@@ -0,0 +1,164 @@
+# -*- coding: utf-8 -*-
+"""
+Cache des solutions calculées, adressé par le contenu du problème.
+
+La clé d'une solution est une empreinte SHA-256 de la forme normalisée des
+expressions, de la méthode, de t0, y0, h, N et des options du solveur : deux
+saisies équivalentes (espaces, parenthèses superflues) partagent la même
+entrée. Les trajectoires sont gardées en mémoire dans la limite d'un budget
+en octets (éviction LRU) et peuvent être écrites dans un dossier de fichiers
+`.npy` pour survivre aux réexécutions Streamlit et aux redémarrages.
+"""
+
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from compilateur_EDO import forme_separee, normaliser
+
+# À incrémenter si le format des entrées ou le comportement des solveurs change
+VERSION = 3
+
+
+def source_normalisee(f):
+    """
+    Forme canonique d'un second membre, ou None s'il ne peut pas servir de clé
+    (fonction Python quelconque).
+    """
+    if isinstance(f, str):
+        return normaliser(f)
+    if isinstance(f, (list, tuple)) and all(isinstance(eq, str) for eq in f):
+        return repr(tuple(normaliser(eq) for eq in f))
+    if forme_separee(f) and not any(callable(partie) for partie in f):
+        # Système sous forme séparée (vitesse, force)
+        return repr(('separe',) + tuple(tuple(normaliser(eq) for eq in partie) for partie in f))
+    return getattr(f, 'source', None)
+
+
+def cle_solution(methode, f, t0, y0, h, N, **options):
+    """Empreinte du problème (None si le problème n'est pas adressable)."""
+    # Les statistiques de résolution n'influent pas sur la solution
+    options = {k: v for k, v in options.items() if k != 'stats'}
+    # Tableaux (t_eval) en listes : le repr d'un grand tableau NumPy est abrégé
+    options = {k: v.tolist() if isinstance(v, np.ndarray) else v for k, v in options.items()}
+    source = source_normalisee(f)
+    if source is None or any(callable(v) for v in options.values()):
+        return None
+    y0 = np.asarray(y0, dtype=float)
+    empreinte = hashlib.sha256()
+    for morceau in (VERSION, source, methode, float(t0), y0.shape, float(h), int(N), sorted(options.items())):
+        empreinte.update(repr(morceau).encode())
+    empreinte.update(y0.tobytes())
+    return empreinte.hexdigest()
+
+
+class CacheSolutions:
+    """
+    Cache LRU de trajectoires (t, y).
+    - budget_octets : taille mémoire maximale des trajectoires conservées
+    - dossier : dossier optionnel où chaque solution est aussi écrite en `.npy`
+    """
+
+    def __init__(self, budget_octets=256 * 2**20, dossier=None):
+        self.budget_octets = budget_octets
+        self.dossier = dossier
+        self._entrees = OrderedDict()
+        self._octets = 0
+        self._verrou = threading.Lock()
+        self.succes = 0
+        self.succes_disque = 0
+        self.echecs = 0
+        self.evictions = 0
+        if dossier:
+            os.makedirs(dossier, exist_ok=True)
+
+    def _chemins(self, cle):
+        return os.path.join(self.dossier, f"{cle}_t.npy"), os.path.join(self.dossier, f"{cle}_y.npy")
+
+    def _garder_en_memoire(self, cle, t, y):
+        taille = t.nbytes + y.nbytes
+        if taille > self.budget_octets:
+            return
+        if cle in self._entrees:
+            self._octets -= sum(a.nbytes for a in self._entrees.pop(cle))
+        self._entrees[cle] = (t, y)
+        self._octets += taille
+        while self._octets > self.budget_octets:
+            _, (t_ancien, y_ancien) = self._entrees.popitem(last=False)
+            self._octets -= t_ancien.nbytes + y_ancien.nbytes
+            self.evictions += 1
+
+    def obtenir(self, cle):
+        """Renvoie (t, y) si la solution est connue, None sinon."""
+        with self._verrou:
+            if cle in self._entrees:
+                self._entrees.move_to_end(cle)
+                self.succes += 1
+                return self._entrees[cle]
+        if self.dossier:
+            chemin_t, chemin_y = self._chemins(cle)
+            try:
+                t, y = np.load(chemin_t), np.load(chemin_y)
+            except (OSError, ValueError):
+                pass
+            else:
+                t.flags.writeable = False
+                y.flags.writeable = False
+                with self._verrou:
+                    self.succes_disque += 1
+                    self._garder_en_memoire(cle, t, y)
+                return t, y
+        with self._verrou:
+            self.echecs += 1
+        return None
+
+    def stocker(self, cle, t, y):
+        """Enregistre une solution (en mémoire et, si demandé, sur disque)."""
+        t, y = np.asarray(t), np.asarray(y)
+        # Les tableaux sont partagés entre tous les lecteurs : on interdit leur modification
+        t.flags.writeable = False
+        y.flags.writeable = False
+        with self._verrou:
+            self._garder_en_memoire(cle, t, y)
+        if self.dossier:
+            for chemin, tableau in zip(self._chemins(cle), (t, y)):
+                # Écriture atomique : un lecteur concurrent ne voit jamais de fichier partiel
+                temporaire = f"{chemin}.{os.getpid()}.{threading.get_ident()}.tmp"
+                with open(temporaire, 'wb') as fichier:
+                    np.save(fichier, tableau)
+                os.replace(temporaire, chemin)
+
+    def resoudre(self, solveur, methode, f, t0, y0, h, N, **options):
+        """
+        Renvoie solveur(methode, f, t0, y0, h, N, **options), depuis le cache si possible.
+        """
+        cle = cle_solution(methode, f, t0, y0, h, N, **options)
+        if cle is not None:
+            solution = self.obtenir(cle)
+            if solution is not None:
+                return solution
+        t, y = solveur(methode, f, t0, y0, h, N, **options)
+        if cle is not None:
+            self.stocker(cle, t, y)
+        return t, y
+
+    def vider(self):
+        """Vide le cache mémoire (les fichiers sur disque sont conservés)."""
+        with self._verrou:
+            self._entrees.clear()
+            self._octets = 0
+
+    def stats(self):
+        """Statistiques de succès/échecs et occupation mémoire."""
+        with self._verrou:
+            return {
+                'succes': self.succes,
+                'succes_disque': self.succes_disque,
+                'echecs': self.echecs,
+                'evictions': self.evictions,
+                'entrees': len(self._entrees),
+                'octets': self._octets,
+            }
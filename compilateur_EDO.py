@@ -0,0 +1,317 @@
+# -*- coding: utf-8 -*-
+"""
+Compilation des expressions saisies par l'utilisateur.
+
+Les expressions `f(t, y)`, `y_exact(t)` et les équations d'un système sont
+analysées une seule fois en AST, validées (seuls les noms et appels
+mathématiques sont autorisés), puis compilées en un objet code mis en cache.
+Les solveurs appellent ensuite directement la fonction obtenue, sans
+ré-analyser la chaîne à chaque pas.
+"""
+
+import ast
+import math
+from functools import lru_cache
+
+import numpy as np
+
+
+class ExpressionInvalide(ValueError):
+    """Expression utilisateur syntaxiquement incorrecte ou non autorisée."""
+
+
+# Fonctions simples accessibles sans préfixe
+_FONCTIONS_LIBRES = {'abs': abs, 'min': min, 'max': max, 'pow': pow, 'round': round}
+
+# Modules dont les attributs mathématiques sont accessibles (np.sin, math.exp, ...)
+_MODULES = {'np': np, 'math': math}
+
+# Fonctions NumPy non universelles autorisées (les ufuncs le sont toutes)
+_FONCTIONS_NUMPY = {'where', 'clip', 'sum', 'prod', 'mean', 'dot', 'array', 'pi', 'e', 'inf'}
+
+# Équivalents `math` des fonctions NumPy, pour les EDO scalaires sur des flottants Python
+_NUMPY_VERS_MATH = {
+    'sin': 'sin', 'cos': 'cos', 'tan': 'tan', 'arcsin': 'asin', 'arccos': 'acos', 'arctan': 'atan',
+    'arctan2': 'atan2', 'sinh': 'sinh', 'cosh': 'cosh', 'tanh': 'tanh', 'arcsinh': 'asinh',
+    'arccosh': 'acosh', 'arctanh': 'atanh', 'exp': 'exp', 'expm1': 'expm1', 'log': 'log',
+    'log10': 'log10', 'log2': 'log2', 'log1p': 'log1p', 'sqrt': 'sqrt', 'hypot': 'hypot',
+    'floor': 'floor', 'ceil': 'ceil', 'fabs': 'fabs', 'absolute': 'fabs', 'abs': 'fabs',
+    'power': 'pow', 'pi': 'pi', 'e': 'e', 'inf': 'inf',
+}
+
+# Fonctions qui réduisent ou assemblent des tableaux : un système qui les
+# utilise ne peut pas être évalué sur un y de forme (dim, k) colonne par colonne
+_NON_VECTORIELLES = {'sum', 'prod', 'mean', 'dot', 'array', 'min', 'max', 'round'}
+
+_NOEUDS_AUTORISES = (
+    ast.Expression, ast.BinOp, ast.UnaryOp, ast.BoolOp, ast.Compare, ast.IfExp,
+    ast.Call, ast.Attribute, ast.Name, ast.Constant, ast.Subscript, ast.Slice,
+    ast.Tuple, ast.List, ast.Load, ast.operator, ast.unaryop, ast.boolop, ast.cmpop,
+)
+
+
+def _attribut_autorise(module, attribut):
+    if attribut.startswith('_') or not hasattr(_MODULES[module], attribut):
+        return False
+    if module == 'math':
+        return True
+    return attribut in _FONCTIONS_NUMPY or isinstance(getattr(np, attribut), np.ufunc)
+
+
+def _valider(arbre, variables):
+    """Vérifie que l'AST ne contient que des constructions mathématiques."""
+    for noeud in ast.walk(arbre):
+        if not isinstance(noeud, _NOEUDS_AUTORISES):
+            raise ExpressionInvalide(f"Construction non autorisée : {type(noeud).__name__}.")
+        if isinstance(noeud, ast.Constant) and not isinstance(noeud.value, (int, float, complex)):
+            raise ExpressionInvalide(f"Constante non autorisée : {noeud.value!r}.")
+        if isinstance(noeud, ast.Attribute):
+            if not (isinstance(noeud.value, ast.Name) and noeud.value.id in _MODULES):
+                raise ExpressionInvalide("Seuls les attributs de `np` et `math` sont autorisés.")
+            if not _attribut_autorise(noeud.value.id, noeud.attr):
+                raise ExpressionInvalide(f"Attribut inconnu : {noeud.value.id}.{noeud.attr}.")
+        if isinstance(noeud, ast.Name):
+            if noeud.id not in variables and noeud.id not in _MODULES and noeud.id not in _FONCTIONS_LIBRES:
+                raise ExpressionInvalide(f"Nom inconnu : {noeud.id}.")
+        if isinstance(noeud, ast.Call) and noeud.keywords:
+            if any(k.arg is None for k in noeud.keywords):
+                raise ExpressionInvalide("Arguments `**kwargs` non autorisés.")
+
+
+@lru_cache(maxsize=256)
+def normaliser(expression, variables=('t', 'y')):
+    """
+    Analyse et valide une expression, puis renvoie sa forme source normalisée.
+    - expression : chaîne saisie par l'utilisateur (ex: '-y * np.sin(t)')
+    - variables : noms libres autorisés dans l'expression
+    """
+    if not isinstance(expression, str) or not expression.strip():
+        raise ExpressionInvalide("Expression vide.")
+    try:
+        arbre = ast.parse(expression.strip(), mode='eval')
+    except SyntaxError as e:
+        raise ExpressionInvalide(f"Erreur de syntaxe : {e.msg}.") from None
+    _valider(arbre, variables)
+    return ast.unparse(arbre)
+
+
+def _espace_de_noms():
+    return {'__builtins__': {}, **_MODULES, **_FONCTIONS_LIBRES}
+
+
+@lru_cache(maxsize=256)
+def _compiler_source(source, nom):
+    """Compile un source de fonction et renvoie l'objet fonction `nom`."""
+    espace = _espace_de_noms()
+    exec(compile(source, f'<{nom}>', 'exec'), espace)
+    fonction = espace[nom]
+    fonction.source = source
+    return fonction
+
+
+def compiler_edo(expression, parametres=False):
+    """
+    Compile l'expression `f(t, y)` d'une EDO scalaire en une fonction f(t, y).
+    - parametres : si vrai, l'expression peut utiliser `p` et la fonction
+                   compilée a la signature f(t, y, p)
+    """
+    if parametres:
+        corps = normaliser(expression, ('t', 'y', 'p'))
+        return _compiler_source(f"def _edo_p(t, y, p):\n    return {corps}\n", '_edo_p')
+    corps = normaliser(expression)
+    fonction = _compiler_source(f"def _edo(t, y):\n    return {corps}\n", '_edo')
+    fonction.expression = corps
+    return fonction
+
+
+@lru_cache(maxsize=256)
+def compiler_edo_math(expression):
+    """
+    Compile `f(t, y)` pour des flottants Python : les fonctions `np.*` sont
+    remplacées par leurs équivalents `math`, bien plus rapides sur des scalaires.
+    Renvoie None si l'expression utilise une fonction NumPy sans équivalent.
+    Attention : math lève une exception (ValueError, OverflowError,
+    ZeroDivisionError) là où NumPy renverrait nan ou inf.
+    """
+    arbre = ast.parse(normaliser(expression), mode='eval')
+    if not vers_math(arbre):
+        return None
+    corps = ast.unparse(arbre)
+    return _compiler_source(f"def _edo_math(t, y):\n    return {corps}\n", '_edo_math')
+
+
+def vers_math(arbre):
+    """
+    Remplace sur place les fonctions `np.*` d'un AST validé par leurs
+    équivalents `math`. Renvoie False (arbre partiellement modifié) si l'une
+    d'elles n'a pas d'équivalent.
+    """
+    for noeud in ast.walk(arbre):
+        if isinstance(noeud, ast.Attribute) and noeud.value.id == 'np':
+            if noeud.attr not in _NUMPY_VERS_MATH:
+                return False
+            noeud.value.id, noeud.attr = 'math', _NUMPY_VERS_MATH[noeud.attr]
+    return True
+
+
+def version_math(f):
+    """
+    Version `math` d'un second membre scalaire (expression ou fonction
+    compilée par compiler_edo), ou None si elle n'existe pas.
+    """
+    expression = f if isinstance(f, str) else getattr(f, 'expression', None)
+    if expression is None:
+        return None
+    try:
+        return compiler_edo_math(expression)
+    except ExpressionInvalide:
+        return None
+
+
+def compiler_solution_exacte(expression):
+    """
+    Compile l'expression d'une solution exacte `y_exact(t)` en une fonction de t.
+    """
+    corps = normaliser(expression, ('t',))
+    return _compiler_source(f"def _y_exact(t):\n    return {corps}\n", '_y_exact')
+
+
+def erreur_solution_exacte(y_exact, t, y):
+    """
+    Erreur maximale |y_exact(t) - y| d'une trajectoire (y de forme (n,) ou
+    (n, dim)) ; y_exact est une fonction de t ou une expression.
+    """
+    if isinstance(y_exact, str):
+        y_exact = compiler_solution_exacte(y_exact)
+    exacte = np.asarray(y_exact(t))
+    if exacte.shape != np.shape(y) and exacte.T.shape == np.shape(y):
+        # Système : 'np.array([...])' donne une ligne par composante, de forme (dim, n)
+        exacte = exacte.T
+    # Écart calculé en float64, même si la trajectoire est stockée en float32
+    return float(np.max(np.abs(exacte - np.asarray(y, dtype=float))))
+
+
+def compiler_systeme(expressions, parametres=False):
+    """
+    Compile les équations d'un système en une seule fonction f(t, y, out=None).
+    - expressions : liste de chaînes, l'équation i donnant la dérivée de y[i]
+    - parametres : si vrai, les équations peuvent utiliser `p` et la fonction
+                   compilée a la signature f(t, y, p, out=None)
+    La fonction écrit chaque composante dans `out` (alloué s'il est absent)
+    et renvoie ce vecteur NumPy, sans passer par une liste intermédiaire.
+    Si y est de forme (dim, n) (ensemble de n trajectoires), out l'est aussi.
+    """
+    variables = ('t', 'y', 'p') if parametres else ('t', 'y')
+    corps = [normaliser(eq, variables) for eq in expressions]
+    if not corps:
+        raise ExpressionInvalide("Le système ne contient aucune équation.")
+    nom = '_systeme_p' if parametres else '_systeme'
+    lignes = [
+        f"def {nom}({', '.join(variables)}, out=None):",
+        "    if out is None:",
+        f"        out = np.empty(({len(corps)},) + np.shape(y)[1:])",
+    ]
+    lignes += [f"    out[{i}] = {c}" for i, c in enumerate(corps)]
+    lignes.append("    return out")
+    fonction = _compiler_source("\n".join(lignes) + "\n", nom)
+    fonction.dim = len(corps)
+    if not parametres:
+        fonction.expressions = tuple(corps)
+        fonction.sparsite, fonction.vectorise = dependances(tuple(corps))
+    return fonction
+
+
+def _indice_constant(noeud):
+    """Valeur de k dans y[k] si k est un entier constant (éventuellement négatif), sinon None."""
+    if isinstance(noeud, ast.Constant) and type(noeud.value) is int:
+        return noeud.value
+    if (isinstance(noeud, ast.UnaryOp) and isinstance(noeud.op, ast.USub)
+            and isinstance(noeud.operand, ast.Constant) and type(noeud.operand.value) is int):
+        return -noeud.operand.value
+    return None
+
+
+@lru_cache(maxsize=64)
+def dependances(corps):
+    """
+    Motif creux d'un système (voir creux_EDO) : pour chaque équation, les
+    indices des composantes de y qu'elle lit, ou None si une équation lit y
+    autrement que par y[k] avec k constant. Renvoie (motif, vectorise), où
+    vectorise indique que le système peut être évalué sur un y de forme (dim, k).
+    """
+    dim = len(corps)
+    motif, vectorise = [], True
+    for expression in corps:
+        indices, lectures, noms_y = set(), 0, 0
+        for noeud in ast.walk(ast.parse(expression, mode='eval')):
+            if isinstance(noeud, ast.Subscript) and isinstance(noeud.value, ast.Name) and noeud.value.id == 'y':
+                k = _indice_constant(noeud.slice)
+                if k is None or not -dim <= k < dim:
+                    return None, False
+                indices.add(k % dim)
+                lectures += 1
+            elif isinstance(noeud, ast.Name):
+                noms_y += noeud.id == 'y'
+                vectorise &= noeud.id not in _NON_VECTORIELLES
+            elif isinstance(noeud, ast.Attribute):
+                vectorise &= noeud.attr not in _NON_VECTORIELLES
+            elif isinstance(noeud, (ast.IfExp, ast.BoolOp, ast.Compare)):
+                # `a if y[k] > 0 else b` exige un booléen, pas un tableau de colonnes
+                vectorise = False
+        if noms_y != lectures:
+            return None, False  # y utilisé en entier
+        motif.append(tuple(sorted(indices)))
+    return tuple(motif), vectorise
+
+
+def compiler_separe(vitesse, force):
+    """
+    Second membre d'un système sous forme séparée, d'état y = (q, p) :
+    - vitesse : dérivée des n positions q' = vitesse(t, p), où `y` désigne les impulsions
+    - force : dérivée des n impulsions p' = force(t, q), où `y` désigne les positions
+    Chacune est une fonction ou une liste d'expressions. La fonction renvoyée
+    calcule le système complet f(t, y, out=None) ; ses deux moitiés restent
+    accessibles dans l'attribut `separe` (utilisé par symplectique_EDO).
+    """
+    vitesse, force = compiler_rhs(vitesse), compiler_rhs(force)
+
+    def _separe(t, y, out=None):
+        n = np.shape(y)[0] // 2
+        if out is None:
+            out = np.empty(np.shape(y))
+        out[:n] = vitesse(t, y[n:])
+        out[n:] = force(t, y[:n])
+        return out
+
+    _separe.separe = (vitesse, force)
+    sources = (getattr(vitesse, 'source', None), getattr(force, 'source', None))
+    _separe.source = repr(sources) if None not in sources else None
+    return _separe
+
+
+def forme_separee(f):
+    """Vrai si f est un couple (vitesse, force) de fonctions ou de listes d'expressions."""
+    return (isinstance(f, (list, tuple)) and len(f) == 2
+            and all(callable(partie) or (isinstance(partie, (list, tuple)) and partie
+                                         and all(isinstance(eq, str) for eq in partie)) for partie in f))
+
+
+def evaluer_constante(expression):
+    """Évalue une expression constante (ex: condition initiale 'np.exp(1)')."""
+    corps = normaliser(expression, ())
+    return eval(compile(corps, '<constante>', 'eval'), _espace_de_noms())
+
+
+def compiler_rhs(f, parametres=False):
+    """
+    Renvoie une fonction f(t, y) (ou f(t, y, p)) utilisable par les solveurs.
+    - f : fonction déjà définie, expression (str), liste d'expressions (système)
+          ou couple (vitesse, force) d'un système sous forme séparée (voir compiler_separe)
+    """
+    if isinstance(f, str):
+        return compiler_edo(f, parametres)
+    if isinstance(f, (list, tuple)) and all(isinstance(eq, str) for eq in f):
+        return compiler_systeme(tuple(f), parametres)
+    if not parametres and forme_separee(f):
+        return compiler_separe(*f)
+    return f
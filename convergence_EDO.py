@@ -0,0 +1,193 @@
+# -*- coding: utf-8 -*-
+"""
+Étude de convergence partagée par les interfaces Streamlit.
+
+Chaque couple (méthode, h) est une résolution indépendante : la grille est
+répartie sur un pool de processus. Chaque tâche calcule elle-même son erreur
+maximale, de sorte que seules les trajectoires demandées (pas choisi par
+l'utilisateur) remontent vers le processus principal.
+
+Pour les méthodes adaptatives (DOPRI5, BDF, Rosenbrock, Auto), h n'est que le
+pas initial : l'erreur dépend de rtol et atol et presque pas de h, de sorte
+qu'aucun ordre de convergence n'est ajusté (ordre et ordre_local restent nan).
+
+Pour pouvoir être envoyés aux processus, f et y_exact sont de préférence des
+expressions (chaînes), compilées une fois dans chaque processus. Si ce sont des
+fonctions non sérialisables (lambda, fonction compilée), l'étude s'exécute
+dans le processus courant.
+"""
+
+import os
+import pickle
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, field
+
+import numpy as np
+
+from cache_EDO import cle_solution
+from compilateur_EDO import compiler_rhs, erreur_solution_exacte
+from raide_EDO import METHODES_ADAPTATIVES
+from stats_EDO import StatsSolveur
+from methodes_num_EDO import methodes_num_EDO
+from Methodes_num_EDOS import Methodes_num_EDOS
+
+# Pas utilisés par défaut pour estimer l'ordre de convergence
+H_VALUES = [0.25, 0.125, 0.0625, 0.03125, 0.015625]
+
+_executeur = None
+
+
+@dataclass
+class ResultatConvergence:
+    """Résultats de l'étude de convergence pour une méthode."""
+    methode: str
+    h_values: list
+    erreurs: np.ndarray
+    durees: np.ndarray
+    ordre: float = np.nan            # pente des moindres carrés de log(e) en fonction de log(h)
+    ordre_local: float = np.nan      # pente entre les deux plus petits pas
+    solution: tuple = None           # (t, y) pour le pas demandé par h_solution
+    duree_solution: float = np.nan   # nan si la solution provient du cache
+    erreurs_execution: dict = field(default_factory=dict)
+    stats: StatsSolveur = None       # statistiques de la résolution au pas h_solution (None si cache)
+    adaptative: bool = False         # h n'est que le pas initial : pas d'ordre en h
+
+
+def ordre_moindres_carres(h_values, erreurs):
+    """Pente de la droite des moindres carrés log(e) = p log(h) + c."""
+    h_values, erreurs = np.asarray(h_values, dtype=float), np.asarray(erreurs, dtype=float)
+    valides = np.isfinite(erreurs) & (erreurs > 0)
+    if valides.sum() < 2:
+        return np.nan
+    return np.polyfit(np.log(h_values[valides]), np.log(erreurs[valides]), 1)[0]
+
+
+def _pool(processus):
+    """Pool de processus conservé entre deux appels (et deux réexécutions Streamlit)."""
+    global _executeur
+    if _executeur is None or _executeur._max_workers != processus:
+        if _executeur is not None:
+            _executeur.shutdown(wait=False)
+        _executeur = ProcessPoolExecutor(max_workers=processus)
+    return _executeur
+
+
+def _erreur(y_exact, t, y):
+    if y_exact is None:
+        return np.nan
+    return erreur_solution_exacte(y_exact, t, y)
+
+
+def _resoudre(tache):
+    """Résout un couple (méthode, h) et calcule l'erreur maximale."""
+    methode, f, y_exact, t0, y0, T, h, garder, instrumenter, options = tache
+    f = compiler_rhs(f)
+    solveur = methodes_num_EDO if np.ndim(y0) == 0 else Methodes_num_EDOS
+    stats = StatsSolveur() if instrumenter else None
+    debut = time.perf_counter()
+    t, y = solveur(methode, f, t0, y0, h, int(T / h), stats=stats, **options)
+    duree = time.perf_counter() - debut
+    return _erreur(y_exact, t, y), duree, (t, y) if garder else None, stats
+
+
+def _serialisable(*objets):
+    try:
+        pickle.dumps(objets)
+        return True
+    except Exception:
+        return False
+
+
+def etude_convergence(methodes, f, y_exact, t0, y0, T, h_values=H_VALUES, h_solution=None,
+                      processus=None, cache=None, rappel=None, **options):
+    """
+    Calcule l'erreur maximale de chaque méthode pour chaque pas de h_values.
+    - methodes : liste de noms de méthodes (les doublons ne sont calculés qu'une fois)
+    - f, y_exact : expressions (str) ou fonctions ; y_exact peut être None
+    - t0, y0, T : conditions initiales et durée de simulation
+    - h_solution : pas dont la trajectoire complète est renvoyée (ex: le pas
+                   choisi par l'utilisateur) ; s'il figure dans h_values, la
+                   résolution correspondante est réutilisée
+    - processus : nombre de processus (1 pour une exécution séquentielle)
+    - cache : CacheSolutions optionnel ; les résolutions déjà connues ne sont
+              pas relancées et les nouvelles y sont enregistrées
+    - rappel : fonction optionnelle rappel(faites, total) appelée à la fin de
+               chaque résolution ; une exception qu'elle lève interrompt l'étude
+               (les résolutions pas encore commencées sont abandonnées)
+    - options : transmises au solveur (jac, rtol, atol, ...)
+    Renvoie un dictionnaire {méthode: ResultatConvergence}.
+    """
+    methodes = list(dict.fromkeys(methodes))
+    pas = list(h_values)
+    if h_solution is not None and h_solution not in pas:
+        pas.append(h_solution)
+
+    # Les plus petits pas (les plus coûteux) sont soumis en premier
+    taches = [(m, h) for h in sorted(pas) for m in methodes]
+    cles = [cle_solution(m, f, t0, y0, h, int(T / h), **options) if cache else None for m, h in taches]
+    connues = {}
+    for (m, h), cle in zip(taches, cles):
+        solution = cache.obtenir(cle) if cle is not None else None
+        if solution is not None:
+            connues[m, h] = (_erreur(y_exact, *solution), np.nan, solution if h == h_solution else None, None)
+    a_calculer = [(tache, cle) for tache, cle in zip(taches, cles) if tache not in connues]
+    arguments = [(m, f, y_exact, t0, y0, T, h, h == h_solution or cle is not None, h == h_solution, options)
+                 for (m, h), cle in a_calculer]
+
+    processus = processus or os.cpu_count() or 1
+    if processus > 1 and len(arguments) > 1 and _serialisable(arguments[0]):
+        futurs = [_pool(processus).submit(_resoudre, a) for a in arguments]
+        if rappel is not None:
+            try:
+                for faites, _ in enumerate(as_completed(futurs), 1):
+                    rappel(faites, len(futurs))
+            except BaseException:
+                for futur in futurs:
+                    futur.cancel()
+                raise
+        resultats = []
+        for futur in futurs:
+            try:
+                resultats.append(futur.result())
+            except Exception as e:
+                resultats.append(e)
+    else:
+        resultats = []
+        for faites, a in enumerate(arguments, 1):
+            try:
+                resultats.append(_resoudre(a))
+            except Exception as e:
+                resultats.append(e)
+            if rappel is not None:
+                rappel(faites, len(arguments))
+
+    sortie = {m: ResultatConvergence(m, list(h_values), np.full(len(h_values), np.nan), np.full(len(h_values), np.nan),
+                                     adaptative=m in METHODES_ADAPTATIVES)
+              for m in methodes}
+    for ((m, h), cle), res in zip(a_calculer, resultats):
+        if not isinstance(res, Exception) and cle is not None:
+            cache.stocker(cle, *res[2])
+            if h != h_solution:
+                res = (res[0], res[1], None, res[3])
+        connues[m, h] = res
+
+    for (m, h), res in connues.items():
+        r = sortie[m]
+        if isinstance(res, Exception):
+            r.erreurs_execution[h] = res
+            continue
+        erreur, duree, solution, stats = res
+        if solution is not None:
+            r.solution, r.duree_solution, r.stats = solution, duree, stats
+        if h in r.h_values:
+            i = r.h_values.index(h)
+            r.erreurs[i], r.durees[i] = erreur, duree
+
+    for r in sortie.values():
+        if r.adaptative:
+            continue
+        r.ordre = ordre_moindres_carres(r.h_values, r.erreurs)
+        if len(r.h_values) > 1:
+            r.ordre_local = np.log(r.erreurs[-2] / r.erreurs[-1]) / np.log(r.h_values[-2] / r.h_values[-1])
+    return sortie
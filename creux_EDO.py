@@ -0,0 +1,185 @@
+# -*- coding: utf-8 -*-
+"""
+Jacobiens creux pour les grands systèmes (EDP discrétisées par la méthode des lignes).
+
+Quand chaque équation ne dépend que de quelques composantes de y, le
+jacobien est creux : au lieu de perturber les dim colonnes une à une (dim
+appels à f), on regroupe les colonnes qui n'ont aucune ligne non nulle en
+commun (coloriage glouton du graphe des colonnes, Curtis, Powell et Reid) et
+on les perturbe ensemble : un appel à f par groupe, soit 3 pour un système
+tridiagonal quelle que soit sa taille. Si f est vectorisée (y de forme
+(dim, k) -> (dim, k)), tous les groupes sont évalués en un seul appel.
+
+Les systèmes de Newton (I - gamma J) x = r sont ensuite résolus par LU bande
+(LAPACK gbtrf/gbtrs) si le motif est à bande étroite, sinon par LU creuse
+(scipy.sparse.linalg.splu) ; la factorisation est réutilisée d'un pas à
+l'autre comme dans newton_EDO.
+
+Utilisation : passer jac=JacobienCreux(motif) aux méthodes implicites, ou
+laisser newton_EDO utiliser le motif déduit des expressions d'un système
+compilé (attribut `sparsite`, voir compilateur_EDO) au-delà de DIM_MIN_CREUX
+équations. scipy n'est importé qu'au premier jacobien creux.
+"""
+
+from functools import lru_cache
+
+import numpy as np
+
+# Dimension à partir de laquelle le motif d'un système compilé est exploité
+DIM_MIN_CREUX = 32
+# Densité maximale du motif pour que le traitement creux soit intéressant
+DENSITE_MAX = 0.2
+# Largeur de bande (sous-diagonales + sur-diagonales) maximale pour le solveur bande
+BANDE_MAX = 16
+
+EPS = np.finfo(float).eps
+
+
+def motif_csc(sparsite, dim=None):
+    """
+    Motif de non-nuls au format CSC (valeurs 1).
+    - sparsite : matrice creuse scipy, tableau (dim, dim) de booléens, ou
+                 séquence donnant pour chaque équation i les indices des
+                 composantes de y dont elle dépend
+    """
+    from scipy import sparse
+
+    if sparse.issparse(sparsite):
+        motif = sparse.csc_matrix(sparsite, dtype=float)
+    elif isinstance(sparsite, np.ndarray) and sparsite.ndim == 2:
+        motif = sparse.csc_matrix(sparsite != 0, dtype=float)
+    else:
+        dim = len(sparsite) if dim is None else dim
+        lignes = np.repeat(np.arange(len(sparsite)), [len(indices) for indices in sparsite])
+        colonnes = np.fromiter((j for indices in sparsite for j in indices), dtype=np.intp, count=len(lignes))
+        motif = sparse.csc_matrix((np.ones(len(lignes)), (lignes, colonnes)), shape=(len(sparsite), dim))
+    motif.data[:] = 1.0
+    motif.sum_duplicates()
+    motif.sort_indices()
+    return motif
+
+
+def colorier(motif):
+    """
+    Groupe de chaque colonne : deux colonnes d'un même groupe n'ont aucune
+    ligne non nulle en commun (coloriage glouton, colonnes dans l'ordre).
+    Pour un motif à bande étroite, les colonnes distantes de plus que la
+    largeur de bande sont groupées directement (j modulo largeur + 1).
+    """
+    dim = motif.shape[1]
+    sous, sur = largeur_bande(motif)
+    if sous + sur <= BANDE_MAX:
+        return np.arange(dim) % (sous + sur + 1)
+    indptr, indices = motif.indptr, motif.indices
+    groupes = np.empty(dim, dtype=np.intp)
+    occupees = []  # lignes déjà couvertes par chaque groupe
+    for j in range(dim):
+        lignes = indices[indptr[j]:indptr[j + 1]]
+        for g, occupe in enumerate(occupees):
+            if not occupe[lignes].any():
+                break
+        else:
+            g = len(occupees)
+            occupees.append(np.zeros(motif.shape[0], dtype=bool))
+        occupees[g][lignes] = True
+        groupes[j] = g
+    return groupes
+
+
+def largeur_bande(A):
+    """(nombre de sous-diagonales, nombre de sur-diagonales) d'une matrice creuse."""
+    A = A.tocoo()
+    if A.nnz == 0:
+        return 0, 0
+    ecarts = A.row - A.col
+    return int(max(ecarts.max(), 0)), int(max(-ecarts.min(), 0))
+
+
+class JacobienCreux:
+    """
+    Jacobien estimé par différences finies sur un motif creux.
+    - sparsite : motif des dépendances (voir motif_csc)
+    - vectorise : f accepte un y de forme (dim, k) et renvoie (dim, k)
+    - solveur : 'auto' (bande si le motif est à bande étroite, sinon LU
+                creuse), 'bande' ou 'lu'
+    """
+
+    def __init__(self, sparsite, vectorise=False, solveur='auto'):
+        self.motif = motif_csc(sparsite)
+        self.groupes = colorier(self.motif)
+        self.n_groupes = int(self.groupes.max()) + 1 if len(self.groupes) else 0
+        self.vectorise = vectorise
+        self.solveur = solveur
+        # Pour chaque non-nul du motif : sa colonne et le groupe de celle-ci
+        self._colonnes = np.repeat(np.arange(self.motif.shape[1]), np.diff(self.motif.indptr))
+        self._groupes_nnz = self.groupes[self._colonnes]
+
+    def evaluer(self, f, t, z, fz):
+        """Jacobien creux (CSC) de f en (t, z), fz = f(t, z) étant déjà calculé."""
+        from scipy import sparse
+
+        d = np.sqrt(EPS) * np.maximum(1.0, np.abs(z))
+        # Colonne k de D : perturbation des colonnes du groupe k
+        D = np.zeros((z.size, self.n_groupes))
+        D[np.arange(z.size), self.groupes] = d
+        if self.vectorise:
+            ecarts = np.asarray(f(t, z[:, np.newaxis] + D), dtype=float) - fz[:, np.newaxis]
+        else:
+            ecarts = np.empty((z.size, self.n_groupes))
+            for k in range(self.n_groupes):
+                ecarts[:, k] = np.asarray(f(t, z + D[:, k]), dtype=float) - fz
+        lignes = self.motif.indices
+        donnees = ecarts[lignes, self._groupes_nnz] / d[self._colonnes]
+        return sparse.csc_matrix((donnees, lignes, self.motif.indptr), shape=self.motif.shape)
+
+
+@lru_cache(maxsize=32)
+def _jacobien_pour_motif(sparsite, vectorise):
+    return JacobienCreux(sparsite, vectorise)
+
+
+def jacobien_automatique(f, dim):
+    """
+    JacobienCreux déduit du motif d'un système compilé (attributs `sparsite`
+    et `vectorise`), ou None si le système est petit, dense ou sans motif connu.
+    """
+    sparsite = getattr(f, 'sparsite', None)
+    if sparsite is None or dim < DIM_MIN_CREUX or len(sparsite) != dim:
+        return None
+    if sum(map(len, sparsite)) > DENSITE_MAX * dim * dim:
+        return None
+    return _jacobien_pour_motif(sparsite, bool(getattr(f, 'vectorise', False)))
+
+
+def factoriser(J, gamma, solveur='auto'):
+    """
+    Factorise I - gamma * J (J creuse) et renvoie la fonction r -> x
+    résolvant (I - gamma * J) x = r.
+    """
+    from scipy import sparse
+
+    A = (sparse.identity(J.shape[0], format='csc') - gamma * J).tocsc()
+    sous, sur = largeur_bande(A)
+    if solveur == 'bande' or (solveur == 'auto' and sous + sur <= BANDE_MAX):
+        return _factoriser_bande(A, sous, sur)
+    from scipy.sparse.linalg import splu
+    lu = splu(A)
+    return lu.solve
+
+
+def _factoriser_bande(A, sous, sur):
+    from scipy.linalg import get_lapack_funcs
+
+    # Stockage bande LAPACK : A[i, j] dans ab[sous + sur + i - j, j], sous lignes de plus pour le pivotage
+    A = A.tocoo()
+    ab = np.zeros((2 * sous + sur + 1, A.shape[1]))
+    ab[sous + sur + A.row - A.col, A.col] = A.data
+    gbtrf, gbtrs = get_lapack_funcs(('gbtrf', 'gbtrs'), (ab,))
+    lu, piv, info = gbtrf(ab, sous, sur, overwrite_ab=True)
+    if info > 0:
+        raise np.linalg.LinAlgError("Matrice de Newton singulière.")
+
+    def resoudre(r):
+        x, _ = gbtrs(lu, sous, sur, r, piv)
+        return x
+    return resoudre
@@ -0,0 +1,363 @@
+# -*- coding: utf-8 -*-
+"""
+Sortie dense : solution continue entre les pas et échantillonnage t_eval.
+
+Chaque méthode fournit, pour chaque pas [ta, tb], un polynôme en
+θ = (t - ta) / (tb - ta) qui prolonge la solution entre les deux points. Il
+est construit sur les dérivées que les générateurs de pas (flux_EDO,
+adaptatif_EDO) exposent dans compteurs['etapes'] : aucune méthode n'est
+réécrite ici.
+- Euler : cubique d'Hermite (f au nouveau point n'est évaluée que pour les
+  pas où tombe un point demandé)
+- Trapèze : cubique d'Hermite sur les dérivées aux deux bouts du pas
+- RK4 : prolongement continu d'ordre 3 construit sur k1..k4
+- AB3, Pred-Cor : polynôme d'Adams de la méthode, intégré de ta à t ; les
+  pas de démarrage utilisent celui de RK4
+- DOPRI5 : sortie dense d'ordre 4 de Dormand-Prince, sur les sept étapes
+- Auto : celle de Dormand-Prince sur les segments non raides, cubique
+  d'Hermite sur les segments BDF
+- BDF, Rosenbrock, Verlet, Yoshida4, Point-Milieu : cubique d'Hermite, au
+  prix d'un appel à f par pas
+Les coefficients d'un pas ne sont calculés que si un point demandé y tombe.
+
+- echantillonner : résout en ne stockant que les points t_eval (la mémoire
+  ne dépend plus du nombre de pas, qui devient un pur choix de précision) ;
+  la résolution s'arrête au dernier point demandé
+- echantillonner_par_noyau : idem avec le noyau généré (voir noyaux_EDO),
+  lancé par blocs de TAILLE_BLOC pas, pour les méthodes à un pas Euler et
+  RK4 : le polynôme d'un pas contenant des points est reconstruit en
+  rejouant ce pas (4 appels à f pour RK4, 2 pour Euler)
+- solution_dense : solution continue (SolutionDense, appelable en tout t)
+Les dispatchers methodes_num_EDO et Methodes_num_EDOS passent par
+echantillonner_par_noyau, puis echantillonner, quand on leur donne t_eval.
+"""
+
+import time
+from functools import partial
+from itertools import islice
+
+import numpy as np
+
+from adaptatif_EDO import pas_dormand_prince
+from compilateur_EDO import compiler_rhs
+from flux_EDO import DEMARRAGE, pas_fixes
+from noyaux_EDO import noyau_pour
+from precision_EDO import etat_initial, type_flottant
+from raide_EDO import pas_methode_raide
+from stats_EDO import instrumenter
+
+DEGRE_MAX = 4
+TAILLE_BLOC = 4096
+# Méthodes à un pas : un bloc repart exactement du dernier point du précédent
+METHODES_NOYAU = ('Euler', 'RK4')
+
+# Sortie dense de Dormand-Prince : y(ta + θ h) = ya + h Σ_s k_s (P[s] · (θ, θ², θ³, θ⁴))
+P_DOPRI5 = np.array([
+    [1.0, -8048581381 / 2820520608, 8663915743 / 2820520608, -12715105075 / 11282082432],
+    [0.0, 0.0, 0.0, 0.0],
+    [0.0, 131558114200 / 32700410799, -68118460800 / 10900136933, 87487479700 / 32700410799],
+    [0.0, -1754552775 / 470086768, 14199869525 / 1410260304, -10690763975 / 1880347072],
+    [0.0, 127303824393 / 49829197408, -318862633887 / 49829197408, 701980252875 / 199316789632],
+    [0.0, -282668133 / 205662961, 2019193451 / 616988883, -1453857185 / 822651844],
+    [0.0, 40617522 / 29380423, -110615467 / 29380423, 69997945 / 29380423],
+])
+
+
+# Coefficients (c0, c1, ...) du polynôme d'un pas, y(θ) = Σ c_j θ^j
+
+def hermite(h, ya, fa, yb, fb):
+    hfa, hfb = h * fa, h * fb
+    return np.array([ya, hfa, 3 * (yb - ya) - 2 * hfa - hfb, 2 * (ya - yb) + hfa + hfb])
+
+
+def _rk4(h, y, k1, k2, k3, k4):
+    return np.array([y, h * k1, h * (k2 + k3 - 1.5 * k1 - 0.5 * k4), (2 * h / 3) * (k1 - k2 - k3 + k4)])
+
+
+def _ab3(h, y, f_i, f_i1, f_i2):
+    return np.array([y, h * f_i, h * (0.75 * f_i - f_i1 + 0.25 * f_i2), (h / 6) * (f_i - 2 * f_i1 + f_i2)])
+
+
+def _predcor(h, y, f_p, f_i, f_i1, f_i2):
+    return np.array([y, h * f_i,
+                     h * (f_p / 6 + f_i / 4 - f_i1 / 2 + f_i2 / 12),
+                     h * (f_p - 2 * f_i + f_i1) / 6,
+                     h * (f_p - 3 * f_i + 3 * f_i1 - f_i2) / 24])
+
+
+def _dopri5(h, y, k):
+    return np.concatenate([np.asarray(y)[np.newaxis], h * np.tensordot(P_DOPRI5.T, np.array(k), axes=1)])
+
+
+# Polynôme du pas [ta, ta + h] d'une méthode à pas fixe, à partir des
+# extrémités ya, yb et des dérivées `etapes` du générateur de flux_EDO
+
+def _polynome_euler(f, h, ta, ya, yb, etapes):
+    return hermite(h, ya, etapes[0], yb, f(ta + h, yb))
+
+
+def _polynome_trapeze(f, h, ta, ya, yb, etapes):
+    return hermite(h, ya, etapes[0], yb, etapes[1])
+
+
+def _polynome_rk4(f, h, ta, ya, yb, etapes):
+    return _rk4(h, ya, *etapes)
+
+
+def _polynome_ab3(f, h, ta, ya, yb, etapes):
+    return _ab3(h, ya, *etapes)
+
+
+def _polynome_predcor(f, h, ta, ya, yb, etapes):
+    return _predcor(h, ya, *etapes)
+
+
+_POLYNOMES = {
+    'Euler': _polynome_euler,
+    'Trapèze': _polynome_trapeze,
+    'RK4': _polynome_rk4,
+    'AB3': _polynome_ab3,
+    'Pred-Cor': _polynome_predcor,
+}
+
+
+# Générateurs de pas denses : chacun produit (tb, y(tb), coefficients), où
+# coefficients() renvoie les coefficients du polynôme du pas [ta, tb]
+
+def _dense_fixe(methode, f, t0, y0, h, N, jac, compteurs):
+    polynome, demarrage = _POLYNOMES[methode], DEMARRAGE.get(methode, 0)
+    ya = y0
+    for i, yb in enumerate(islice(pas_fixes(methode, f, t0, y0, h, jac, compteurs), N)):
+        ta = t0 + i * h
+        construire = _polynome_rk4 if i < demarrage else polynome
+        yield ta + h, yb, partial(construire, f, h, ta, ya, yb, compteurs['etapes'])
+        ya = yb
+
+
+def _dense_dopri5(f, t0, y0, t_fin, h, rtol, atol, compteurs):
+    ta, ya = t0, y0
+    for tb, yb in pas_dormand_prince(f, t0, y0, t_fin, h, rtol, atol, compteurs):
+        yield tb, yb, partial(_dopri5, tb - ta, ya, compteurs['etapes'])
+        ta, ya = tb, yb
+
+
+def _dense_auto(f, t0, y0, t_fin, h, rtol, atol, jac, compteurs):
+    ta, ya, fa = t0, y0, None
+    for tb, yb in pas_methode_raide('Auto', f, t0, y0, t_fin, h, rtol, atol, jac, compteurs):
+        if compteurs['etapes'] is not None:
+            # Segment Dormand-Prince (étapes de forme (1,) pour une EDO scalaire) ;
+            # la 7e étape est f(tb, yb), reprise par Hermite si un segment BDF suit
+            k = np.reshape(compteurs['etapes'], (7,) + np.shape(ya))
+            fb = k[6]
+            coefficients = partial(_dopri5, tb - ta, ya, k)
+        else:
+            fa = f(ta, ya) if fa is None else fa
+            fb = f(tb, yb)
+            coefficients = partial(hermite, tb - ta, ya, fa, yb, fb)
+        yield tb, yb, coefficients
+        ta, ya, fa = tb, yb, fb
+
+
+def _dense_hermite(pas, f, t0, y0):
+    """Pas denses d'un générateur de pas (t, y) quelconque, par Hermite (f évaluée en chaque point)."""
+    ta, ya, fa = t0, y0, f(t0, y0)
+    for tb, yb in pas:
+        # Copie : les générateurs symplectiques mettent leur état à jour en place
+        yb = yb.copy() if isinstance(yb, np.ndarray) else yb
+        fb = f(tb, yb)
+        yield tb, yb, partial(hermite, tb - ta, ya, fa, yb, fb)
+        ta, ya, fa = tb, yb, fb
+
+
+def _avec_temps(pas, t0, h):
+    for i, y in enumerate(pas, 1):
+        yield t0 + i * h, y
+
+
+def pas_denses(methode, f, t0, y0, h, N, jac=None, rtol=1e-6, atol=1e-9, compteurs=None):
+    """
+    Générateur des pas denses (tb, y(tb), coefficients) de la méthode sur
+    [t0, t0 + N h] (pas adaptatifs : h est le pas initial).
+    - compteurs : dictionnaire optionnel (n_rejetes, newton, ... selon la méthode)
+    """
+    compteurs = {} if compteurs is None else compteurs
+    t_fin = t0 + N * h
+    if methode in _POLYNOMES:
+        return _dense_fixe(methode, f, t0, y0, h, N, jac, compteurs)
+    if methode == 'DOPRI5':
+        return _dense_dopri5(f, t0, y0, t_fin, h, rtol, atol, compteurs)
+    if methode == 'Auto':
+        return _dense_auto(f, t0, y0, t_fin, h, rtol, atol, jac, compteurs)
+    if methode in ('BDF', 'Rosenbrock'):
+        return _dense_hermite(pas_methode_raide(methode, f, t0, y0, t_fin, h, rtol, atol, jac, compteurs),
+                              f, t0, y0)
+    # Verlet, Yoshida4, Point-Milieu (pas_fixes rejette les méthodes inconnues)
+    pas = pas_fixes(methode, f, t0, y0, h, jac, compteurs)
+    return _dense_hermite(islice(_avec_temps(pas, t0, h), N), f, t0, y0)
+
+
+def evaluer_polynome(coefficients, theta):
+    """y(θ) = Σ c_j θ^j pour un tableau de θ (une ligne de résultat par θ)."""
+    theta = np.asarray(theta, dtype=float)
+    return np.tensordot(theta[:, np.newaxis] ** np.arange(len(coefficients)), coefficients, axes=1)
+
+
+def _preparer(f, y0):
+    """Etat initial et f renvoyant des tableaux (systèmes) ou des flottants (EDO scalaire)."""
+    if np.ndim(y0) == 0:
+        return f, float(y0)
+    g = lambda t, y: np.asarray(f(t, y))
+    g.separe = getattr(f, 'separe', None)
+    return g, etat_initial(y0)
+
+
+def _suivre(stats, methode, compteurs, debut, n_pas):
+    if stats is None:
+        return
+    stats.methode = methode
+    stats.temps_total += time.perf_counter() - debut
+    stats.n_pas += n_pas
+    stats.n_rejetes += compteurs.get('n_rejetes', 0)
+    if 'newton' in compteurs:
+        stats.ajouter_newton(compteurs['newton'])
+    stats.bascules += compteurs.get('bascules', [])
+
+
+def _valider(t_eval, t0, t_fin):
+    t_eval = np.asarray(t_eval, dtype=float)
+    marge = 1e-12 * max(1.0, abs(t_fin))
+    if t_eval.ndim != 1 or (len(t_eval) and (np.any(np.diff(t_eval) < 0) or t_eval[0] < t0 - marge
+                                             or t_eval[-1] > t_fin + marge)):
+        raise ValueError("t_eval doit être un vecteur croissant d'instants compris entre t0 et t0 + N h.")
+    return t_eval
+
+
+def echantillonner(methode, f, t0, y0, h, N, t_eval, jac=None, rtol=1e-6, atol=1e-9, stats=None, dtype=None):
+    """
+    Résout l'EDO (ou le système) et ne renvoie que les points t_eval, par
+    sortie dense.
+    - t_eval : instants croissants, compris dans [t0, t0 + N h]
+    - dtype : type des points stockés (par défaut celui du calcul)
+    Les autres arguments sont ceux de Methodes_num_EDOS. Renvoie (t_eval, y).
+    """
+    t_eval = _valider(t_eval, t0, t0 + N * h)
+    f, y0 = _preparer(compiler_rhs(f), y0)
+    if stats is not None:
+        f = instrumenter(f, stats)
+    y = np.empty(t_eval.shape + np.shape(y0), dtype=type_flottant(dtype, defaut=np.result_type(y0)))
+    instants = t_eval.tolist()
+    # Points en t0, puis points de chaque pas ]ta, tb] ; ceux qui dépassent
+    # t_fin d'un arrondi prennent la valeur du dernier pas
+    j = 0
+    while j < len(instants) and instants[j] <= t0:
+        y[j] = y0
+        j += 1
+    compteurs, n_pas = {}, 0
+    debut = time.perf_counter()
+    ta, y_fin = t0, y0
+    if j < len(instants):
+        for tb, y_fin, coefficients in pas_denses(methode, f, t0, y0, h, N, jac, rtol, atol, compteurs):
+            n_pas += 1
+            k = j
+            while k < len(instants) and instants[k] <= tb:
+                k += 1
+            if k > j:
+                y[j:k] = evaluer_polynome(coefficients(), (t_eval[j:k] - ta) / (tb - ta))
+                j = k
+                if j == len(instants):
+                    break
+            ta = tb
+    y[j:] = y_fin
+    _suivre(stats, methode, compteurs, debut, n_pas)
+    return t_eval, y
+
+
+def echantillonner_par_noyau(methode, f, t0, y0, h, N, t_eval, stats=None, dtype=None):
+    """
+    Comme echantillonner, avec le noyau généré de la méthode (Euler, RK4) ;
+    renvoie None s'il n'y en a pas, si `math` lève une exception ou si stats
+    demande un rappel par pas ou un profil (voir resoudre_par_noyau).
+    """
+    if methode not in METHODES_NOYAU or N < 1 or (stats is not None and (stats.rappel is not None or stats.profiler)):
+        return None
+    fonction = noyau_pour(methode, f, np.shape(y0))
+    if fonction is None:
+        return None
+    t_eval = _valider(t_eval, t0, t0 + N * h)
+    f, y_bloc = _preparer(f, y0)
+    y = np.empty(t_eval.shape + np.shape(y0), dtype=type_flottant(dtype))
+    # Pas contenant chaque point : i tel que t0 + i h <= t < t0 + (i + 1) h (le dernier pas prend t_fin)
+    pas = np.clip(np.floor((t_eval - t0) / h).astype(np.int64), 0, N - 1)
+    theta = (t_eval - t0) / h - pas
+    n_pas = int(pas[-1]) + 1 if len(t_eval) else 0
+    nfev, debut = 0, time.perf_counter()
+    s = j = 0
+    try:
+        while s < n_pas:
+            n = min(TAILLE_BLOC, n_pas - s)
+            _, bloc = fonction(t0 + s * h, y_bloc, h, n, 'd')
+            nfev += fonction.appels(n)
+            fin = int(np.searchsorted(pas, s + n))
+            while j < fin:
+                i = int(pas[j])
+                k = int(np.searchsorted(pas, i, side='right'))
+                # Le pas i est rejoué par le générateur de flux_EDO pour ses dérivées
+                ti, yi, compteurs = t0 + i * h, bloc[i - s], {}
+                yb = next(pas_fixes(methode, f, ti, yi, h, compteurs=compteurs))
+                coefficients = _POLYNOMES[methode](f, h, ti, yi, yb, compteurs['etapes'])
+                nfev += 4 if methode == 'RK4' else 2
+                y[j:k] = evaluer_polynome(coefficients, theta[j:k])
+                j = k
+            y_bloc = bloc[-1]
+            s += n
+    except (ArithmeticError, ValueError, TypeError):
+        return None
+    if stats is not None:
+        stats.methode = methode
+        stats.noyau = fonction.mode
+        stats.temps_total += time.perf_counter() - debut
+        stats.n_pas += n_pas
+        stats.nfev += nfev
+    return t_eval, y
+
+
+class SolutionDense:
+    """
+    Solution continue : points des pas (t, y) et polynôme de chaque pas.
+    sol(t) évalue la solution en un instant ou un tableau d'instants de [t[0], t[-1]].
+    """
+
+    def __init__(self, t, y, coefficients):
+        self.t = t
+        self.y = y
+        self.coefficients = coefficients
+
+    def __call__(self, t):
+        t = np.asarray(t, dtype=float)
+        instants = np.atleast_1d(t)
+        marge = 1e-12 * max(1.0, abs(self.t[-1]))
+        if np.any(instants < self.t[0] - marge) or np.any(instants > self.t[-1] + marge):
+            raise ValueError(f"Solution définie sur [{self.t[0]:g}, {self.t[-1]:g}] seulement.")
+        i = np.clip(np.searchsorted(self.t, instants, side='right') - 1, 0, len(self.t) - 2)
+        theta = (instants - self.t[i]) / (self.t[i + 1] - self.t[i])
+        puissances = theta[:, np.newaxis] ** np.arange(DEGRE_MAX + 1)
+        y = np.einsum('mj,mj...->m...', puissances, self.coefficients[i])
+        return y[0] if t.ndim == 0 else y
+
+
+def solution_dense(methode, f, t0, y0, h, N, jac=None, rtol=1e-6, atol=1e-9, stats=None):
+    """Résout l'EDO (ou le système) et renvoie la SolutionDense correspondante."""
+    f, y0 = _preparer(compiler_rhs(f), y0)
+    if stats is not None:
+        f = instrumenter(f, stats)
+    t, y, coefficients = [t0], [y0], []
+    compteurs = {}
+    debut = time.perf_counter()
+    for tb, yb, c in pas_denses(methode, f, t0, y0, h, N, jac, rtol, atol, compteurs):
+        c = c()
+        # Polynômes complétés au degré maximal, pour un seul tableau de coefficients
+        coefficients.append(np.concatenate([c, np.zeros((DEGRE_MAX + 1 - len(c),) + c.shape[1:], c.dtype)]))
+        t.append(tb)
+        y.append(yb)
+    _suivre(stats, methode, compteurs, debut, len(coefficients))
+    return SolutionDense(np.array(t), np.array(y), np.array(coefficients))
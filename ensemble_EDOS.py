@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+"""
+Résolution d'un ensemble de problèmes (conditions initiales ou paramètres
+différents) en un seul appel vectorisé.
+
+Tous les membres avancent ensemble : à chaque pas, le second membre est évalué
+une seule fois sur un tableau (dim, n_ensemble), ce qui amortit le coût de la
+boucle Python sur tout le lot. Toutes les méthodes de Methodes_num_EDOS sont
+utilisables, y compris les méthodes multipas et le trapèze implicite (Newton
+par blocs, voir newton_EDO).
+"""
+
+import numpy as np
+
+from compilateur_EDO import compiler_rhs
+from Methodes_num_EDOS import Methodes_num_EDOS
+
+
+def Methodes_num_EDOS_ensemble(methode, f, t0, y0, h, N, params=None, **options):
+    """
+    Résout simultanément n_ensemble problèmes avec la méthode spécifiée.
+    - methode : comme pour Methodes_num_EDOS.
+    - f : fonction f(t, y) (ou f(t, y, p) si params est fourni), ou expression(s).
+          y est de forme (dim, n_ensemble) : y[i] est la composante i de tous
+          les membres ; f renvoie un tableau (ou une liste) de même forme.
+          Pour une EDO scalaire, y est de forme (n_ensemble,).
+    - y0 : tableau (n_ensemble, dim), ou (n_ensemble,) pour une EDO scalaire.
+    - params : tableau optionnel (n_ensemble, n_params) ou (n_ensemble,) ;
+               f reçoit p de forme (n_params, n_ensemble) ou (n_ensemble,).
+    - options : transmises à Methodes_num_EDOS (tampons, jac, rtol, atol).
+    Renvoie t et y de forme (N + 1, n_ensemble, dim) (ou (N + 1, n_ensemble)).
+    """
+    y0 = np.asarray(y0, dtype=float)
+    if y0.ndim not in (1, 2):
+        raise ValueError("y0 doit être de forme (n_ensemble, dim) ou (n_ensemble,).")
+    scalaire = y0.ndim == 1
+    g = compiler_rhs(f, parametres=params is not None)
+
+    if params is not None:
+        p = np.asarray(params, dtype=float)
+        if p.shape[0] != y0.shape[0]:
+            raise ValueError("params doit avoir une ligne par membre de l'ensemble.")
+        p = p.T
+        g_p = g
+        g = lambda t, y: g_p(t, y, p)
+
+    # État interne : composante d'abord, (dim, n_ensemble)
+    if scalaire:
+        g_s = g
+        g = lambda t, y: np.asarray(g_s(t, y[0]))[np.newaxis]
+        Y0 = y0[np.newaxis]
+    else:
+        Y0 = y0.T
+    t, y = Methodes_num_EDOS(methode, g, t0, Y0, h, N, **options)
+    # (N + 1, dim, n_ensemble) -> (N + 1, n_ensemble, dim)
+    return (t, y[:, 0]) if scalaire else (t, np.swapaxes(y, 1, 2))
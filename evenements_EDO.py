@@ -0,0 +1,183 @@
+# -*- coding: utf-8 -*-
+"""
+Événements : franchissements de seuil, arrêt anticipé et garde-fous.
+
+Un événement est une fonction g(t, y) (ou une expression) dont on cherche les
+zéros le long de la trajectoire. Après chaque pas accepté, le signe de g est
+comparé à celui du pas précédent ; en cas de changement, l'instant du zéro
+est localisé dans le pas par la méthode de Brent sur une sortie dense (cubique
+d'Hermite de dense_EDO, construite sur les valeurs et les dérivées aux deux
+bouts du pas, deux appels à f par zéro localisé).
+- direction : > 0 ne retient que les passages de g < 0 à g > 0, < 0 l'inverse,
+  0 les deux
+- terminal : un événement terminal arrête la résolution à sa k-ième
+  occurrence (True pour la première) ; les tableaux renvoyés sont tronqués et
+  leur dernier point est le point de l'événement
+Les garde-fous arrêtent aussi la résolution dès que y contient nan ou inf, ou
+que sa norme dépasse norme_max, au lieu de remplir le reste de la trajectoire.
+
+Un objet Evenements passé en argument `evenements=` à methodes_num_EDO ou
+Methodes_num_EDOS est rempli pendant la résolution, comme StatsSolveur.
+Le suivi s'appuie sur le rappel par pas des solveurs (voir stats_EDO) : les
+noyaux générés, qui n'en ont pas, ne sont alors pas utilisés. Les ensembles
+(y de forme (dim, n)) ne sont pas concernés.
+"""
+
+import math
+import warnings
+from dataclasses import dataclass
+
+import numpy as np
+
+from compilateur_EDO import compiler_rhs
+from dense_EDO import evaluer_polynome, hermite
+from stats_EDO import StatsSolveur, suivre
+
+
+@dataclass
+class Evenement:
+    """Fonction d'événement g(t, y) et options (voir le module)."""
+    g: object
+    terminal: int = 0
+    direction: int = 0
+    nom: str = ''
+
+
+class Evenements:
+    """
+    Suivi des événements d'une résolution (rempli par le solveur).
+    - evenements : Evenement, fonction g(t, y) ou expression, ou liste de
+                   ceux-ci ; une fonction peut porter des attributs `terminal`
+                   et `direction` (convention de scipy.integrate.solve_ivp)
+    - norme_max : norme maximale de y (garde-fou), None pour aucune
+    Après la résolution :
+    - t, y : pour chaque événement, listes des instants et des états de ses zéros
+    - arret : None, 'evenement', 'divergence' ou 'rappel' (arrêt demandé par
+              le rappel de l'utilisateur)
+    - t_arret, y_arret, evenement_arret : point et indice de l'événement d'arrêt
+    - n_pas : pas effectués
+    """
+
+    def __init__(self, evenements=(), norme_max=None):
+        if isinstance(evenements, (Evenement, str)) or callable(evenements):
+            evenements = [evenements]
+        self.evenements = [e if isinstance(e, Evenement) else
+                           Evenement(e, getattr(e, 'terminal', 0), getattr(e, 'direction', 0))
+                           for e in evenements]
+        self.norme_max = norme_max
+        self.reinitialiser()
+
+    def reinitialiser(self):
+        self.t = [[] for _ in self.evenements]
+        self.y = [[] for _ in self.evenements]
+        self.arret = None
+        self.t_arret = self.y_arret = self.evenement_arret = None
+        self.n_pas = 0
+
+    def demarrer(self, f, t0, y0, rappel=None):
+        """Prépare le suivi depuis (t0, y0) ; rappel : rappel de l'utilisateur, appelé avant les événements."""
+        self.reinitialiser()
+        self._f = f
+        self._g = [compiler_rhs(e.g) for e in self.evenements]
+        self._rappel = rappel
+        self._restants = [int(e.terminal) for e in self.evenements]
+        self._scalaire = np.ndim(y0) == 0
+        self._t, self._y = float(t0), float(y0) if self._scalaire else np.array(y0)
+        self._valeurs = []
+        for g in self._g:
+            valeur = np.asarray(g(self._t, self._y), dtype=float)
+            if valeur.ndim:
+                raise ValueError("Une fonction d'événement doit renvoyer un scalaire.")
+            self._valeurs.append(float(valeur))
+
+    def _declenche(self, k, avant, apres):
+        direction = self.evenements[k].direction
+        montee, descente = avant < 0 <= apres, avant > 0 >= apres
+        return montee if direction > 0 else descente if direction < 0 else montee or descente
+
+    def rappel(self, i, t, y):
+        """Rappel par pas des solveurs : renvoie vrai pour arrêter la résolution au point i."""
+        self.n_pas = i
+        if self._rappel is not None and self._rappel(i, t, y):
+            # Arrêt demandé par le rappel de l'utilisateur (StatsSolveur.rappel)
+            self.arret, self.t_arret = 'rappel', float(t)
+            return True
+        # Copie : le solveur peut réutiliser le tableau au pas suivant
+        if self._scalaire:
+            y = float(y)
+            fini = math.isfinite(y)
+        else:
+            y = y.copy()
+            fini = np.isfinite(y).all()
+        if not fini or (self.norme_max is not None and np.linalg.norm(y) > self.norme_max):
+            self.arret, self.t_arret, self.y_arret = 'divergence', float(t), y
+            warnings.warn(f"Résolution arrêtée à t = {float(t):g} : la solution diverge.", RuntimeWarning)
+            return True
+        valeurs = [float(g(t, y)) for g in self._g]
+        declenches = [k for k in range(len(self._g)) if self._declenche(k, self._valeurs[k], valeurs[k])]
+        if declenches:
+            zeros = sorted((self._localiser(k, t, y, valeurs[k]) + (k,)) for k in declenches)
+            for t_zero, y_zero, k in zeros:
+                self.t[k].append(t_zero)
+                self.y[k].append(y_zero)
+                if self._restants[k] > 0:
+                    self._restants[k] -= 1
+                    if self._restants[k] == 0:
+                        self.arret, self.t_arret, self.y_arret, self.evenement_arret = 'evenement', t_zero, y_zero, k
+                        return True
+        self._t, self._y, self._valeurs = float(t), y, valeurs
+        return False
+
+    def _localiser(self, k, t, y, valeur):
+        """Instant et état du zéro de l'événement k dans le pas [self._t, t]."""
+        from scipy.optimize import brentq
+
+        ta, tb = self._t, float(t)
+        if valeur == 0.0:
+            return tb, y
+        f = self._f
+        coefficients = hermite(tb - ta, self._y, np.asarray(f(ta, self._y), dtype=float),
+                               y, np.asarray(f(tb, y), dtype=float))
+        dense = lambda s: evaluer_polynome(coefficients, [(s - ta) / (tb - ta)])[0]
+        g = self._g[k]
+        t_zero = brentq(lambda s: float(g(s, dense(s))), ta, tb, xtol=1e-12 * max(1.0, abs(tb)))
+        y_zero = dense(t_zero)
+        return t_zero, (float(y_zero) if self._scalaire else y_zero)
+
+    def terminer(self, t, y):
+        """
+        Trajectoire finale : si la résolution a été arrêtée, les tableaux (déjà
+        tronqués par le solveur) sont copiés, pour libérer la partie non
+        remplie, et leur dernier point devient celui de l'événement.
+        """
+        if self.arret is None:
+            return t, y
+        t, y = np.array(t), np.array(y)
+        if self.arret == 'evenement':
+            t[-1], y[-1] = self.t_arret, self.y_arret
+        return t, y
+
+
+def resoudre_avec_evenements(evenements, stats, methode, resoudre, arguments):
+    """
+    Exécute resoudre(*arguments, stats=...) (arguments commençant par
+    f, methode, t0, y0, comme les _resoudre des dispatchers) avec le rappel
+    des événements, puis renvoie la trajectoire tronquée. Sans stats de
+    l'utilisateur, un StatsSolveur sert seulement à porter le rappel : f n'est
+    alors pas instrumentée.
+    """
+    f, _, t0, y0 = arguments[:4]
+    if np.ndim(y0) > 1:
+        raise ValueError("Les événements ne s'appliquent pas aux ensembles.")
+    porteur = stats if stats is not None else StatsSolveur()
+    rappel = porteur.rappel
+    evenements.demarrer(f, t0, y0, rappel)
+    porteur.rappel = evenements.rappel
+    try:
+        if stats is not None:
+            t, y = suivre(stats, methode, resoudre, *arguments)
+        else:
+            t, y = resoudre(*arguments, stats=porteur)
+    finally:
+        porteur.rappel = rappel
+    return evenements.terminer(t, y)
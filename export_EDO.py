@@ -0,0 +1,218 @@
+# -*- coding: utf-8 -*-
+"""
+Export des trajectoires (t, y) calculées par les solveurs.
+
+Les formats binaires sont écrits directement depuis les tableaux du solveur,
+sans DataFrame intermédiaire :
+- npy : un tableau (n, 1 + dim) [t, y...] en ordre Fortran, écrit colonne par colonne
+- npz : deux tableaux t et y, non compressés
+- parquet : une colonne par composante (si pyarrow est installé)
+- csv : produit par blocs de lignes, avec un formatage vectorisé des nombres
+  (pyarrow si disponible)
+
+La décimation (un point sur k) se fait par vues `[::k]`, sans copie.
+Une trajectoire stockée en float32 (voir precision_EDO) est exportée en
+float32 : colonnes float32 en Parquet et npz, tableau float32 en npy, et
+représentation la plus courte du float32 en CSV.
+pyarrow n'est importé qu'au premier export qui l'utilise (démarrage plus
+rapide des interfaces).
+Les fonctions `bouton_telechargement` et `bouton_figure` sont partagées par
+tous les boutons de téléchargement des interfaces Streamlit.
+"""
+
+import importlib.util
+import io
+import tempfile
+from functools import lru_cache
+
+import numpy as np
+
+# Lignes formatées par bloc lors de l'écriture CSV
+TAILLE_BLOC_CSV = 50000
+# Au-delà, le fichier exporté est écrit sur disque plutôt qu'en mémoire
+TAILLE_MAX_MEMOIRE = 64 * 2**20
+
+TYPES_MIME = {
+    'csv': 'text/csv',
+    'npy': 'application/octet-stream',
+    'npz': 'application/zip',
+    'parquet': 'application/vnd.apache.parquet',
+}
+
+
+@lru_cache(maxsize=None)
+def pyarrow_disponible():
+    """Vrai si pyarrow est installé (sans l'importer)."""
+    return importlib.util.find_spec('pyarrow') is not None
+
+
+def _pyarrow():
+    """Modules pyarrow, pyarrow.csv et pyarrow.parquet, importés au premier appel."""
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+    import pyarrow.parquet as pq
+    return pa, pa_csv, pq
+
+
+def formats_disponibles():
+    """Formats d'export utilisables dans l'environnement courant."""
+    formats = ['csv', 'npy', 'npz']
+    if pyarrow_disponible():
+        formats.append('parquet')
+    return formats
+
+
+def decimer(t, y, decimation=1):
+    """Un point sur `decimation` (vues sur les tableaux d'origine)."""
+    t, y = np.asarray(t), np.asarray(y)
+    if decimation > 1:
+        return t[::decimation], y[::decimation]
+    return t, y
+
+
+def _colonnes(y):
+    """Composantes de y sous forme de vues 1-D."""
+    return [y] if y.ndim == 1 else [y[:, i] for i in range(y.shape[1])]
+
+
+def noms_colonnes(y):
+    """Noms par défaut des colonnes : y, ou y[1], y[2], ... pour un système."""
+    return ['y'] if np.ndim(y) == 1 else [f"y[{i + 1}]" for i in range(np.shape(y)[1])]
+
+
+def ecrire_csv(fichier, t, y, noms=None, taille_bloc=TAILLE_BLOC_CSV):
+    """
+    Écrit t et y en CSV dans un fichier binaire ouvert, bloc par bloc.
+    Les nombres sont écrits avec leur représentation la plus courte qui relit
+    exactement le flottant (dans son type, float32 ou float64) : par le
+    formateur C++ de pyarrow s'il est installé, sinon par repr (ou par NumPy
+    pour un float32), colonne par colonne.
+    """
+    t, y = np.asarray(t), np.asarray(y)
+    noms = ["t"] + list(noms or noms_colonnes(y))
+    colonnes = [t] + _colonnes(y)
+    fichier.write((",".join(noms) + "\n").encode())
+    if pyarrow_disponible():
+        pa, pa_csv, _ = _pyarrow()
+    for debut in range(0, len(t), taille_bloc):
+        bloc = [c[debut:debut + taille_bloc] for c in colonnes]
+        if pyarrow_disponible():
+            table = pa.table([pa.array(c) for c in bloc], names=noms)
+            pa_csv.write_csv(table, fichier, pa_csv.WriteOptions(include_header=False))
+        else:
+            texte = "\n".join(map(",".join, zip(*[_textes(c) for c in bloc])))
+            fichier.write((texte + "\n").encode())
+
+
+def _textes(colonne):
+    # repr d'un float Python relirait le float32 converti en float64 (0.10000000149011612)
+    if colonne.dtype == np.float32:
+        return colonne.astype(str).tolist()
+    return map(repr, colonne.tolist())
+
+
+def ecrire_npy(fichier, t, y):
+    """
+    Écrit un tableau (n, 1 + dim) [t, y...] au format .npy. L'en-tête déclare
+    l'ordre Fortran : chaque colonne est écrite telle quelle à la suite, sans
+    assembler le tableau complet en mémoire. Le tableau a le type de y
+    (float32 ou float64) ; t y est converti.
+    """
+    y = np.asarray(y)
+    dtype = np.float32 if y.dtype == np.float32 else np.float64
+    t, y = np.asarray(t, dtype=dtype), np.asarray(y, dtype=dtype)
+    colonnes = [t] + _colonnes(y)
+    np.lib.format.write_array_header_1_0(fichier, {
+        'descr': np.lib.format.dtype_to_descr(t.dtype),
+        'fortran_order': True,
+        'shape': (len(t), len(colonnes)),
+    })
+    for c in colonnes:
+        if c.flags.c_contiguous:
+            fichier.write(memoryview(c).cast('B'))
+        else:
+            # Colonne d'un tableau (n, dim) : copie par blocs de taille bornée
+            for debut in range(0, len(c), TAILLE_BLOC_CSV):
+                fichier.write(np.ascontiguousarray(c[debut:debut + TAILLE_BLOC_CSV]).tobytes())
+
+
+def ecrire_npz(fichier, t, y):
+    """Écrit t et y dans une archive .npz non compressée."""
+    np.savez(fichier, t=np.asarray(t), y=np.asarray(y))
+
+
+def ecrire_parquet(fichier, t, y, noms=None):
+    """Écrit une table Parquet (colonne t puis une colonne par composante)."""
+    if not pyarrow_disponible():
+        raise ImportError("L'export Parquet nécessite le paquet pyarrow.")
+    pa, _, pq = _pyarrow()
+    t, y = np.asarray(t), np.asarray(y)
+    noms = noms or noms_colonnes(y)
+    table = pa.table([pa.array(c) for c in [t] + _colonnes(y)], names=["t"] + list(noms))
+    pq.write_table(table, fichier)
+
+
+def ecrire(fichier, t, y, format='csv', noms=None, decimation=1):
+    """Écrit (t, y) dans `fichier` (chemin ou fichier binaire ouvert) au format demandé."""
+    t, y = decimer(t, y, decimation)
+    if isinstance(fichier, str):
+        with open(fichier, 'wb') as f:
+            return ecrire(f, t, y, format, noms)
+    if format == 'csv':
+        ecrire_csv(fichier, t, y, noms)
+    elif format == 'npy':
+        ecrire_npy(fichier, t, y)
+    elif format == 'npz':
+        ecrire_npz(fichier, t, y)
+    elif format == 'parquet':
+        ecrire_parquet(fichier, t, y, noms)
+    else:
+        raise ValueError(f"Format d'export inconnu : {format}. Choisissez parmi : {', '.join(formats_disponibles())}.")
+
+
+def exporter(t, y, format='csv', noms=None, decimation=1):
+    """
+    Renvoie un fichier binaire ouvert, positionné au début, contenant l'export.
+    Le contenu reste en mémoire jusqu'à TAILLE_MAX_MEMOIRE puis bascule sur disque.
+    """
+    fichier = tempfile.SpooledTemporaryFile(max_size=TAILLE_MAX_MEMOIRE)
+    ecrire(fichier, t, y, format, noms, decimation)
+    fichier.seek(0)
+    return fichier
+
+
+def bouton_telechargement(conteneur, t, y, nom, label, format='csv', noms=None, decimation=1, key=None):
+    """
+    Bouton Streamlit de téléchargement des valeurs numériques.
+    - conteneur : st, st.sidebar ou une colonne Streamlit
+    - nom : nom du fichier sans extension
+    L'export n'est produit que si l'utilisateur clique sur le bouton.
+    """
+    return conteneur.download_button(
+        label=label,
+        data=lambda: exporter(t, y, format, noms, decimation),
+        file_name=f"{nom}.{format}",
+        mime=TYPES_MIME[format],
+        key=key,
+    )
+
+
+def bouton_figure(conteneur, fig, nom, label, key=None):
+    """
+    Bouton Streamlit de téléchargement d'une figure matplotlib au format PNG
+    (fig peut aussi être le PNG déjà produit, en octets).
+    """
+    def png():
+        buf = io.BytesIO()
+        fig.savefig(buf, format="png")
+        buf.seek(0)
+        return buf
+    data = fig if isinstance(fig, bytes) else png
+    return conteneur.download_button(label=label, data=data, file_name=f"{nom}.png", mime="image/png", key=key)
+
+
+def options_export(conteneur):
+    """Choix du format et de la décimation dans l'interface (renvoie (format, decimation))."""
+    format = conteneur.selectbox("Format d'export des valeurs", options=formats_disponibles())
+    decimation = conteneur.number_input("Décimation de l'export (un point sur k)", min_value=1, value=1, step=1)
+    return format, int(decimation)
@@ -0,0 +1,327 @@
+# -*- coding: utf-8 -*-
+"""
+Résolution en flux : la trajectoire est produite par blocs de taille fixe.
+
+Au lieu de préallouer (N + 1) points, `resoudre_par_blocs` renvoie un
+générateur de blocs (t, y) ; la mémoire utilisée ne dépend que de la taille
+des blocs, ce qui permet des simulations de 10^8 pas. Les méthodes multipas
+conservent leur historique de dérivées d'un bloc à l'autre.
+
+Des « puits » consomment le flux au fur et à mesure :
+- ReducteurMinMax : minimum, maximum et erreur maximale courants
+- EcrivainMemmap : écriture dans des fichiers `.npy` projetés en mémoire
+- CollecteurAminci : un point sur k, pour les tracés
+"""
+
+import os
+
+import numpy as np
+from numpy.lib.format import open_memmap
+
+from adaptatif_EDO import pas_dormand_prince
+from compilateur_EDO import compiler_rhs, compiler_solution_exacte, erreur_solution_exacte
+from newton_EDO import NewtonSimplifie
+from precision_EDO import type_flottant
+from raide_EDO import pas_methode_raide
+from symplectique_EDO import pas_point_milieu, pas_verlet, pas_yoshida4
+
+
+# Générateurs de pas : chacun produit indéfiniment y[i + 1] à partir de y[i].
+# Si un dictionnaire compteurs est fourni, compteurs['etapes'] reçoit les
+# dérivées du dernier pas (celles dont dense_EDO construit son polynôme) :
+# (f_i,) pour Euler, (f_i, f_i+1) pour Trapèze, (k1, k2, k3, k4) pour RK4 et
+# les pas de démarrage, (f_i, f_i-1, f_i-2) pour AB3, (f(t_i+1, y_pred), f_i,
+# f_i-1, f_i-2) pour Pred-Cor.
+
+def _pas_euler(f, t0, y0, h, compteurs=None):
+    y, i = y0, 0
+    while True:
+        k = f(t0 + i * h, y)
+        y = y + h * k
+        i += 1
+        if compteurs is not None:
+            compteurs['etapes'] = (k,)
+        yield y
+
+
+def _pas_trapeze(f, t0, y0, h, jac=None, newton=None, compteurs=None):
+    newton = newton or NewtonSimplifie(f, jac)
+    y, i = y0, 0
+    fi = f(t0, y)
+    while True:
+        t_suiv = t0 + (i + 1) * h
+        y = newton.resoudre(t_suiv, y + 0.5 * h * fi, 0.5 * h, y)
+        f_prec, fi = fi, f(t_suiv, y)
+        i += 1
+        if compteurs is not None:
+            compteurs['etapes'] = (f_prec, fi)
+        yield y
+
+
+def _pas_rk4(f, t0, y0, h, compteurs=None):
+    y, i = y0, 0
+    while True:
+        t = t0 + i * h
+        k1 = f(t, y)
+        k2 = f(t + h / 2, y + h * k1 / 2)
+        k3 = f(t + h / 2, y + h * k2 / 2)
+        k4 = f(t + h, y + h * k3)
+        y = y + (h / 6) * (k1 + 2 * k2 + 2 * k3 + k4)
+        i += 1
+        if compteurs is not None:
+            compteurs['etapes'] = (k1, k2, k3, k4)
+        yield y
+
+
+def _pas_ab3(f, t0, y0, h, compteurs=None):
+    # Démarrage par RK4 (ses k1 sont les premières dérivées), puis tampon
+    # circulaire des trois dernières dérivées
+    etapes = {} if compteurs is None else compteurs
+    demarrage = _pas_rk4(f, t0, y0, h, etapes)
+    F = [None] * 3
+    for j in range(2):
+        y = next(demarrage)
+        F[j] = etapes['etapes'][0]
+        yield y
+    i = 2
+    while True:
+        F[i % 3] = f(t0 + i * h, y)
+        y = y + h * (23 * F[i % 3] - 16 * F[(i - 1) % 3] + 5 * F[(i - 2) % 3]) / 12
+        if compteurs is not None:
+            compteurs['etapes'] = (F[i % 3], F[(i - 1) % 3], F[(i - 2) % 3])
+        i += 1
+        yield y
+
+
+def _pas_predcor(f, t0, y0, h, compteurs=None):
+    etapes = {} if compteurs is None else compteurs
+    demarrage = _pas_rk4(f, t0, y0, h, etapes)
+    F = [None] * 4
+    for j in range(3):
+        y = next(demarrage)
+        F[j] = etapes['etapes'][0]
+        yield y
+    i = 3
+    while True:
+        t = t0 + i * h
+        F[i % 4] = f(t, y)
+        y_pred = y + h * (55 * F[i % 4] - 59 * F[(i - 1) % 4] + 37 * F[(i - 2) % 4] - 9 * F[(i - 3) % 4]) / 24
+        f_pred = f(t + h, y_pred)
+        y = y + h * (9 * f_pred + 19 * F[i % 4] - 5 * F[(i - 1) % 4] + F[(i - 2) % 4]) / 24
+        if compteurs is not None:
+            compteurs['etapes'] = (f_pred, F[i % 4], F[(i - 1) % 4], F[(i - 2) % 4])
+        i += 1
+        yield y
+
+
+_PAS = {
+    'Euler': _pas_euler,
+    'Trapèze': _pas_trapeze,
+    'RK4': _pas_rk4,
+    'AB3': _pas_ab3,
+    'Pred-Cor': _pas_predcor,
+    'Verlet': pas_verlet,
+    'Yoshida4': pas_yoshida4,
+    'Point-Milieu': pas_point_milieu,
+}
+# Pas de démarrage (par RK4) des méthodes multipas
+DEMARRAGE = {'AB3': 2, 'Pred-Cor': 3}
+
+
+def pas_fixes(methode, f, t0, y0, h, jac=None, compteurs=None):
+    """
+    Générateur des y[i + 1] d'une méthode à pas fixe (Euler, Trapèze, RK4, AB3,
+    Pred-Cor, Verlet, Yoshida4, Point-Milieu), y0 et f étant déjà préparés.
+    - compteurs : dictionnaire optionnel qui reçoit `etapes` (voir ci-dessus,
+                  sauf méthodes symplectiques) et `newton` pour les méthodes implicites
+    """
+    if methode not in _PAS:
+        raise ValueError("Méthode inconnue. Choisissez parmi : Euler, Trapèze, RK4, DOPRI5, AB3, Pred-Cor, "
+                         "BDF, Rosenbrock, Auto, Verlet, Yoshida4, Point-Milieu.")
+    options = {}
+    if methode in ('Trapèze', 'Point-Milieu'):
+        options['newton'] = NewtonSimplifie(f, jac)
+        if compteurs is not None:
+            compteurs['newton'] = options['newton']
+    if methode not in ('Verlet', 'Yoshida4', 'Point-Milieu'):
+        options['compteurs'] = compteurs
+    return _PAS[methode](f, t0, y0, h, **options)
+
+
+def resoudre_par_blocs(methode, f, t0, y0, h, N, taille_bloc=10000, copier=False, dtype=None, **options):
+    """
+    Résout l'EDO (ou le système) et renvoie un générateur de blocs (t, y).
+    - methode, f, t0, y0, h, N : comme pour Methodes_num_EDOS
+    - taille_bloc : nombre maximal de points par bloc (le premier bloc contient y0)
+    - copier : si faux, les tableaux d'un bloc sont réutilisés pour le bloc
+               suivant (mémoire constante) ; les copier si on les conserve
+    - dtype : type des points y des blocs ('float64' par défaut, ou 'float32') ;
+              le calcul reste en float64 (voir precision_EDO)
+    - options : jac (méthodes implicites), rtol et atol (DOPRI5, BDF, Rosenbrock,
+                Auto : h est alors le pas initial)
+    """
+    f = compiler_rhs(f)
+    dtype = type_flottant(dtype)
+    vectoriel = np.ndim(y0) > 0
+    if vectoriel:
+        y0 = np.array(y0, dtype=float)
+        f_brut = f
+        f = lambda t, y: np.asarray(f_brut(t, y), dtype=float)
+        f.separe = getattr(f_brut, 'separe', None)
+    else:
+        y0 = float(y0)
+
+    if methode == 'DOPRI5':
+        return _blocs_adaptatifs(pas_dormand_prince(f, t0, y0, t0 + N * h, h, options.get('rtol', 1e-6),
+                                                    options.get('atol', 1e-9)),
+                                 t0, y0, taille_bloc, copier, dtype)
+    if methode in ('BDF', 'Rosenbrock', 'Auto'):
+        return _blocs_adaptatifs(pas_methode_raide(methode, f, t0, y0, t0 + N * h, h, options.get('rtol', 1e-6),
+                                                   options.get('atol', 1e-9), options.get('jac')),
+                                 t0, y0, taille_bloc, copier, dtype)
+    return _blocs_fixes(pas_fixes(methode, f, t0, y0, h, options.get('jac')), t0, y0, h, N, taille_bloc, copier,
+                        dtype)
+
+
+def _blocs_fixes(pas, t0, y0, h, N, taille_bloc, copier, dtype):
+    t_bloc = np.empty(taille_bloc)
+    y_bloc = np.empty((taille_bloc,) + np.shape(y0), dtype=dtype)
+    y_bloc[0] = y0
+    debut, n = 0, 1  # indice global du premier point du bloc, points remplis
+    for i in range(1, N + 1):
+        if n == taille_bloc:
+            t_bloc[:] = t0 + h * np.arange(debut, debut + n)
+            yield (t_bloc.copy(), y_bloc.copy()) if copier else (t_bloc, y_bloc)
+            debut, n = debut + n, 0
+        y_bloc[n] = next(pas)
+        n += 1
+    t_bloc[:n] = t0 + h * np.arange(debut, debut + n)
+    yield (t_bloc[:n].copy(), y_bloc[:n].copy()) if copier else (t_bloc[:n], y_bloc[:n])
+
+
+def _blocs_adaptatifs(pas, t0, y0, taille_bloc, copier, dtype):
+    t_bloc = np.empty(taille_bloc)
+    y_bloc = np.empty((taille_bloc,) + np.shape(y0), dtype=dtype)
+    t_bloc[0], y_bloc[0] = t0, y0
+    n = 1
+    for t, y in pas:
+        if n == taille_bloc:
+            yield (t_bloc.copy(), y_bloc.copy()) if copier else (t_bloc, y_bloc)
+            n = 0
+        t_bloc[n], y_bloc[n] = t, y
+        n += 1
+    yield (t_bloc[:n].copy(), y_bloc[:n].copy()) if copier else (t_bloc[:n], y_bloc[:n])
+
+
+def consommer(blocs, *puits):
+    """Fait passer chaque bloc du flux dans tous les puits, puis renvoie les puits."""
+    for t, y in blocs:
+        for p in puits:
+            p.ajouter(t, y)
+    for p in puits:
+        if hasattr(p, 'fermer'):
+            p.fermer()
+    return puits
+
+
+class ReducteurMinMax:
+    """
+    Statistiques courantes du flux : min/max par composante, dernier point et,
+    si y_exact est fourni (fonction ou expression), erreur maximale.
+    """
+
+    def __init__(self, y_exact=None):
+        self.y_exact = compiler_solution_exacte(y_exact) if isinstance(y_exact, str) else y_exact
+        self.min = None
+        self.max = None
+        self.erreur_max = 0.0 if y_exact is not None else np.nan
+        self.n_points = 0
+        self.t_final = None
+        self.y_final = None
+
+    def ajouter(self, t, y):
+        if len(t) == 0:
+            return
+        b_min, b_max = y.min(axis=0), y.max(axis=0)
+        self.min = b_min if self.min is None else np.minimum(self.min, b_min)
+        self.max = b_max if self.max is None else np.maximum(self.max, b_max)
+        if self.y_exact is not None:
+            self.erreur_max = max(self.erreur_max, erreur_solution_exacte(self.y_exact, t, y))
+        self.n_points += len(t)
+        self.t_final, self.y_final = t[-1], np.copy(y[-1])
+
+
+class EcrivainMemmap:
+    """
+    Écrit le flux dans deux fichiers `.npy` (<base>_t.npy et <base>_y.npy)
+    projetés en mémoire, sans jamais garder la trajectoire complète en RAM.
+    - n_points : nombre de points attendus (N + 1 pour un pas fixe) ; le
+                 fichier est tronqué s'il en reçoit moins (pas adaptatif)
+    - dtype : type de stockage de y ; t reste en float64 (les instants d'un
+              long horizon ne tiennent pas en float32)
+    """
+
+    def __init__(self, base, n_points, forme_y=(), dtype=np.float64):
+        self.base = base
+        self.t = open_memmap(f"{base}_t.npy", mode='w+', dtype=np.float64, shape=(n_points,))
+        self.y = open_memmap(f"{base}_y.npy", mode='w+', dtype=dtype, shape=(n_points,) + tuple(forme_y))
+        self.n = 0
+
+    def ajouter(self, t, y):
+        self.t[self.n:self.n + len(t)] = t
+        self.y[self.n:self.n + len(t)] = y
+        self.n += len(t)
+
+    def fermer(self):
+        self.t.flush()
+        self.y.flush()
+        n_points = len(self.t)
+        del self.t, self.y
+        if self.n < n_points:
+            # Recopie des seuls points reçus dans un fichier temporaire, qui
+            # remplace ensuite l'original (jamais réécrit pendant sa lecture)
+            for suffixe in ('_t.npy', '_y.npy'):
+                chemin = self.base + suffixe
+                source = np.load(chemin, mmap_mode='r')
+                copie = open_memmap(chemin + '.tmp', mode='w+', dtype=source.dtype,
+                                    shape=(self.n,) + source.shape[1:])
+                copie[:] = source[:self.n]
+                copie.flush()
+                del source, copie
+                os.replace(chemin + '.tmp', chemin)
+
+
+def aminci(blocs, facteur):
+    """Générateur ne gardant qu'un point sur `facteur` du flux (indices globaux)."""
+    debut = 0
+    for t, y in blocs:
+        premier = (-debut) % facteur
+        yield t[premier::facteur].copy(), y[premier::facteur].copy()
+        debut += len(t)
+
+
+class CollecteurAminci:
+    """Garde un point sur `facteur` (et le dernier point) pour les tracés."""
+
+    def __init__(self, facteur):
+        self.facteur = facteur
+        self._debut = 0
+        self._t, self._y = [], []
+        self._dernier = None
+
+    def ajouter(self, t, y):
+        if len(t) == 0:
+            return
+        premier = (-self._debut) % self.facteur
+        self._t.append(t[premier::self.facteur].copy())
+        self._y.append(y[premier::self.facteur].copy())
+        self._debut += len(t)
+        self._dernier = (t[-1], np.copy(y[-1]))
+
+    def resultat(self):
+        """Renvoie (t, y) aminci, en incluant le dernier point du flux."""
+        t, y = np.concatenate(self._t), np.concatenate(self._y)
+        if self._dernier is not None and t[-1] != self._dernier[0]:
+            t = np.append(t, self._dernier[0])
+            y = np.concatenate([y, self._dernier[1][np.newaxis]])
+        return t, y
@@ -0,0 +1,364 @@
+# -*- coding: utf-8 -*-
+"""
+Résolution en lot, sans interface, d'un grand nombre d'EDOs et de systèmes.
+
+Le fichier de taches (JSON, ou YAML si PyYAML est installé) contient une liste
+de taches, ou un dictionnaire {'defaut': {...}, 'taches': [...]} dont les
+valeurs par défaut complètent chaque tache. Une tache comprend :
+- f : expression f(t, y) (EDO scalaire) ou liste d'expressions (système)
+- y0 : nombre ou expression (ex: 'np.exp(1)'), liste pour un système
+- methode : nom de méthode, ou liste de méthodes (une tache par méthode)
+- h, T : pas et durée de simulation ; t0 (0 par défaut)
+- y_exact : solution exacte optionnelle, pour l'erreur maximale (pour un
+  système, 'np.array([...])' avec une expression par composante)
+- rtol, atol : tolérances des méthodes adaptatives
+- dtype, dtype_calcul : précision du stockage et du calcul, 'float64' ou
+  'float32' (voir precision_EDO ; dtype_calcul pour les systèmes seulement)
+- arret : expression g(t, y), ou liste d'expressions, d'événements
+  terminaux : la résolution s'arrête au premier zéro de l'une d'elles
+- norme_max : garde-fou, arrêt dès que la norme de y dépasse cette valeur
+  (ou devient nan/inf), voir evenements_EDO
+- t_eval : instants de sortie (liste), ou leur nombre n (n instants
+  régulièrement espacés sur [t0, t0 + T]) : seuls ces points sont calculés
+  par sortie dense, écrits et comparés à y_exact (voir dense_EDO)
+- nom : nom des fichiers de résultats (tache_00001... par défaut)
+
+Exemple (YAML) :
+    defaut: {methode: RK4, h: 0.01, T: 10}
+    taches:
+      - {f: "-y * np.sin(t)", y0: "np.exp(1)", y_exact: "np.exp(np.cos(t))"}
+      - {f: ["y[1]", "-y[0]"], y0: [1, 0], methode: [Euler, DOPRI5],
+         y_exact: "np.array([np.cos(t), -np.sin(t)])"}
+      - {f: "y * (1 - y)", y0: 0.01, T: 100, arret: "y - 0.9"}
+      - {f: ["y[1]", "-np.sin(y[0])"], y0: [1, 0], h: 0.001, T: 1000, t_eval: 500}
+
+Toutes les taches sont validées et compilées une fois dans le processus
+principal avant tout calcul ; une tache invalide est signalée sans bloquer
+les autres. Les taches valides sont réparties sur un pool de processus avec
+un délai maximal par tache. Chaque processus écrit lui-même la trajectoire
+dans le dossier de sortie (npz, npy ou parquet, voir export_EDO), de sorte
+que seules les statistiques remontent au processus principal. Le fichier
+rapport.json du dossier de sortie donne l'état de chaque tache (erreurs
+comprises, ainsi que la cause et l'instant d'un arrêt anticipé) ; le débit
+(taches/s, pas/s) est affiché à la fin.
+Usage : python lots_EDO.py taches.yaml --sortie resultats [--processus 4] [--delai 60] [--valider]
+"""
+
+import argparse
+import json
+import os
+import re
+import signal
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import contextmanager
+
+import numpy as np
+
+from compilateur_EDO import compiler_rhs, compiler_solution_exacte, erreur_solution_exacte, evaluer_constante
+from evenements_EDO import Evenement, Evenements
+from export_EDO import ecrire
+from methodes_num_EDO import methodes_num_EDO
+from Methodes_num_EDOS import Methodes_num_EDOS
+from precision_EDO import type_flottant
+from stats_EDO import StatsSolveur
+
+try:
+    import yaml
+except ImportError:
+    yaml = None
+
+METHODES = ('Euler', 'Trapèze', 'RK4', 'DOPRI5', 'AB3', 'Pred-Cor', 'BDF', 'Rosenbrock', 'Auto',
+            'Verlet', 'Yoshida4', 'Point-Milieu')
+FORMATS = ('npz', 'npy', 'parquet')
+
+
+class TacheInvalide(ValueError):
+    """Tache mal décrite dans le fichier de taches."""
+
+
+class DelaiDepasse(TimeoutError):
+    """Levée dans le calcul quand le délai de la tache est écoulé."""
+
+
+def lire_taches(chemin):
+    """Lit un fichier de taches JSON ou YAML et renvoie la liste des taches (dictionnaires)."""
+    with open(chemin, encoding='utf-8') as fichier:
+        if chemin.endswith(('.yaml', '.yml')):
+            if yaml is None:
+                raise ImportError("La lecture des fichiers YAML nécessite le paquet PyYAML.")
+            contenu = yaml.safe_load(fichier)
+        else:
+            contenu = json.load(fichier)
+    if isinstance(contenu, list):
+        return [dict(tache) for tache in contenu]
+    defaut = contenu.get('defaut', {})
+    return [{**defaut, **tache} for tache in contenu.get('taches', [])]
+
+
+def _valeur(v):
+    """Nombre, ou expression constante évaluée."""
+    return float(evaluer_constante(v) if isinstance(v, str) else v)
+
+
+def _nom_fichier(nom):
+    return re.sub(r'[^\w.-]', '_', str(nom))
+
+
+def preparer(tache, numero):
+    """
+    Valide une tache et compile ses expressions (les erreurs lèvent
+    TacheInvalide). Renvoie une liste de taches prêtes à être envoyées aux
+    processus, une par méthode.
+    """
+    try:
+        f, h, T = tache['f'], float(tache['h']), float(tache['T'])
+        y0 = tache['y0']
+    except KeyError as e:
+        raise TacheInvalide(f"Champ manquant : {e.args[0]}.") from None
+    except (TypeError, ValueError):
+        raise TacheInvalide("h et T doivent être des nombres.") from None
+    if h <= 0 or T <= 0:
+        raise TacheInvalide("h et T doivent être strictement positifs.")
+    methodes = tache.get('methode', 'RK4')
+    methodes = [methodes] if isinstance(methodes, str) else list(methodes)
+    inconnues = [m for m in methodes if m not in METHODES]
+    if inconnues:
+        raise TacheInvalide(f"Méthode inconnue : {', '.join(map(str, inconnues))}. "
+                            f"Choisissez parmi : {', '.join(METHODES)}.")
+
+    systeme = not isinstance(f, str)
+    try:
+        t0 = _valeur(tache.get('t0', 0.0))
+        y0 = [_valeur(v) for v in y0] if systeme else _valeur(y0)
+        if systeme and len(y0) != len(f):
+            raise TacheInvalide(f"y0 a {len(y0)} composantes pour un système de {len(f)} équations.")
+        # Compilation et évaluation en t0 : une erreur de nom ou de dimension est vue ici
+        fonction = compiler_rhs(list(f) if systeme else f)
+        fonction(t0, np.array(y0) if systeme else y0)
+        if tache.get('y_exact'):
+            compiler_solution_exacte(tache['y_exact'])(t0)
+        options = {k: float(tache[k]) for k in ('rtol', 'atol') if k in tache}
+        if 'dtype_calcul' in tache and not systeme:
+            raise TacheInvalide("dtype_calcul ne concerne que les systèmes (une EDO scalaire est calculée en float64).")
+        options.update({k: type_flottant(tache[k]).name for k in ('dtype', 'dtype_calcul') if k in tache})
+        arret = tache.get('arret') or []
+        arret = [arret] if isinstance(arret, str) else list(arret)
+        for g in arret:
+            if np.ndim(compiler_rhs(g)(t0, np.array(y0) if systeme else y0)):
+                raise TacheInvalide(f"L'expression d'arrêt {g} doit donner un scalaire.")
+        norme_max = None if tache.get('norme_max') is None else _valeur(tache['norme_max'])
+        if tache.get('t_eval') is not None:
+            t_fin = t0 + int(T / h) * h
+            t_eval = tache['t_eval']
+            if isinstance(t_eval, int) and not isinstance(t_eval, bool):
+                t_eval = np.linspace(t0, t_fin, t_eval).tolist()
+            else:
+                t_eval = [_valeur(v) for v in t_eval]
+            if np.any(np.diff(t_eval) < 0) or (t_eval and (t_eval[0] < t0 or t_eval[-1] > t_fin)):
+                raise TacheInvalide(f"t_eval doit être croissant et compris entre t0 et {t_fin:g}.")
+            if arret or norme_max is not None:
+                raise TacheInvalide("t_eval ne se combine pas avec arret et norme_max.")
+            options['t_eval'] = t_eval
+    except TacheInvalide:
+        raise
+    except Exception as e:
+        raise TacheInvalide(str(e)) from None
+
+    nom = _nom_fichier(tache.get('nom', f"tache_{numero:05d}"))
+    return [{
+        'nom': nom if len(methodes) == 1 else f"{nom}_{_nom_fichier(m)}",
+        'methode': m,
+        'f': list(f) if systeme else f,
+        'y0': y0,
+        't0': t0,
+        'h': h,
+        'N': int(T / h),
+        'y_exact': tache.get('y_exact'),
+        'arret': arret,
+        'norme_max': norme_max,
+        'options': options,
+    } for m in methodes]
+
+
+def _alarme(signum, frame):
+    raise DelaiDepasse()
+
+
+@contextmanager
+def _delai(secondes, stats):
+    """
+    Limite la durée du bloc : par SIGALRM quand c'est possible (le noyau généré
+    reste utilisable), sinon par le rappel de stats, vérifié à chaque pas.
+    Dans les deux cas, l'arrêt a lieu entre deux instructions Python : une
+    opération NumPy très longue (allocation d'une trajectoire géante) se
+    termine avant que le délai soit constaté.
+    """
+    if not secondes:
+        yield
+    elif hasattr(signal, 'setitimer') and threading.current_thread() is threading.main_thread():
+        ancien = signal.signal(signal.SIGALRM, _alarme)
+        signal.setitimer(signal.ITIMER_REAL, secondes)
+        try:
+            yield
+        finally:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+            signal.signal(signal.SIGALRM, ancien)
+    else:
+        limite = time.perf_counter() + secondes
+
+        def rappel(i, t, y):
+            if time.perf_counter() > limite:
+                raise DelaiDepasse()
+        stats.rappel = rappel
+        yield
+
+
+def executer_tache(tache, sortie, format='npz', delai=None):
+    """
+    Résout une tache préparée, écrit sa trajectoire dans le dossier sortie et
+    renvoie son compte rendu (sans la trajectoire).
+    """
+    compte_rendu = {'nom': tache['nom'], 'methode': tache['methode'], 'N': tache['N']}
+    stats = StatsSolveur()
+    evenements = None
+    if tache.get('arret') or tache.get('norme_max') is not None:
+        evenements = Evenements([Evenement(g, terminal=True) for g in tache.get('arret', [])],
+                                tache.get('norme_max'))
+    debut = time.perf_counter()
+    try:
+        with _delai(delai, stats):
+            if isinstance(tache['f'], str):
+                t, y = methodes_num_EDO(tache['methode'], tache['f'], tache['t0'], tache['y0'],
+                                        tache['h'], tache['N'], stats=stats, evenements=evenements,
+                                        **tache['options'])
+            else:
+                t, y = Methodes_num_EDOS(tache['methode'], tache['f'], tache['t0'], tache['y0'],
+                                         tache['h'], tache['N'], tampons=True, stats=stats,
+                                         evenements=evenements, **tache['options'])
+        duree = time.perf_counter() - debut
+        fichier = f"{tache['nom']}.{format}"
+        ecrire(os.path.join(sortie, fichier), t, y, format)
+    except DelaiDepasse:
+        compte_rendu.update(etat='délai dépassé', duree=time.perf_counter() - debut,
+                            erreur=f"Délai de {delai} s dépassé.")
+        return compte_rendu
+    except Exception as e:
+        compte_rendu.update(etat='échec', duree=time.perf_counter() - debut,
+                            erreur=f"{type(e).__name__} : {e}")
+        return compte_rendu
+
+    compte_rendu.update(etat='terminée', duree=duree, fichier=fichier, pas=stats.n_pas,
+                        nfev=stats.nfev, rejetes=stats.n_rejetes)
+    if evenements is not None and evenements.arret is not None:
+        compte_rendu.update(arret=evenements.arret, t_arret=float(evenements.t_arret))
+    if tache['y_exact']:
+        # preparer n'a évalué y_exact qu'en t0 : une expression qui échoue sur le
+        # tableau des instants ne retire que l'erreur de ce compte rendu
+        try:
+            compte_rendu['erreur_max'] = erreur_solution_exacte(tache['y_exact'], t, y)
+        except Exception as e:
+            compte_rendu['erreur'] = f"Solution exacte : {type(e).__name__} : {e}"
+    return compte_rendu
+
+
+def _executer_paquet(paquet, sortie, format, delai):
+    return [executer_tache(tache, sortie, format, delai) for tache in paquet]
+
+
+def executer_lot(taches, sortie, processus=None, delai=None, format='npz', afficher=print):
+    """
+    Résout des taches préparées sur `processus` processus (1 : dans le
+    processus courant) et renvoie la liste de leurs comptes rendus, dans l'ordre.
+    """
+    os.makedirs(sortie, exist_ok=True)
+    processus = processus or os.cpu_count() or 1
+    if processus == 1 or len(taches) <= 1:
+        comptes_rendus = _executer_paquet(taches, sortie, format, delai)
+    else:
+        # Les taches sont envoyées par paquets pour amortir les échanges entre processus
+        taille = max(1, min(64, len(taches) // (4 * processus)))
+        paquets = [taches[i:i + taille] for i in range(0, len(taches), taille)]
+        comptes_rendus = []
+        with ProcessPoolExecutor(max_workers=processus) as pool:
+            futurs = [pool.submit(_executer_paquet, paquet, sortie, format, delai) for paquet in paquets]
+            for paquet, futur in zip(paquets, futurs):
+                try:
+                    comptes_rendus += futur.result()
+                except Exception as e:
+                    # Processus tué (mémoire, signal) : les taches du paquet et des suivants sont
+                    # perdues ; toute autre exception ne fait perdre que le paquet
+                    erreur = ("Processus interrompu." if isinstance(e, BrokenProcessPool)
+                              else f"{type(e).__name__} : {e}")
+                    comptes_rendus += [{'nom': tache['nom'], 'methode': tache['methode'], 'N': tache['N'],
+                                        'etat': 'échec', 'erreur': erreur} for tache in paquet]
+    for cr in comptes_rendus:
+        if 'erreur' in cr:
+            afficher(f"{cr['nom']} ({cr['methode']}) : {cr['etat']} — {cr['erreur']}")
+    return comptes_rendus
+
+
+def rapport(comptes_rendus, invalides, duree, processus):
+    """Résumé du lot : nombre de taches par état et débit."""
+    terminees = [cr for cr in comptes_rendus if cr['etat'] == 'terminée']
+    pas = sum(cr['pas'] for cr in terminees)
+    temps_solveurs = sum(cr['duree'] for cr in terminees)
+    etats = {}
+    for cr in comptes_rendus:
+        etats[cr['etat']] = etats.get(cr['etat'], 0) + 1
+    return {
+        'taches': len(comptes_rendus),
+        'etats': etats,
+        'invalides': len(invalides),
+        'duree': duree,
+        'processus': processus,
+        'taches_par_seconde': len(comptes_rendus) / duree if duree > 0 else float('nan'),
+        'pas_par_seconde': pas / duree if duree > 0 else float('nan'),
+        # Débit d'un processus, hors échanges et écriture des résultats
+        'pas_par_seconde_solveur': pas / temps_solveurs if temps_solveurs > 0 else float('nan'),
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('taches', help="fichier de taches JSON ou YAML")
+    parser.add_argument('--sortie', default='resultats_EDO', help="dossier des résultats")
+    parser.add_argument('--processus', type=int, default=None, help="nombre de processus (1 : séquentiel)")
+    parser.add_argument('--delai', type=float, default=None, help="durée maximale d'une tache (s)")
+    parser.add_argument('--format', default='npz', choices=FORMATS)
+    parser.add_argument('--valider', action='store_true', help="valide et compile les taches sans les résoudre")
+    args = parser.parse_args()
+
+    debut = time.perf_counter()
+    preparees, invalides = [], []
+    for numero, tache in enumerate(lire_taches(args.taches), 1):
+        try:
+            preparees += preparer(tache, numero)
+        except TacheInvalide as e:
+            invalides.append({'numero': numero, 'nom': tache.get('nom'), 'etat': 'invalide', 'erreur': str(e)})
+            print(f"Tache {numero} invalide : {e}")
+    noms = [tache['nom'] for tache in preparees]
+    if len(set(noms)) != len(noms):
+        print("Noms de taches en double : leurs fichiers de résultats s'écraseraient.")
+        sys.exit(1)
+    print(f"{len(preparees)} taches valides, {len(invalides)} invalides "
+          f"(validation : {time.perf_counter() - debut:.2f} s)")
+    if args.valider:
+        sys.exit(1 if invalides else 0)
+
+    processus = args.processus or os.cpu_count() or 1
+    debut = time.perf_counter()
+    comptes_rendus = executer_lot(preparees, args.sortie, processus, args.delai, args.format)
+    resume = rapport(comptes_rendus, invalides, time.perf_counter() - debut, processus)
+
+    with open(os.path.join(args.sortie, 'rapport.json'), 'w', encoding='utf-8') as fichier:
+        json.dump({'resume': resume, 'taches': comptes_rendus, 'invalides': invalides},
+                  fichier, indent=1, ensure_ascii=False)
+    etats = ", ".join(f"{n} {etat}" for etat, n in resume['etats'].items())
+    print(f"{resume['taches']} taches en {resume['duree']:.2f} s ({etats}) sur {processus} processus")
+    print(f"Débit : {resume['taches_par_seconde']:,.1f} taches/s, {resume['pas_par_seconde']:,.0f} pas/s "
+          f"(solveurs : {resume['pas_par_seconde_solveur']:,.0f} pas/s par processus)")
+    sys.exit(0 if resume['etats'].get('terminée', 0) == resume['taches'] and not invalides else 1)
@@ -6,87 +6,278 @@ Ceci est un script temporaire.
 
 """
 
+import time
+from array import array
 import numpy as np
-from scipy.optimize import fsolve
+from compilateur_EDO import compiler_rhs, version_math
+from newton_EDO import NewtonSimplifie
+from adaptatif_EDO import dormand_prince
+from raide_EDO import auto, bdf, rosenbrock
+from stats_EDO import suivre
+from noyaux_EDO import resoudre_par_noyau
+from precision_EDO import type_flottant
+from evenements_EDO import resoudre_avec_evenements
+from dense_EDO import echantillonner, echantillonner_par_noyau
 
-def methodes_num_EDO(methode, f, t0, y0, h, N):
+def methodes_num_EDO(methode, f, t0, y0, h, N, jac=None, rtol=1e-6, atol=1e-9, stats=None, noyau=True,
+                     dtype=None, evenements=None, t_eval=None):
     """
     Fonction principale pour résoudre des EDOs avec différentes méthodes numériques.
-    - methode : spécifie la méthode ('Euler', 'Trapèze', 'RK4', 'AB3', 'Pred-Cor')
-    - f : fonction f(t, y)
+    - methode : spécifie la méthode ('Euler', 'Trapèze', 'RK4', 'DOPRI5', 'AB3', 'Pred-Cor',
+                'BDF', 'Rosenbrock', 'Auto')
+    - f : fonction f(t, y) ou expression (compilée une seule fois, voir compilateur_EDO)
     - t0, y0 : conditions initiales
     - h : pas de temps
     - N : nombre d'itérations
+    - jac : dérivée optionnelle df/dy(t, y) pour les méthodes implicites (Trapèze, BDF, Rosenbrock, Auto)
+    - rtol, atol : tolérances des méthodes adaptatives DOPRI5, BDF, Rosenbrock et Auto
+                   (h est alors le pas initial)
+    - stats : StatsSolveur optionnel rempli pendant la résolution (voir stats_EDO)
+    - noyau : si f est une expression, utilise le noyau généré qui fusionne la
+              boucle de la méthode et f (voir noyaux_EDO) quand il existe
+    - dtype : type des points stockés, 'float64' (défaut) ou 'float32' ; le
+              calcul se fait toujours en float64 (voir precision_EDO)
+    - evenements : Evenements optionnel (zéros de fonctions g(t, y), arrêt
+                   anticipé, garde-fous), rempli pendant la résolution ; la
+                   trajectoire est tronquée en cas d'arrêt (voir evenements_EDO)
+    - t_eval : instants croissants de [t0, t0 + N h] ; seuls ces points sont
+               stockés et renvoyés, calculés par la sortie dense de la
+               méthode (voir dense_EDO). Ne se combine pas avec evenements
     """
+    f = compiler_rhs(f)
+    dtype = type_flottant(dtype)
+    if t_eval is not None and evenements is not None:
+        raise ValueError("t_eval et evenements ne peuvent pas être utilisés ensemble.")
+    if noyau and evenements is None:
+        solution = (resoudre_par_noyau(methode, f, t0, y0, h, N, stats, dtype) if t_eval is None else
+                    echantillonner_par_noyau(methode, f, t0, y0, h, N, t_eval, stats, dtype))
+        if solution is not None:
+            return solution
+    # Les boucles travaillent sur des flottants Python ; une expression est compilée
+    # avec `math` plutôt que `np`, bien plus rapide sur des scalaires
+    f_math = version_math(f)
+    if f_math is None:
+        return _lancer(f, methode, t0, y0, h, N, jac, rtol, atol, stats, dtype, evenements, t_eval)
+    try:
+        return _lancer(f_math, methode, t0, y0, h, N, jac, rtol, atol, stats, dtype, evenements, t_eval)
+    except (ArithmeticError, ValueError, TypeError) as e:
+        if not _echec_math(e, f_math):
+            raise
+        # Les flottants Python et math sont plus stricts que NumPy (log d'un négatif,
+        # débordement de y ** 2, puissance fractionnaire d'un négatif qui donne un
+        # complexe) : on reprend avec f évaluée sur des np.float64, qui produit nan
+        # ou inf au lieu d'une exception
+        if stats is not None:
+            stats.reinitialiser()
+    return _lancer(_arguments_numpy(f), methode, t0, y0, h, N, jac, rtol, atol, stats, dtype, evenements, t_eval)
+
+
+def _echec_math(e, f_math):
+    """
+    Vrai si l'exception e est levée par f_math elle-même (domaine de `math`,
+    débordement, division par zéro) ou vient d'un complexe qu'elle a renvoyé
+    (rejeté par le tampon ou par float()) : les autres erreurs ne sont pas
+    reprises avec NumPy.
+    """
+    tb = e.__traceback__
+    while tb.tb_next is not None:
+        tb = tb.tb_next
+    return tb.tb_frame.f_code is f_math.__code__ or (isinstance(e, TypeError) and 'complex' in str(e))
+
+
+def _arguments_numpy(f):
+    def g(t, y):
+        return f(np.float64(t), np.float64(y))
+    g.source = getattr(f, 'source', None)
+    return g
+
+
+def _lancer(f, methode, t0, y0, h, N, jac, rtol, atol, stats, dtype, evenements=None, t_eval=None):
+    if t_eval is not None:
+        return echantillonner(methode, f, t0, y0, h, N, t_eval, jac, rtol, atol, stats, dtype)
+    arguments = (f, methode, t0, y0, h, N, jac, rtol, atol, dtype)
+    if evenements is not None:
+        return resoudre_avec_evenements(evenements, stats, methode, _resoudre, arguments)
+    if stats is not None:
+        return suivre(stats, methode, _resoudre, *arguments)
+    return _resoudre(*arguments)
+
+
+def _resoudre(f, methode, t0, y0, h, N, jac, rtol, atol, dtype=np.float64, stats=None):
     if methode == 'Euler':
-        return euler_explicite(f, t0, y0, h, N)
+        return euler_explicite(f, t0, y0, h, N, stats=stats, dtype=dtype)
     elif methode == 'Trapèze':
-        return trapeze_implicite(f, t0, y0, h, N)
+        return trapeze_implicite(f, t0, y0, h, N, jac, stats=stats, dtype=dtype)
     elif methode == 'RK4':
-        return rungekutta_4(f, t0, y0, h, N)
+        return rungekutta_4(f, t0, y0, h, N, stats=stats, dtype=dtype)
+    elif methode == 'DOPRI5':
+        return dormand_prince(f, t0, y0, h, N, rtol, atol, stats=stats, dtype=dtype)
     elif methode == 'AB3':
-        return AB_3(f, t0, y0, h, N)
+        return AB_3(f, t0, y0, h, N, stats=stats, dtype=dtype)
     elif methode == 'Pred-Cor':
-        return predcor_4(f, t0, y0, h, N)
+        return predcor_4(f, t0, y0, h, N, stats=stats, dtype=dtype)
+    elif methode == 'BDF':
+        return bdf(f, t0, y0, h, N, rtol, atol, jac, stats=stats, dtype=dtype)
+    elif methode == 'Rosenbrock':
+        return rosenbrock(f, t0, y0, h, N, rtol, atol, jac, stats=stats, dtype=dtype)
+    elif methode == 'Auto':
+        return auto(f, t0, y0, h, N, rtol, atol, jac, stats=stats, dtype=dtype)
     else:
-        raise ValueError("Méthode inconnue. Choisissez parmi : Euler, Trapèze, RK4, AB3, Pred-Cor.")
+        raise ValueError("Méthode inconnue. Choisissez parmi : Euler, Trapèze, RK4, DOPRI5, AB3, Pred-Cor, "
+                         "BDF, Rosenbrock, Auto.")
+
+# Les boucles travaillent sur des flottants Python : lire y[i] ou t[i] dans un
+# tableau NumPy crée un objet np.float64 à chaque accès, plusieurs fois plus lent
+# que l'arithmétique sur des float. La trajectoire est remplie dans un tampon
+# array('d') préalloué, vu comme un tableau NumPy à la fin (sans copie) ; en
+# array('f') si la trajectoire est stockée en float32, le calcul restant en float.
+
+def _tampon(y0, N, dtype):
+    return array(np.dtype(dtype).char, [y0]) * (N + 1)
 
 # Méthode d'Euler explicite
-def euler_explicite(f, t0, y0, h, N):
+def euler_explicite(f, t0, y0, h, N, stats=None, dtype=np.float64):
     t = np.linspace(t0, t0 + N * h, N + 1)
-    y = np.zeros(N + 1)
-    y[0] = y0
+    tl = t.tolist()
+    y = _tampon(y0, N, dtype)
+    rappel = getattr(stats, 'rappel', None)
+    yi = float(y0)
     for i in range(N):
-        y[i + 1] = y[i] + h * f(t[i], y[i])
-    return t, y
+        yi = y[i + 1] = yi + h * f(tl[i], yi)
+        if rappel is not None and rappel(i + 1, tl[i + 1], yi):
+            t, y = t[:i + 2], y[:i + 2]
+            break
+    return t, np.frombuffer(y, dtype=y.typecode)
 
 # Méthode du trapèze implicite
-def trapeze_implicite(f, t0, y0, h, N):
+# Chaque pas résout y[i+1] = y[i] + h/2 * (f(t[i], y[i]) + f(t[i+1], y[i+1])) par
+# Newton simplifié (voir newton_EDO), en partant de y[i] et en réutilisant le
+# jacobien factorisé d'un pas à l'autre. f(t[i], y[i]) n'est évalué qu'une fois.
+def trapeze_implicite(f, t0, y0, h, N, jac=None, stats=None, dtype=np.float64):
     t = np.linspace(t0, t0 + N * h, N + 1)
-    y = np.zeros(N + 1)
-    y[0] = y0
-
-    def g(yi, ti, yi_prev):
-        return yi - yi_prev - 0.5 * h * (f(ti, yi_prev) + f(ti + h, yi))
-    
+    tl = t.tolist()
+    y = _tampon(y0, N, dtype)
+    rappel = getattr(stats, 'rappel', None)
+    newton = NewtonSimplifie(f, jac)
+    yi = float(y0)
+    fi = f(tl[0], yi)
     for i in range(N):
-        y[i + 1] = fsolve(g, y[i], args=(t[i], y[i]))
-    return t, y
+        yi = y[i + 1] = newton.resoudre(tl[i + 1], yi + 0.5 * h * fi, 0.5 * h, yi)
+        fi = f(tl[i + 1], yi)
+        if rappel is not None and rappel(i + 1, tl[i + 1], yi):
+            t, y = t[:i + 2], y[:i + 2]
+            break
+    if stats is not None:
+        stats.ajouter_newton(newton)
+    return t, np.frombuffer(y, dtype=y.typecode)
 
 # Méthode de Runge-Kutta d'ordre 4
-def rungekutta_4(f, t0, y0, h, N):
+def rungekutta_4(f, t0, y0, h, N, stats=None, dtype=np.float64):
     t = np.linspace(t0, t0 + N * h, N + 1)
-    y = np.zeros(N + 1)
-    y[0] = y0
+    tl = t.tolist()
+    y = _tampon(y0, N, dtype)
+    rappel = getattr(stats, 'rappel', None)
+    yi = float(y0)
     for i in range(N):
-        k1 = f(t[i], y[i])
-        k2 = f(t[i] + h / 2, y[i] + h * k1 / 2)
-        k3 = f(t[i] + h / 2, y[i] + h * k2 / 2)
-        k4 = f(t[i] + h, y[i] + h * k3)
-        y[i + 1] = y[i] + (h / 6) * (k1 + 2 * k2 + 2 * k3 + k4)
-    return t, y
+        ti = tl[i]
+        k1 = f(ti, yi)
+        k2 = f(ti + h / 2, yi + h * k1 / 2)
+        k3 = f(ti + h / 2, yi + h * k2 / 2)
+        k4 = f(ti + h, yi + h * k3)
+        yi = y[i + 1] = yi + (h / 6) * (k1 + 2 * k2 + 2 * k3 + k4)
+        if rappel is not None and rappel(i + 1, tl[i + 1], yi):
+            t, y = t[:i + 2], y[:i + 2]
+            break
+    return t, np.frombuffer(y, dtype=y.typecode)
+
+# Démarrage des méthodes multipas : n pas de RK4 en flottants Python (même si
+# la trajectoire est stockée en float32). L'étape k1 de chaque pas est
+# f(t[j], y[j]) : ces dérivées sont renvoyées pour amorcer l'historique.
+def _demarrage_rk4(f, tl, y0, h, n, rappel=None):
+    y_temp, derivees = [float(y0)], []
+    for i in range(n):
+        ti, yi = tl[i], y_temp[i]
+        k1 = f(ti, yi)
+        k2 = f(ti + h / 2, yi + h * k1 / 2)
+        k3 = f(ti + h / 2, yi + h * k2 / 2)
+        k4 = f(ti + h, yi + h * k3)
+        y_temp.append(yi + (h / 6) * (k1 + 2 * k2 + 2 * k3 + k4))
+        derivees.append(k1)
+        if rappel is not None and rappel(i + 1, tl[i + 1], y_temp[-1]):
+            break
+    return y_temp, derivees
+
+# Compteur d'appels au second membre
+def _compter_appels(f):
+    def g(t, y):
+        g.n += 1
+        return f(t, y)
+    g.n = 0
+    return g
 
 # Méthode d'Adams-Bashforth d'ordre 3
-def AB_3(f, t0, y0, h, N):
+# Les dérivées des trois derniers points sont conservées dans des variables locales
+# décalées à chaque pas (f_i, f_i1 = f(t[i-1], y[i-1]), f_i2) : un seul appel à f par pas.
+def AB_3(f, t0, y0, h, N, compter=False, stats=None, dtype=np.float64):
+    if compter:
+        f = _compter_appels(f)
     t = np.linspace(t0, t0 + N * h, N + 1)
-    y = np.zeros(N + 1)
-    y[0] = y0
-    if N >= 2:
-        _, y_temp = rungekutta_4(f, t0, y0, h, 2)
-        y[1:3] = y_temp[1:3]
+    tl = t.tolist()
+    y = _tampon(y0, N, dtype)
+    rappel = getattr(stats, 'rappel', None)
+    if N >= 1:
+        debut = time.perf_counter()
+        y_temp, derivees = _demarrage_rk4(f, tl, y0, h, min(N, 2), rappel)
+        y[1:len(y_temp)] = array(y.typecode, y_temp[1:])
+        if len(y_temp) <= min(N, 2):
+            # Arrêt demandé par le rappel pendant le démarrage
+            N = len(y_temp) - 1
+            t, y = t[:N + 1], y[:N + 1]
+        if stats is not None:
+            stats.phases['demarrage'] = time.perf_counter() - debut
+    if N > 2:
+        f_i2, f_i1 = derivees
+        yi = y_temp[2]
     for i in range(2, N):
-        y[i + 1] = y[i] + h * (23 * f(t[i], y[i]) - 16 * f(t[i - 1], y[i - 1]) + 5 * f(t[i - 2], y[i - 2])) / 12
-    return t, y
+        f_i = f(tl[i], yi)
+        yi = y[i + 1] = yi + h * (23 * f_i - 16 * f_i1 + 5 * f_i2) / 12
+        f_i2, f_i1 = f_i1, f_i
+        if rappel is not None and rappel(i + 1, tl[i + 1], yi):
+            t, y = t[:i + 2], y[:i + 2]
+            break
+    y = np.frombuffer(y, dtype=y.typecode)
+    return (t, y, f.n) if compter else (t, y)
 
 # Méthode Prédicteur-Correcteur d'ordre 4
-def predcor_4(f, t0, y0, h, N):
+# Même principe avec quatre dérivées : deux appels à f par pas (point courant
+# et prédiction).
+def predcor_4(f, t0, y0, h, N, compter=False, stats=None, dtype=np.float64):
+    if compter:
+        f = _compter_appels(f)
     t = np.linspace(t0, t0 + N * h, N + 1)
-    y = np.zeros(N + 1)
-    y[0] = y0
-    if N >= 3:
-        _, y_temp = rungekutta_4(f, t0, y0, h, 3)
-        y[1:4] = y_temp[1:4]
+    tl = t.tolist()
+    y = _tampon(y0, N, dtype)
+    rappel = getattr(stats, 'rappel', None)
+    if N >= 1:
+        debut = time.perf_counter()
+        y_temp, derivees = _demarrage_rk4(f, tl, y0, h, min(N, 3), rappel)
+        y[1:len(y_temp)] = array(y.typecode, y_temp[1:])
+        if len(y_temp) <= min(N, 3):
+            # Arrêt demandé par le rappel pendant le démarrage
+            N = len(y_temp) - 1
+            t, y = t[:N + 1], y[:N + 1]
+        if stats is not None:
+            stats.phases['demarrage'] = time.perf_counter() - debut
+    if N > 3:
+        f_i3, f_i2, f_i1 = derivees
+        yi = y_temp[3]
     for i in range(3, N):
-        y_pred = y[i] + h * (55 * f(t[i], y[i]) - 59 * f(t[i - 1], y[i - 1]) + 37 * f(t[i - 2], y[i - 2]) - 9 * f(t[i - 3], y[i - 3])) / 24
-        y[i + 1] = y[i] + h * (9 * f(t[i + 1], y_pred) + 19 * f(t[i], y[i]) - 5 * f(t[i - 1], y[i - 1]) + f(t[i - 2], y[i - 2])) / 24
-    return t, y
+        f_i = f(tl[i], yi)
+        y_pred = yi + h * (55 * f_i - 59 * f_i1 + 37 * f_i2 - 9 * f_i3) / 24
+        yi = y[i + 1] = yi + h * (9 * f(tl[i + 1], y_pred) + 19 * f_i - 5 * f_i1 + f_i2) / 24
+        f_i3, f_i2, f_i1 = f_i2, f_i1, f_i
+        if rappel is not None and rappel(i + 1, tl[i + 1], yi):
+            t, y = t[:i + 2], y[:i + 2]
+            break
+    y = np.frombuffer(y, dtype=y.typecode)
+    return (t, y, f.n) if compter else (t, y)
@@ -0,0 +1,224 @@
+# -*- coding: utf-8 -*-
+"""
+Moteur de pas implicite : Newton simplifié avec réutilisation du jacobien.
+
+Les méthodes implicites (trapèze, ...) résolvent à chaque pas une équation
+    z = c + gamma * f(t, z)
+Au lieu d'appeler `fsolve` à chaque pas (jacobien reconstruit à chaque fois),
+on garde une factorisation LU de (I - gamma * J) d'un pas à l'autre et on ne
+la recalcule que lorsque la convergence ralentit.
+
+Un état 2-D de forme (dim, n) est traité comme un ensemble de n problèmes
+indépendants : le jacobien est alors un lot de n blocs (dim, dim).
+scipy.linalg n'est importé qu'à la première factorisation d'un système, de
+sorte que les interfaces ne le chargent que si une méthode implicite sert.
+
+Pour les grands systèmes creux (voir creux_EDO), le jacobien est une matrice
+creuse estimée par groupes de colonnes et I - gamma * J est factorisée par
+LU bande ou LU creuse.
+"""
+
+import warnings
+
+import numpy as np
+
+from creux_EDO import JacobienCreux, factoriser, jacobien_automatique
+
+
+class NewtonSimplifie:
+    """
+    Résolution de z - c - gamma * f(t, z) = 0 par Newton simplifié.
+    - f : fonction f(t, y)
+    - jac : jacobien optionnel jac(t, y) (matrice dense ou creuse scipy,
+            scalaire pour une EDO, ou tableau (dim, dim, n) pour un ensemble),
+            ou JacobienCreux (motif creux, différences finies par groupes de
+            colonnes) ; à défaut il est estimé par différences finies, en
+            exploitant le motif d'un grand système compilé s'il est creux
+    - tol : tolérance sur la correction relative de Newton
+    - iter_max : nombre maximal d'itérations par tentative
+    - taux_max : taux de contraction au-delà duquel le jacobien est recalculé
+    """
+
+    def __init__(self, f, jac=None, tol=1e-10, iter_max=10, taux_max=0.5):
+        self.f = f
+        self.creux = jac if isinstance(jac, JacobienCreux) else None
+        self.jac = None if self.creux is not None else jac
+        self._motif_cherche = self.creux is not None
+        self.tol = tol
+        self.iter_max = iter_max
+        self.taux_max = taux_max
+        self.J = None
+        self.lu = None
+        self._solveur = None  # r -> (I - gamma * J)^-1 r, fixé par _factoriser
+        self.gamma = None
+        self.frais = False
+        # Statistiques
+        self.n_iter = 0
+        self.n_jac = 0
+        self.n_lu = 0
+
+    def _eval(self, t, z):
+        if isinstance(z, float):
+            return float(self.f(t, z))
+        return np.asarray(self.f(t, z), dtype=float)
+
+    def _jacobien(self, t, z):
+        self.n_jac += 1
+        if self.jac is not None:
+            J = self.jac(t, z)
+            if hasattr(J, 'tocsc'):
+                return J.tocsc()  # matrice creuse scipy
+            J = np.asarray(J, dtype=float)
+            if isinstance(z, float):
+                return J
+            return np.moveaxis(J, -1, 0) if z.ndim == 2 else np.atleast_2d(J)
+        fz = self._eval(t, z)
+        if isinstance(z, float):
+            d = np.sqrt(np.finfo(float).eps) * max(1.0, abs(z))
+            return (self._eval(t, z + d) - fz) / d
+        if z.ndim == 1:
+            if not self._motif_cherche:
+                self.creux = jacobien_automatique(self.f, z.size)
+                self._motif_cherche = True
+            if self.creux is not None:
+                return self.creux.evaluer(self.f, t, z, fz)
+        if z.ndim == 2:
+            # Ensemble : la composante j est perturbée pour tous les membres à la fois
+            dim, n = z.shape
+            J = np.empty((n, dim, dim))
+            zp = z.copy()
+            for j in range(dim):
+                d = np.sqrt(np.finfo(float).eps) * np.maximum(1.0, np.abs(z[j]))
+                zp[j] = z[j] + d
+                J[:, :, j] = ((self._eval(t, zp) - fz) / d).T
+                zp[j] = z[j]
+            return J
+        J = np.empty((z.size, z.size))
+        zp = z.copy()
+        for j in range(z.size):
+            d = np.sqrt(np.finfo(float).eps) * max(1.0, abs(z[j]))
+            zp[j] = z[j] + d
+            J[:, j] = (self._eval(t, zp) - fz) / d
+            zp[j] = z[j]
+        return J
+
+    def _factoriser(self, gamma):
+        self.n_lu += 1
+        self.gamma = gamma
+        if hasattr(self.J, 'tocsc'):
+            # Jacobien creux : LU bande ou LU creuse, selon le motif
+            self.lu = self._solveur = factoriser(self.J, gamma,
+                                                 self.creux.solveur if self.creux is not None else 'auto')
+            return
+        if np.ndim(self.J) == 0:
+            # EDO scalaire : la « factorisation » se réduit à 1 - gamma * J
+            self.lu = lu = 1.0 - gamma * float(self.J)
+            self._solveur = lambda r: r / lu
+            return
+        if self.J.ndim == 3:
+            # Ensemble : inverses des n petits blocs, appliquées en une opération
+            self.lu = inverses = np.linalg.inv(np.eye(self.J.shape[1]) - gamma * self.J)
+            self._solveur = lambda r: np.einsum('mij,jm->im', inverses, r)
+            return
+        from scipy.linalg import get_lapack_funcs, lu_factor
+        lu, piv = lu_factor(np.eye(len(self.J)) - gamma * self.J, check_finite=False)
+        self.lu = lu
+        # Appel LAPACK direct : lu_solve ajoute des vérifications coûteuses à chaque itération
+        getrs, = get_lapack_funcs(('getrs',), (lu,))
+        self._solveur = lambda r: getrs(lu, piv, r)[0]
+
+    def _resoudre_lineaire(self, r):
+        return self._solveur(r)
+
+    def actualiser(self, t, z, gamma):
+        """
+        Recalcule le jacobien en (t, z) et factorise I - gamma * J (pour les
+        méthodes qui conduisent elles-mêmes leurs itérations, voir raide_EDO).
+        """
+        z = float(z) if np.ndim(z) == 0 else np.asarray(z, dtype=float)
+        self.J = self._jacobien(t, z)
+        self._factoriser(gamma)
+        self.frais = True
+
+    def resoudre_lineaire(self, r, gamma):
+        """
+        Renvoie x tel que (I - gamma * J) x = r avec le jacobien courant,
+        refactorisé seulement si gamma a changé.
+        """
+        if gamma != self.gamma:
+            self._factoriser(gamma)
+        return self._resoudre_lineaire(r)
+
+    def resoudre(self, t, c, gamma, z0):
+        """
+        Renvoie z tel que z = c + gamma * f(t, z), en partant de z0
+        (en général la solution du pas précédent).
+        """
+        # EDO scalaire : boucle dédiée sur des flottants Python
+        if isinstance(z0, float) or np.ndim(z0) == 0:
+            return self._resoudre_flottant(t, float(c), gamma, float(z0))
+        z0 = np.asarray(z0, dtype=float)
+        if self.J is None:
+            self.J = self._jacobien(t, z0)
+            self._factoriser(gamma)
+            self.frais = True
+        elif gamma != self.gamma:
+            self._factoriser(gamma)
+
+        while True:
+            z = z0
+            norme_prec = None
+            for _ in range(self.iter_max):
+                self.n_iter += 1
+                dz = self._resoudre_lineaire(c + gamma * self._eval(t, z) - z)
+                z = z + dz
+                norme = (np.abs(dz) / (1.0 + np.abs(z))).max()
+                if norme <= self.tol:
+                    self.frais = False
+                    return z
+                # Convergence trop lente : le jacobien est probablement périmé
+                if not self.frais and norme_prec is not None and norme > self.taux_max * norme_prec:
+                    break
+                norme_prec = norme
+            if self.frais:
+                warnings.warn(f"Newton n'a pas convergé à t = {t:g}.", RuntimeWarning)
+                return z
+            self.J = self._jacobien(t, z0)
+            self._factoriser(gamma)
+            self.frais = True
+
+    def _resoudre_flottant(self, t, c, gamma, z0):
+        """
+        Même algorithme que resoudre pour une EDO scalaire, sur des flottants
+        Python : ni conversion ni test de type à chaque itération.
+        """
+        f, tol, taux_max = self.f, self.tol, self.taux_max
+        if self.J is None:
+            self.J = self._jacobien(t, z0)
+            self._factoriser(gamma)
+            self.frais = True
+        elif gamma != self.gamma:
+            self._factoriser(gamma)
+
+        while True:
+            z = z0
+            lu = self.lu
+            norme_prec = None
+            for n in range(1, self.iter_max + 1):
+                dz = (c + gamma * f(t, z) - z) / lu
+                z += dz
+                norme = abs(dz) / (1.0 + abs(z))
+                if norme <= tol:
+                    self.n_iter += n
+                    self.frais = False
+                    return z
+                if not self.frais and norme_prec is not None and norme > taux_max * norme_prec:
+                    break
+                norme_prec = norme
+            self.n_iter += n
+            if self.frais:
+                warnings.warn(f"Newton n'a pas convergé à t = {t:g}.", RuntimeWarning)
+                return z
+            self.J = self._jacobien(t, z0)
+            self._factoriser(gamma)
+            self.frais = True
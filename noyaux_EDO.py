@@ -0,0 +1,364 @@
+# -*- coding: utf-8 -*-
+"""
+Noyaux générés : la boucle de l'intégrateur et le second membre fusionnés.
+
+Quand f est donnée sous forme d'expressions (saisies dans les interfaces), on
+peut écrire le source d'une fonction qui contient à la fois la boucle d'une
+méthode à pas fixe et le calcul de f, recopié en ligne à chaque étape : plus
+d'appel de fonction, plus de tuple ni de vecteur intermédiaire par pas.
+
+Deux formes de code sont produites :
+- 'flottants' : chaque composante de y est une variable locale float et les
+  fonctions `np.*` sont remplacées par `math.*` (EDO scalaire, ou système de
+  petite dimension dont les équations n'accèdent à y que par y[0], y[1], ...)
+- 'numpy' : pour les autres systèmes, l'état est un vecteur et chaque
+  composante de la dérivée est écrite directement dans un tableau
+
+Les noyaux sont mis en cache par (méthode, expressions, dimension) ; le
+cache, les sources générés et les raisons d'échec sont consultables
+(noyaux_en_cache, source_noyau, echecs_noyaux). Si la génération échoue, ou
+si `math` lève une exception là où NumPy renverrait nan ou inf, les
+solveurs reprennent le chemin générique.
+
+Méthodes concernées : Euler, RK4, AB3, Pred-Cor (Trapèze et DOPRI5 gardent
+leur implémentation générique : Newton et contrôle du pas).
+Les noyaux calculent en float64 ; la trajectoire est stockée dans le type
+demandé (code 'd' ou 'f' passé au noyau, voir precision_EDO).
+"""
+
+import ast
+import threading
+import time
+from array import array
+
+import numpy as np
+
+from compilateur_EDO import ExpressionInvalide, _espace_de_noms, normaliser, vers_math
+
+# Au-delà, un système n'est pas déroulé en variables locales (source trop long)
+DIM_MAX_DEROULE = 32
+
+# Appels au second membre pour N pas (les dérivées calculées au démarrage
+# des méthodes multipas sont réutilisées, sans appel supplémentaire)
+APPELS = {
+    'Euler': lambda N: N,
+    'RK4': lambda N: 4 * N,
+    'AB3': lambda N: 4 * min(N, 2) + max(N - 2, 0),
+    'Pred-Cor': lambda N: 4 * min(N, 3) + 2 * max(N - 3, 0),
+}
+
+# Méthodes à un pas : un noyau relancé depuis le dernier point d'un bloc
+# poursuit la même trajectoire (les méthodes multipas redémarreraient)
+METHODES_UN_PAS = ('Euler', 'RK4')
+
+_noyaux = {}   # (méthode, expressions, dim) -> fonction générée, ou None
+_echecs = {}   # (méthode, expressions, dim) -> raison de l'échec
+_verrou = threading.Lock()
+
+
+class _NonDeroulable(Exception):
+    """y est utilisé autrement que par des indices constants."""
+
+
+class _Gabarit(ast.NodeTransformer):
+    """
+    Remplace t et y par des champs `{t}` et `{y}` à compléter par str.format.
+    Si `dim` est donné, y[k] (k constant) devient `{y}_k` : une variable par composante.
+    """
+
+    def __init__(self, dim=None):
+        self.dim = dim
+
+    def visit_Name(self, noeud):
+        if noeud.id == 't':
+            return ast.Name('{t}', ast.Load())
+        if noeud.id == 'y':
+            if self.dim is not None:
+                raise _NonDeroulable
+            return ast.Name('{y}', ast.Load())
+        return noeud
+
+    def visit_Subscript(self, noeud):
+        indice = noeud.slice
+        if (self.dim is not None and isinstance(noeud.value, ast.Name) and noeud.value.id == 'y'
+                and isinstance(indice, ast.Constant) and type(indice.value) is int
+                and 0 <= indice.value < self.dim):
+            return ast.Name(f'{{y}}_{indice.value}', ast.Load())
+        return self.generic_visit(noeud)
+
+
+class _Generateur:
+    """
+    Écrit les lignes du noyau. Les lignes « vectorielles » utilisent `{j}` :
+    recopiées par composante en mode 'flottants', écrites une fois sur des
+    tableaux en mode 'numpy'.
+    """
+
+    def __init__(self, modeles, mode, dim):
+        self.modeles = modeles  # une expression-gabarit par composante
+        self.mode = mode
+        self.dim = dim          # None pour une EDO scalaire
+
+    def vec(self, *modeles):
+        if self.mode == 'numpy' or self.dim is None:
+            return [m.format(j='') for m in modeles]
+        return [m.format(j=f'_{j}') for j in range(self.dim) for m in modeles]
+
+    def rhs(self, k, t, y):
+        if not t.isidentifier():
+            t = f"({t})"
+        if self.mode == 'numpy':
+            return [f"{k} = np.empty({self.dim})"] + [
+                f"{k}[{j}] = {m.format(t=t, y=y)}" for j, m in enumerate(self.modeles)]
+        if self.dim is None:
+            return [f"{k} = {self.modeles[0].format(t=t, y=y)}"]
+        return [f"{k}_{j} = {m.format(t=t, y=y)}" for j, m in enumerate(self.modeles)]
+
+    def allouer(self):
+        if self.mode == 'numpy':
+            return [f"Y = np.zeros((N + 1, {self.dim}), dtype=stockage)", "yi = np.array(y0, dtype=float)"]
+        if self.dim is None:
+            return ["Y = array(stockage, [0.0]) * (N + 1)", "yi = float(y0)"]
+        return [f"Y = array(stockage, [0.0]) * ((N + 1) * {self.dim})"] + [
+            f"yi_{j} = float(y0[{j}])" for j in range(self.dim)]
+
+    def stocker(self, indice):
+        if self.mode == 'numpy' or self.dim is None:
+            return [f"Y[{indice}] = yi"]
+        return [f"b = ({indice}) * {self.dim}"] + [
+            f"Y[b + {j}] = yi_{j}" if j else "Y[b] = yi_0" for j in range(self.dim)]
+
+    def resultat(self):
+        if self.mode == 'numpy':
+            return "Y"
+        if self.dim is None:
+            return "np.frombuffer(Y, dtype=stockage)"
+        return f"np.frombuffer(Y, dtype=stockage).reshape(N + 1, {self.dim})"
+
+    def pas_rk4(self, apres_k1=()):
+        """Un pas de RK4 depuis (ti, yi) ; apres_k1 : lignes vectorielles insérées après k1."""
+        return (self.rhs('k1', 'ti', 'yi') + self.vec(*apres_k1)
+                + self.vec("z{j} = yi{j} + h * k1{j} / 2") + self.rhs('k2', 'ti + h / 2', 'z')
+                + self.vec("z{j} = yi{j} + h * k2{j} / 2") + self.rhs('k3', 'ti + h / 2', 'z')
+                + self.vec("z{j} = yi{j} + h * k3{j}") + self.rhs('k4', 'ti + h', 'z')
+                + self.vec("yi{j} = yi{j} + (h / 6) * (k1{j} + 2 * k2{j} + 2 * k3{j} + k4{j})"))
+
+
+def _indenter(lignes, niveau):
+    return ["    " * niveau + ligne for ligne in lignes]
+
+
+def _corps_euler(g):
+    boucle = ["ti = tl[i]"] + g.rhs('k1', 'ti', 'yi') + g.vec("yi{j} = yi{j} + h * k1{j}") + g.stocker("i + 1")
+    return ["for i in range(N):"] + _indenter(boucle, 1)
+
+
+def _corps_rk4(g):
+    return ["for i in range(N):"] + _indenter(["ti = tl[i]"] + g.pas_rk4() + g.stocker("i + 1"), 1)
+
+
+def _corps_ab3(g):
+    # Démarrage par RK4 : k1 du pas i est f(t[i], y[i]), gardé pour les pas suivants
+    demarrage = ["ti = tl[i]"] + g.pas_rk4(("f_i2{j} = f_i1{j}", "f_i1{j} = k1{j}")) + g.stocker("i + 1")
+    boucle = (g.rhs('f_i', 'tl[i]', 'yi')
+              + g.vec("yi{j} = yi{j} + h * (23 * f_i{j} - 16 * f_i1{j} + 5 * f_i2{j}) / 12",
+                      "f_i2{j} = f_i1{j}", "f_i1{j} = f_i{j}")
+              + g.stocker("i + 1"))
+    return (g.vec("f_i1{j} = 0.0") + ["for i in range(min(N, 2)):"] + _indenter(demarrage, 1)
+            + ["for i in range(2, N):"] + _indenter(boucle, 1))
+
+
+def _corps_predcor(g):
+    demarrage = (["ti = tl[i]"]
+                 + g.pas_rk4(("f_i3{j} = f_i2{j}", "f_i2{j} = f_i1{j}", "f_i1{j} = k1{j}"))
+                 + g.stocker("i + 1"))
+    boucle = (g.rhs('f_i', 'tl[i]', 'yi')
+              + g.vec("y_pred{j} = yi{j} + h * (55 * f_i{j} - 59 * f_i1{j} + 37 * f_i2{j} - 9 * f_i3{j}) / 24")
+              + g.rhs('f_pred', 'tl[i + 1]', 'y_pred')
+              + g.vec("yi{j} = yi{j} + h * (9 * f_pred{j} + 19 * f_i{j} - 5 * f_i1{j} + f_i2{j}) / 24",
+                      "f_i3{j} = f_i2{j}", "f_i2{j} = f_i1{j}", "f_i1{j} = f_i{j}")
+              + g.stocker("i + 1"))
+    return (g.vec("f_i1{j} = 0.0", "f_i2{j} = 0.0") + ["for i in range(min(N, 3)):"] + _indenter(demarrage, 1)
+            + ["for i in range(3, N):"] + _indenter(boucle, 1))
+
+
+_CORPS = {'Euler': _corps_euler, 'RK4': _corps_rk4, 'AB3': _corps_ab3, 'Pred-Cor': _corps_predcor}
+METHODES_NOYAUX = tuple(_CORPS)
+
+
+def _gabarits(expressions, dim):
+    """
+    Expressions-gabarits et mode du noyau. Le mode 'flottants' est préféré
+    quand toutes les fonctions ont un équivalent `math` et que y n'est lu
+    que par composantes ; une EDO scalaire n'a pas d'autre mode.
+    """
+    arbres = [ast.parse(normaliser(e), mode='eval') for e in expressions]
+    if all(vers_math(a) for a in arbres) and (dim is None or dim <= DIM_MAX_DEROULE):
+        try:
+            return [ast.unparse(_Gabarit(dim).visit(a)) for a in arbres], 'flottants'
+        except _NonDeroulable:
+            pass
+    if dim is None:
+        raise ExpressionInvalide("Fonction NumPy sans équivalent `math` : pas de noyau scalaire.")
+    arbres = [ast.parse(normaliser(e), mode='eval') for e in expressions]
+    return [ast.unparse(_Gabarit().visit(a)) for a in arbres], 'numpy'
+
+
+def generer_source(methode, expressions, dim=None):
+    """
+    Source du noyau `methode` pour les expressions données (une par
+    composante ; dim None pour une EDO scalaire). Renvoie (source, mode).
+    """
+    if methode not in _CORPS:
+        raise ValueError(f"Pas de noyau généré pour la méthode {methode}. "
+                         f"Méthodes concernées : {', '.join(METHODES_NOYAUX)}.")
+    modeles, mode = _gabarits(expressions, dim)
+    g = _Generateur(modeles, mode, dim)
+    lignes = (["def _noyau(t0, y0, h, N, stockage='d'):",
+               "    t = np.linspace(t0, t0 + N * h, N + 1)",
+               "    tl = t.tolist()"]
+              + _indenter(g.allouer() + g.stocker("0") + _CORPS[methode](g), 1)
+              + [f"    return t, {g.resultat()}"])
+    return "\n".join(lignes) + "\n", mode
+
+
+def _compiler(methode, expressions, dim):
+    source, mode = generer_source(methode, expressions, dim)
+    espace = _espace_de_noms()
+    espace.update(array=array, range=range, float=float)
+    exec(compile(source, f'<noyau {methode}>', 'exec'), espace)
+    noyau = espace['_noyau']
+    noyau.source = source
+    noyau.mode = mode
+    noyau.appels = APPELS[methode]
+    return noyau
+
+
+def noyau(methode, expressions, dim=None):
+    """
+    Noyau généré (mis en cache) pour `methode` et les expressions données,
+    ou None si la méthode n'en a pas ou si la génération a échoué.
+    Le noyau a la signature noyau(t0, y0, h, N, stockage='d') et renvoie (t, y),
+    y étant stocké en float64 ('d') ou float32 ('f').
+    - expressions : une chaîne (EDO scalaire) ou une liste de chaînes (système)
+    - dim : None pour une EDO scalaire, sinon le nombre d'équations
+    """
+    if methode not in _CORPS:
+        return None
+    if isinstance(expressions, str):
+        expressions = (expressions,)
+    cle = (methode, tuple(expressions), dim)
+    with _verrou:
+        if cle in _noyaux:
+            return _noyaux[cle]
+    try:
+        resultat = _compiler(methode, cle[1], dim)
+    except (ExpressionInvalide, SyntaxError, ValueError, RecursionError) as e:
+        resultat = None
+        with _verrou:
+            _echecs[cle] = f"{type(e).__name__} : {e}"
+    with _verrou:
+        _noyaux[cle] = resultat
+    return resultat
+
+
+def noyau_pour(methode, f, forme_y0=()):
+    """
+    Noyau correspondant à un second membre compilé par compilateur_EDO
+    (attribut `expression` ou `expressions`), ou None.
+    - forme_y0 : forme de la condition initiale (le noyau d'un système
+                 attend un vecteur de la dimension du système)
+    """
+    expression = getattr(f, 'expression', None)
+    if expression is not None:
+        return noyau(methode, expression) if forme_y0 == () else None
+    expressions = getattr(f, 'expressions', None)
+    if expressions is not None and forme_y0 == (len(expressions),):
+        return noyau(methode, expressions, len(expressions))
+    return None
+
+
+def resoudre_par_noyau(methode, f, t0, y0, h, N, stats=None, dtype=np.float64):
+    """
+    Résout avec le noyau généré si possible ; renvoie (t, y), ou None pour
+    laisser la main au chemin générique (pas de noyau, exception de `math`,
+    ou stats demandant un rappel par pas ou un profil, qu'un noyau ne fournit pas).
+    Si stats.periode_rappel > 0, le noyau d'une méthode à un pas est lancé
+    par blocs de periode_rappel pas et le rappel est appelé à la fin de chaque bloc.
+    - dtype : type des points stockés (float64 ou float32)
+    """
+    rappel = getattr(stats, 'rappel', None)
+    if stats is not None and (stats.profiler or rappel is not None and (stats.periode_rappel < 1 or
+                                                                        methode not in METHODES_UN_PAS)):
+        return None
+    fonction = noyau_pour(methode, f, np.shape(y0))
+    if fonction is None:
+        return None
+    debut = time.perf_counter()
+    if rappel is None:
+        try:
+            t, y = fonction(t0, y0, h, N, np.dtype(dtype).char)
+        except (ArithmeticError, ValueError, TypeError):
+            return None
+    else:
+        solution = _par_blocs(fonction, t0, y0, h, N, dtype, rappel, stats.periode_rappel)
+        if solution is None:
+            return None
+        t, y = solution
+    if stats is not None:
+        stats.methode = methode
+        stats.noyau = fonction.mode
+        stats.temps_total += time.perf_counter() - debut
+        stats.n_pas += len(t) - 1
+        stats.nfev += fonction.appels(len(t) - 1)
+    return t, y
+
+
+def _par_blocs(fonction, t0, y0, h, N, dtype, rappel, periode):
+    """
+    Noyau d'une méthode à un pas lancé par blocs de `periode` pas, chacun
+    repartant du dernier point du précédent ; rappel(i, t_i, y_i) est appelé à
+    la fin de chaque bloc et peut arrêter la résolution. None si `math` lève
+    une exception.
+    """
+    t = np.linspace(t0, t0 + N * h, N + 1)
+    y = np.empty((N + 1,) + np.shape(y0), dtype=dtype)
+    y[0] = y_bloc = y0
+    s = 0
+    while s < N:
+        n = min(periode, N - s)
+        try:
+            # Calcul en float64 : le bloc suivant repart d'un point non arrondi
+            _, bloc = fonction(t[s], y_bloc, h, n, 'd')
+        except (ArithmeticError, ValueError, TypeError):
+            return None
+        y[s + 1:s + n + 1] = bloc[1:]
+        y_bloc = bloc[-1]
+        s += n
+        if rappel(s, t[s], y[s]):
+            return t[:s + 1], y[:s + 1]
+    return t, y
+
+
+def source_noyau(methode, expressions, dim=None):
+    """Source du noyau (généré si besoin), ou None s'il n'existe pas."""
+    fonction = noyau(methode, expressions, dim)
+    return fonction.source if fonction is not None else None
+
+
+def noyaux_en_cache():
+    """Dictionnaire {(méthode, expressions, dim): source ou None} des noyaux connus."""
+    with _verrou:
+        return {cle: (n.source if n is not None else None) for cle, n in _noyaux.items()}
+
+
+def echecs_noyaux():
+    """Dictionnaire {(méthode, expressions, dim): raison} des générations échouées."""
+    with _verrou:
+        return dict(_echecs)
+
+
+def vider_cache_noyaux():
+    with _verrou:
+        _noyaux.clear()
+        _echecs.clear()
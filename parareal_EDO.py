@@ -0,0 +1,200 @@
+# -*- coding: utf-8 -*-
+"""
+Intégration parallèle en temps (Parareal) pour les longs horizons.
+
+Toutes les méthodes de methodes_num_EDO et Methodes_num_EDOS avancent pas à
+pas : une longue simulation n'occupe qu'un cœur. Parareal découpe
+[t0, t0 + N h] en tranches et combine deux propagateurs :
+- grossier G (par défaut Euler explicite avec quelques grands pas par
+  tranche), séquentiel mais peu coûteux ;
+- fin F (par défaut RK4 au pas h), coûteux mais indépendant d'une tranche à
+  l'autre : les tranches sont affinées en parallèle sur un pool de processus.
+L'itération k corrige les valeurs aux bords des tranches par
+    U[j + 1] = G(U_nouveau[j]) + F(U[j]) - G(U[j])
+jusqu'à ce que l'écart entre deux itérations passe sous la tolérance. Après
+k itérations, les k premières tranches sont exactes (identiques à la
+résolution fine séquentielle) : au plus `tranches` itérations, et seules les
+tranches non encore exactes sont relancées.
+
+Comme pour convergence_EDO, f est de préférence une expression (chaîne ou
+liste de chaînes), compilée une fois dans chaque processus ; une fonction non
+sérialisable est traitée dans le processus courant (aucun gain, mais le
+résultat et les compteurs restent valables).
+
+L'accélération n'est mesurable que sur une machine à plusieurs cœurs :
+ResultatParareal.acceleration_estimee(processus) l'estime pour un nombre de
+processus donné à partir des durées mesurées des deux propagateurs.
+"""
+
+import math
+import os
+import pickle
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+
+import numpy as np
+
+from compilateur_EDO import compiler_rhs
+from methodes_num_EDO import methodes_num_EDO
+from Methodes_num_EDOS import Methodes_num_EDOS
+
+
+@dataclass
+class ResultatParareal:
+    """Résultat d'une résolution Parareal (valeurs aux bords des tranches et compteurs)."""
+    t: np.ndarray                        # bords des tranches (tranches + 1 instants)
+    y: np.ndarray                        # solution aux bords des tranches
+    iterations: int = 0
+    converge: bool = False
+    ecarts: list = field(default_factory=list)   # écart relatif aux bords après chaque itération
+    processus: int = 1
+    temps_total: float = 0.0
+    temps_grossier: float = 0.0          # propagations grossières (processus principal)
+    temps_tranches: np.ndarray = None    # durée de la propagation fine de chaque tranche (1re itération)
+    propagations_fines: int = 0          # tranches affinées, toutes itérations confondues
+    trajectoire: tuple = None            # (t, y) au pas fin si demandée
+
+    @property
+    def tranches(self):
+        return len(self.t) - 1
+
+    @property
+    def temps_sequentiel(self):
+        """Durée estimée de la résolution fine séquentielle (somme des tranches)."""
+        return float(np.sum(self.temps_tranches))
+
+    @property
+    def acceleration(self):
+        """Accélération mesurée par rapport à la résolution fine séquentielle."""
+        return self.temps_sequentiel / self.temps_total if self.temps_total > 0 else float('nan')
+
+    def acceleration_estimee(self, processus):
+        """
+        Accélération attendue avec `processus` processus, pour le même nombre
+        d'itérations : chaque itération k coûte ceil((tranches - k + 1) / processus)
+        propagations fines, plus les propagations grossières séquentielles. Les
+        coûts d'envoi aux processus sont négligés : c'est une borne haute.
+        """
+        J, K = self.tranches, self.iterations
+        fin = self.temps_sequentiel / J
+        grossier = self.temps_grossier / max((K + 1) * J, 1)
+        parallele = sum(math.ceil((J - k + 1) / processus) for k in range(1, K + 1)) * fin
+        return self.temps_sequentiel / (parallele + (K + 1) * J * grossier)
+
+    def __str__(self):
+        etat = "convergé" if self.converge else "non convergé"
+        return (f"Parareal : {self.tranches} tranches, {self.iterations} itération(s) ({etat}, "
+                f"écart {self.ecarts[-1] if self.ecarts else float('nan'):.1e}), "
+                f"{self.propagations_fines} propagations fines sur {self.processus} processus — "
+                f"{self.temps_total:.3f} s (grossier : {self.temps_grossier:.3f} s), "
+                f"séquentiel estimé {self.temps_sequentiel:.3f} s, accélération {self.acceleration:.2f}")
+
+
+def _propager(tache):
+    """Propagation fine d'une tranche : renvoie la valeur finale (ou la trajectoire) et la durée."""
+    methode, f, t0, y0, h, n, garder, options = tache
+    solveur = methodes_num_EDO if np.ndim(y0) == 0 else Methodes_num_EDOS
+    debut = time.perf_counter()
+    t, y = solveur(methode, f, t0, y0, h, n, **options)
+    return ((t, y) if garder else y[-1]), time.perf_counter() - debut
+
+
+def _serialisable(*objets):
+    try:
+        pickle.dumps(objets)
+        return True
+    except Exception:
+        return False
+
+
+def parareal(f, t0, y0, h, N, tranches=None, pas_grossiers=1, methode_fine='RK4', methode_grossiere='Euler',
+             tol=1e-8, iter_max=None, processus=None, trajectoire=False, **options):
+    """
+    Résout y' = f(t, y) sur [t0, t0 + N h] par Parareal.
+    - f : expression(s) (de préférence, voir l'en-tête) ou fonction f(t, y).
+    - t0, y0, h, N : comme pour Methodes_num_EDOS ; h est le pas fin.
+    - tranches : nombre de tranches (par défaut le nombre de processus).
+    - pas_grossiers : pas du propagateur grossier par tranche (pas grossier
+                      = longueur de la tranche / pas_grossiers).
+    - methode_fine, methode_grossiere : méthodes à pas fixe de Methodes_num_EDOS.
+    - tol : arrêt quand l'écart maximal aux bords des tranches entre deux
+            itérations est inférieur à tol * max(1, max |y|).
+    - iter_max : nombre maximal d'itérations (par défaut `tranches` : à cette
+                 itération, toutes les tranches sont exactes et le résultat
+                 est celui de la résolution fine séquentielle).
+    - processus : taille du pool (par défaut le nombre de cœurs ; 1 pour
+                  tout exécuter dans le processus courant).
+    - trajectoire : si vrai, une dernière passe fine parallèle reconstruit la
+                    trajectoire complète au pas h (dans `trajectoire`).
+    - options : transmises au propagateur fin (noyau, dtype, jac, ...).
+    Renvoie un ResultatParareal.
+    """
+    processus = processus or os.cpu_count() or 1
+    tranches = min(tranches or processus, N)
+    if tranches < 1:
+        raise ValueError("Il faut au moins une tranche et un pas.")
+    iter_max = tranches if iter_max is None else min(iter_max, tranches)
+    debut = time.perf_counter()
+
+    # Répartition des N pas fins : les premières tranches prennent le reste
+    pas = np.full(tranches, N // tranches)
+    pas[:N % tranches] += 1
+    bords = t0 + h * np.concatenate(([0], np.cumsum(pas)))
+    g = compiler_rhs(f)
+    solveur = methodes_num_EDO if np.ndim(y0) == 0 else Methodes_num_EDOS
+    resultat = ResultatParareal(bords, None, processus=processus)
+
+    def grossier(j, y):
+        debut_g = time.perf_counter()
+        H = pas[j] * h / pas_grossiers
+        y_fin = solveur(methode_grossiere, g, bords[j], y, H, pas_grossiers)[1][-1]
+        resultat.temps_grossier += time.perf_counter() - debut_g
+        return y_fin
+
+    # Première estimation : propagation grossière seule
+    U = np.empty((tranches + 1,) + np.shape(y0))
+    U[0] = y0
+    G = np.empty_like(U[1:])
+    for j in range(tranches):
+        G[j] = U[j + 1] = grossier(j, U[j])
+
+    parallele = processus > 1 and tranches > 1 and _serialisable(f, y0, options)
+    pool = ProcessPoolExecutor(max_workers=processus) if parallele else None
+    try:
+        def propager(premiere, garder):
+            taches = [(methode_fine, f, bords[j], U[j], h, int(pas[j]), garder, options)
+                      for j in range(premiere, tranches)]
+            resultat.propagations_fines += len(taches)
+            return list(pool.map(_propager, taches)) if pool is not None else [_propager(t) for t in taches]
+
+        for k in range(1, iter_max + 1):
+            # Les tranches avant k - 1 sont exactes depuis l'itération précédente
+            fins = propager(k - 1, False)
+            if k == 1:
+                resultat.temps_tranches = np.array([duree for _, duree in fins])
+            F = np.array([y_fin for y_fin, _ in fins])
+            ancien = U.copy()
+            for j in range(k - 1, tranches):
+                G_nouveau = grossier(j, U[j])
+                U[j + 1] = G_nouveau + F[j - k + 1] - G[j]
+                G[j] = G_nouveau
+            ecart = float(np.max(np.abs(U - ancien))) / max(1.0, float(np.max(np.abs(U))))
+            resultat.ecarts.append(ecart)
+            resultat.iterations = k
+            if not np.isfinite(ecart):
+                break
+            if ecart <= tol or k == tranches:
+                resultat.converge = True
+                break
+
+        if trajectoire:
+            morceaux = [solution for solution, _ in propager(0, True)]
+            resultat.trajectoire = (np.concatenate([morceaux[0][0]] + [t[1:] for t, _ in morceaux[1:]]),
+                                    np.concatenate([morceaux[0][1]] + [y[1:] for _, y in morceaux[1:]]))
+    finally:
+        if pool is not None:
+            pool.shutdown()
+    resultat.y = U
+    resultat.temps_total = time.perf_counter() - debut
+    return resultat
@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+"""
+Précision flottante des résolutions.
+
+Deux types sont choisis séparément (float64 ou float32) :
+- dtype : type des points stockés de la trajectoire. float32 divise par deux
+  la mémoire et le volume des exports des longues simulations et des grands
+  ensembles, sans toucher à la précision du calcul : l'état courant reste
+  dans le type de calcul et n'est arrondi qu'au moment d'être stocké.
+- dtype_calcul : type de l'état de travail et des dérivées. float32 divise
+  aussi par deux le trafic mémoire de chaque pas (grands systèmes, ensembles),
+  au prix d'une erreur plancher de l'ordre de 1e-7 relatif. Seules les
+  méthodes explicites à pas fixe (METHODES_CALCUL_FLOAT32) calculent en
+  float32 ; les autres gardent float64, leurs tolérances (Newton, contrôle
+  du pas) étant hors de portée de float32. Une EDO scalaire est toujours
+  calculée en float64 (un seul flottant, rien à gagner).
+"""
+
+import inspect
+
+import numpy as np
+
+TYPES_FLOTTANTS = ('float64', 'float32')
+METHODES_CALCUL_FLOAT32 = ('Euler', 'RK4', 'AB3', 'Pred-Cor', 'Verlet', 'Yoshida4')
+
+
+def type_flottant(dtype, defaut=np.float64):
+    """np.dtype float32 ou float64 correspondant à dtype ('float32', np.float32, ...) ; None donne defaut."""
+    if dtype is None:
+        return np.dtype(defaut)
+    try:
+        dtype = np.dtype(dtype)
+    except TypeError:
+        dtype = None
+    if dtype not in (np.float32, np.float64):
+        raise ValueError(f"Précision inconnue. Choisissez parmi : {', '.join(TYPES_FLOTTANTS)}.")
+    return dtype
+
+
+def etat_initial(y0):
+    """
+    Copie de y0 servant d'état de travail : float32 si y0 l'est déjà, float64
+    sinon (scalaire NumPy pour une EDO scalaire).
+    """
+    y0 = np.asarray(y0)
+    return np.array(y0, dtype=np.float32 if y0.dtype == np.float32 else np.float64)[()]
+
+
+def en_precision(f, dtype):
+    """
+    f dont le résultat est converti en dtype, pour qu'un état de travail
+    float32 le reste (t, en float64, promouvrait sinon les dérivées). Un
+    argument `out` de f (systèmes compilés) est conservé : le tampon fourni,
+    du type de l'état, fait alors la conversion.
+    """
+    if np.dtype(dtype) == np.float64:
+        return f
+    try:
+        avec_out = 'out' in inspect.signature(f).parameters
+    except (TypeError, ValueError):
+        avec_out = False
+
+    if avec_out:
+        def g(t, y, out=None):
+            if out is not None:
+                return f(t, y, out=out)
+            return np.asarray(f(t, y), dtype=dtype)
+    else:
+        def g(t, y):
+            return np.asarray(f(t, y), dtype=dtype)
+    # La forme séparée est utilisée telle quelle : Verlet et Yoshida4 ajoutent
+    # ses résultats en place à l'état, qui garde son type
+    for attribut in ('source', 'separe'):
+        if hasattr(f, attribut):
+            setattr(g, attribut, getattr(f, attribut))
+    return g
+
+
+def options_precision(conteneur, calcul=True):
+    """
+    Choix de la précision dans l'interface. Renvoie les options dtype (et
+    dtype_calcul si calcul est vrai) à transmettre aux solveurs, les valeurs
+    par défaut (float64) étant omises.
+    """
+    options = {'dtype': conteneur.selectbox("Stockage de la trajectoire", options=TYPES_FLOTTANTS)}
+    if calcul:
+        options['dtype_calcul'] = conteneur.selectbox(
+            "Précision du calcul", options=TYPES_FLOTTANTS,
+            help=f"float32 ne concerne que les méthodes {', '.join(METHODES_CALCUL_FLOAT32)}.")
+    return {cle: valeur for cle, valeur in options.items() if valeur != 'float64'}
@@ -0,0 +1,361 @@
+# -*- coding: utf-8 -*-
+"""
+Méthodes pour les problèmes raides.
+
+- BDF : formules de différentiation rétrograde d'ordre 1 à 5, à pas et ordre
+  variables (tableau des différences modifiées de Shampine et Reichelt, comme
+  scipy.integrate.BDF). Chaque pas résout un système implicite par Newton
+  simplifié ; le jacobien n'est recalculé que si Newton ne converge pas.
+- Rosenbrock : méthode linéairement implicite d'ordre 2 avec estimation
+  d'erreur d'ordre 3 (ode23s de MATLAB) : pas d'itérations de Newton, trois
+  résolutions linéaires par pas avec le jacobien du début du pas.
+- Auto : commence avec Dormand-Prince et estime régulièrement le rayon
+  spectral du jacobien. Quand h * rayon approche la frontière de stabilité de
+  Dormand-Prince (le pas est alors limité par la stabilité et non par la
+  précision), on bascule sur BDF ; on revient à Dormand-Prince quand le pas
+  de BDF redevient petit devant cette frontière.
+
+Toutes sont adaptatives : h est le pas initial proposé et les tolérances
+rtol/atol pilotent le pas (comme DOPRI5). Le jacobien et les factorisations
+viennent de newton_EDO (jac fourni ou différences finies).
+"""
+
+import numpy as np
+
+from adaptatif_EDO import pas_dormand_prince
+from newton_EDO import NewtonSimplifie
+
+# Méthodes dont la grille des temps est choisie par le solveur
+METHODES_ADAPTATIVES = ('DOPRI5', 'BDF', 'Rosenbrock', 'Auto')
+
+EPS = np.finfo(float).eps
+
+# BDF
+ORDRE_MAX = 5
+NEWTON_ITER_MAX = 4
+FACTEUR_MIN = 0.2
+FACTEUR_MAX = 10.0
+# gamma_k = 1 + 1/2 + ... + 1/k et constantes d'erreur 1 / (k + 1) des formules d'ordre k
+GAMMA = np.hstack((0.0, np.cumsum(1.0 / np.arange(1, ORDRE_MAX + 1))))
+CONSTANTE_ERREUR = 1.0 / np.arange(1, ORDRE_MAX + 2)
+
+# Rosenbrock (ode23s)
+D_ROS = 1.0 / (2.0 + np.sqrt(2.0))
+E32 = 6.0 + np.sqrt(2.0)
+
+# Auto : frontière de stabilité de Dormand-Prince sur l'axe réel négatif,
+# fractions de cette frontière déclenchant les bascules, et période du test
+FRONTIERE_DOPRI = 3.3
+SEUIL_RAIDE = 0.8
+SEUIL_NON_RAIDE = 0.3
+# Au-delà, le rayon spectral est estimé sans calculer les valeurs propres de jac
+DIM_MAX_VALEURS_PROPRES = 200
+PERIODE_TEST = 10
+
+
+def _norme(x):
+    """Norme quadratique moyenne (erreurs déjà divisées par l'échelle)."""
+    return np.sqrt(np.mean(x ** 2))
+
+
+def _pas_trop_petit(h, t):
+    if h <= 10 * EPS * max(1.0, abs(t)):
+        raise RuntimeError(f"Pas de temps trop petit à t = {t:g} : tolérances inatteignables.")
+
+
+def _matrice_R(ordre, facteur):
+    I = np.arange(1, ordre + 1)[:, np.newaxis]
+    J = np.arange(1, ordre + 1)
+    M = np.zeros((ordre + 1, ordre + 1))
+    M[1:, 1:] = (I - 1 - facteur * J) / I
+    M[0] = 1
+    return np.cumprod(M, axis=0)
+
+
+def _changer_pas(D, ordre, facteur):
+    """Met à jour les différences D quand le pas est multiplié par facteur."""
+    RU = _matrice_R(ordre, facteur) @ _matrice_R(ordre, 1)
+    D[:ordre + 1] = np.tensordot(RU.T, D[:ordre + 1], axes=1)
+
+
+def _newton_bdf(f, t, y_pred, c, psi, newton, echelle, tol):
+    """
+    Itérations de Newton simplifié pour y = y_pred + d, d = c * f(t, y) - psi.
+    Renvoie (convergé, itérations, y, d) ; s'arrête dès que le taux de
+    contraction ne permet plus d'atteindre tol en NEWTON_ITER_MAX itérations.
+    """
+    d = 0.0
+    y = y_pred.copy()
+    norme_prec = None
+    for k in range(NEWTON_ITER_MAX):
+        fy = np.asarray(f(t, y), dtype=float)
+        if not np.all(np.isfinite(fy)):
+            break
+        dy = newton.resoudre_lineaire(c * fy - psi - d, c)
+        norme = _norme(dy / echelle)
+        taux = None if norme_prec is None else norme / norme_prec
+        if taux is not None and (taux >= 1 or taux ** (NEWTON_ITER_MAX - k) / (1 - taux) * norme > tol):
+            break
+        y += dy
+        d = d + dy
+        if norme == 0 or (taux is not None and taux / (1 - taux) * norme < tol):
+            return True, k + 1, y, d
+        norme_prec = norme
+    return False, k + 1, y, d
+
+
+def pas_bdf(f, t0, y0, t_fin, h, rtol=1e-6, atol=1e-9, newton=None, compteurs=None):
+    """
+    Générateur des pas acceptés (t, y) de BDF entre t0 et t_fin (y0 tableau).
+    - newton : NewtonSimplifie fournissant le jacobien et les factorisations
+    - compteurs : dictionnaire optionnel mis à jour au fil de l'intégration
+                  (n_acceptes, n_rejetes)
+    """
+    compteurs = {} if compteurs is None else compteurs
+    compteurs.update(n_acceptes=0, n_rejetes=0)
+    newton = NewtonSimplifie(f) if newton is None else newton
+    t = float(t0)
+    y = np.array(y0, dtype=float)
+    h = min(abs(h), t_fin - t) if t_fin > t else 0.0
+    tol_newton = max(10 * EPS / rtol, min(0.03, rtol ** 0.5))
+    D = np.zeros((ORDRE_MAX + 3,) + y.shape)
+    D[0] = y
+    D[1] = h * np.asarray(f(t, y), dtype=float)
+    ordre, n_egaux = 1, 0
+
+    while t_fin - t > 1e-12 * max(1.0, abs(t_fin)):
+        if h > t_fin - t:
+            _changer_pas(D, ordre, (t_fin - t) / h)
+            h = t_fin - t
+            n_egaux = 0
+        while True:
+            _pas_trop_petit(h, t)
+            t_nouv = t + h
+            y_pred = D[:ordre + 1].sum(axis=0)
+            echelle = atol + rtol * np.abs(y_pred)
+            psi = np.tensordot(GAMMA[1:ordre + 1], D[1:ordre + 1], axes=1) / GAMMA[ordre]
+            c = h / GAMMA[ordre]
+            if newton.J is None:
+                newton.actualiser(t_nouv, y_pred, c)
+            while True:
+                converge, n_iter, y_nouv, d = _newton_bdf(f, t_nouv, y_pred, c, psi, newton, echelle, tol_newton)
+                newton.n_iter += n_iter
+                if converge or newton.frais:
+                    break
+                # Jacobien périmé : on le recalcule avant de réduire le pas
+                newton.actualiser(t_nouv, y_pred, c)
+            if not converge:
+                facteur = 0.5
+            else:
+                securite = 0.9 * (2 * NEWTON_ITER_MAX + 1) / (2 * NEWTON_ITER_MAX + n_iter)
+                echelle = atol + rtol * np.abs(y_nouv)
+                norme = _norme(CONSTANTE_ERREUR[ordre] * d / echelle)
+                if norme <= 1.0:
+                    break
+                facteur = max(FACTEUR_MIN, securite * norme ** (-1 / (ordre + 1)))
+            compteurs['n_rejetes'] += 1
+            _changer_pas(D, ordre, facteur)
+            h *= facteur
+            n_egaux = 0
+
+        t, y = t_nouv, y_nouv
+        newton.frais = False
+        compteurs['n_acceptes'] += 1
+        n_egaux += 1
+        D[ordre + 2] = d - D[ordre + 1]
+        D[ordre + 1] = d
+        for i in reversed(range(ordre + 1)):
+            D[i] += D[i + 1]
+        yield t, y
+
+        # Après ordre + 1 pas égaux, choix de l'ordre (k - 1, k ou k + 1) qui permet le plus grand pas
+        if n_egaux < ordre + 1:
+            continue
+        norme_m = _norme(CONSTANTE_ERREUR[ordre - 1] * D[ordre] / echelle) if ordre > 1 else np.inf
+        norme_p = _norme(CONSTANTE_ERREUR[ordre + 1] * D[ordre + 2] / echelle) if ordre < ORDRE_MAX else np.inf
+        with np.errstate(divide='ignore'):
+            facteurs = np.array([norme_m, norme, norme_p]) ** (-1 / np.arange(ordre, ordre + 3))
+        ordre += int(np.argmax(facteurs)) - 1
+        facteur = min(FACTEUR_MAX, securite * np.max(facteurs))
+        _changer_pas(D, ordre, facteur)
+        h *= facteur
+        n_egaux = 0
+
+
+def pas_rosenbrock(f, t0, y0, t_fin, h, rtol=1e-6, atol=1e-9, newton=None, compteurs=None):
+    """
+    Générateur des pas acceptés (t, y) de la méthode de Rosenbrock ode23s
+    entre t0 et t_fin (y0 tableau). Mêmes arguments que pas_bdf.
+    """
+    compteurs = {} if compteurs is None else compteurs
+    compteurs.update(n_acceptes=0, n_rejetes=0)
+    newton = NewtonSimplifie(f) if newton is None else newton
+    evaluer = lambda t, y: np.asarray(f(t, y), dtype=float)
+    t = float(t0)
+    y = np.array(y0, dtype=float)
+    h = min(abs(h), t_fin - t) if t_fin > t else 0.0
+    F0 = evaluer(t, y)
+    jacobien_a_jour = False
+    rejet_prec = False
+
+    while t_fin - t > 1e-12 * max(1.0, abs(t_fin)):
+        h = min(h, t_fin - t)
+        _pas_trop_petit(h, t)
+        gamma = D_ROS * h
+        if not jacobien_a_jour:
+            # Jacobien et dérivée en temps df/dt au début du pas (réutilisés si le pas est rejeté)
+            newton.actualiser(t, y, gamma)
+            dt = np.sqrt(EPS) * max(1.0, abs(t))
+            T = (evaluer(t + dt, y) - F0) / dt
+            jacobien_a_jour = True
+        k1 = newton.resoudre_lineaire(F0 + gamma * T, gamma)
+        F1 = evaluer(t + 0.5 * h, y + 0.5 * h * k1)
+        k2 = newton.resoudre_lineaire(F1 - k1, gamma) + k1
+        y_nouv = y + h * k2
+        F2 = evaluer(t + h, y_nouv)
+        k3 = newton.resoudre_lineaire(F2 - E32 * (k2 - F1) - 2 * (k1 - F0) + gamma * T, gamma)
+        erreur = (h / 6) * (k1 - 2 * k2 + k3)
+        norme = _norme(erreur / (atol + rtol * np.maximum(np.abs(y), np.abs(y_nouv))))
+
+        if norme <= 1.0:
+            t += h
+            y = y_nouv
+            F0 = F2
+            jacobien_a_jour = False
+            compteurs['n_acceptes'] += 1
+            facteur = min(5.0, 0.8 * max(norme, 1e-10) ** (-1 / 3))
+            h *= min(facteur, 1.0) if rejet_prec else facteur
+            rejet_prec = False
+            yield t, y
+        else:
+            compteurs['n_rejetes'] += 1
+            h *= max(FACTEUR_MIN, 0.8 * norme ** (-1 / 3))
+            rejet_prec = True
+
+
+def rayon_spectral(f, t, y, jac=None, iterations=10):
+    """
+    Estimation du rayon spectral du jacobien de f en (t, y) : valeurs propres
+    de jac s'il est fourni (petits systèmes), sinon méthode de la puissance
+    sans matrice (J v ≈ (f(t, y + d v) - f(t, y)) / d), quelques appels à f.
+    """
+    y = np.asarray(y, dtype=float)
+    if callable(jac) and y.size <= DIM_MAX_VALEURS_PROPRES:
+        J = jac(t, y)
+        J = np.atleast_2d(np.asarray(J.toarray() if hasattr(J, 'toarray') else J, dtype=float))
+        return float(np.max(np.abs(np.linalg.eigvals(J))))
+    fy = np.asarray(f(t, y), dtype=float)
+    v = np.random.default_rng(0).standard_normal(y.shape)
+    rayon = 0.0
+    for _ in range(1 if y.size == 1 else iterations):
+        v /= np.linalg.norm(v)
+        d = np.sqrt(EPS) * max(1.0, np.linalg.norm(y))
+        Jv = (np.asarray(f(t, y + d * v), dtype=float) - fy) / d
+        rayon = np.linalg.norm(Jv)
+        if rayon == 0.0 or not np.isfinite(rayon):
+            break
+        v = Jv
+    return float(rayon)
+
+
+def pas_auto(f, t0, y0, t_fin, h, rtol=1e-6, atol=1e-9, newton=None, compteurs=None):
+    """
+    Générateur des pas acceptés (t, y) de la méthode Auto (Dormand-Prince ou
+    BDF selon la raideur détectée). Mêmes arguments que pas_bdf ; compteurs
+    reçoit aussi `bascules`, la liste des (t, méthode) de chaque segment, et
+    `etapes` : les sept étapes k du dernier pas sur un segment Dormand-Prince
+    (sortie dense de dense_EDO), None sur un segment BDF.
+    """
+    compteurs = {} if compteurs is None else compteurs
+    compteurs.update(n_acceptes=0, n_rejetes=0, bascules=[])
+    newton = NewtonSimplifie(f) if newton is None else newton
+    t = float(t0)
+    y = np.array(y0, dtype=float)
+    raide = False
+    while t_fin - t > 1e-12 * max(1.0, abs(t_fin)):
+        segment = {}
+        if raide:
+            pas = pas_bdf(f, t, y, t_fin, h, rtol, atol, newton, segment)
+        else:
+            pas = pas_dormand_prince(f, t, y, t_fin, h, rtol, atol, segment)
+        compteurs['bascules'].append((t, 'BDF' if raide else 'DOPRI5'))
+        try:
+            for n, (t_n, y_n) in enumerate(pas, 1):
+                h, t, y = t_n - t, t_n, y_n
+                compteurs['etapes'] = None if raide else segment['etapes']
+                yield t, y
+                if n % PERIODE_TEST == 0:
+                    rapport = h * rayon_spectral(f, t, y, newton.jac) / FRONTIERE_DOPRI
+                    if rapport > SEUIL_RAIDE if not raide else rapport < SEUIL_NON_RAIDE:
+                        break
+        finally:
+            compteurs['n_acceptes'] += segment.get('n_acceptes', 0)
+            compteurs['n_rejetes'] += segment.get('n_rejetes', 0)
+        raide = not raide
+
+
+_PAS = {'BDF': pas_bdf, 'Rosenbrock': pas_rosenbrock, 'Auto': pas_auto}
+
+
+def pas_methode_raide(methode, f, t0, y0, t_fin, h, rtol=1e-6, atol=1e-9, jac=None, compteurs=None):
+    """
+    Générateur des pas acceptés (t, y) de `methode` ('BDF', 'Rosenbrock' ou
+    'Auto') ; y0 peut être scalaire (y est alors un flottant).
+    - jac : jacobien optionnel jac(t, y) (dérivée df/dy pour une EDO scalaire)
+    - compteurs : reçoit n_acceptes, n_rejetes (et bascules pour Auto), ainsi
+                  que `newton`, le NewtonSimplifie utilisé (statistiques)
+    """
+    compteurs = {} if compteurs is None else compteurs
+    scalaire = np.ndim(y0) == 0
+    if scalaire:
+        # Les méthodes travaillent sur des vecteurs : une EDO scalaire devient un système de dimension 1
+        f_scalaire, jac_scalaire = f, jac
+        f = lambda t, y: np.atleast_1d(f_scalaire(t, y[0]))
+        jac = None if jac is None else (lambda t, y: jac_scalaire(t, y[0]))
+        y0 = [y0]
+    newton = NewtonSimplifie(f, jac)
+    compteurs['newton'] = newton
+    for t, y in _PAS[methode](f, t0, y0, t_fin, h, rtol, atol, newton, compteurs):
+        yield t, (float(y[0]) if scalaire else y)
+
+
+def _integrer(methode, f, t0, y0, h, N, rtol, atol, jac, stats, dtype):
+    compteurs = {}
+    rappel = getattr(stats, 'rappel', None)
+    liste_t, liste_y = [float(t0)], [np.array(y0, dtype=dtype)]
+    # Chaque point est converti dès qu'il est accepté : la liste ne garde pas de copie float64
+    convertir = np.ndim(y0) > 0 and np.dtype(dtype) != np.float64
+    for t, y in pas_methode_raide(methode, f, t0, y0, t0 + N * h, h, rtol, atol, jac, compteurs):
+        liste_t.append(t)
+        liste_y.append(y.astype(dtype) if convertir else y)
+        if rappel is not None and rappel(len(liste_t) - 1, t, y):
+            break
+    if stats is not None:
+        stats.n_rejetes += compteurs['n_rejetes']
+        stats.ajouter_newton(compteurs['newton'])
+        stats.bascules += compteurs.get('bascules', [])
+    return np.array(liste_t), np.array(liste_y, dtype=dtype)
+
+
+def bdf(f, t0, y0, h, N, rtol=1e-6, atol=1e-9, jac=None, stats=None, dtype=np.float64):
+    """
+    BDF à pas et ordre variables sur [t0, t0 + N * h] (h : pas initial proposé).
+    - jac : jacobien optionnel jac(t, y) ; à défaut, différences finies
+    - stats : StatsSolveur optionnel (voir stats_EDO)
+    - dtype : type des points stockés (le calcul reste en float64, voir precision_EDO)
+    Renvoie la grille des temps acceptés et les solutions correspondantes.
+    """
+    return _integrer('BDF', f, t0, y0, h, N, rtol, atol, jac, stats, dtype)
+
+
+def rosenbrock(f, t0, y0, h, N, rtol=1e-6, atol=1e-9, jac=None, stats=None, dtype=np.float64):
+    """Rosenbrock ode23s sur [t0, t0 + N * h] ; mêmes arguments que bdf."""
+    return _integrer('Rosenbrock', f, t0, y0, h, N, rtol, atol, jac, stats, dtype)
+
+
+def auto(f, t0, y0, h, N, rtol=1e-6, atol=1e-9, jac=None, stats=None, dtype=np.float64):
+    """
+    Dormand-Prince avec bascule automatique sur BDF quand le problème devient
+    raide ; mêmes arguments que bdf. Les bascules sont notées dans stats.bascules.
+    """
+    return _integrer('Auto', f, t0, y0, h, N, rtol, atol, jac, stats, dtype)
@@ -0,0 +1,142 @@
+# -*- coding: utf-8 -*-
+"""
+Instrumentation des solveurs.
+
+Un objet StatsSolveur passé en argument `stats=` à methodes_num_EDO,
+Methodes_num_EDOS ou à l'une des méthodes est rempli pendant la résolution :
+appels au second membre, itérations de Newton, temps passé dans f et dans
+l'intégrateur, pas par seconde. Il porte aussi deux points d'accroche :
+- rappel(i, t_i, y_i), appelé après chaque pas accepté ; s'il renvoie vrai,
+  la résolution s'arrête et la trajectoire est tronquée au point i. Avec
+  periode_rappel > 0, il peut n'être appelé que tous les periode_rappel pas :
+  les noyaux générés des méthodes à un pas restent alors utilisés, par blocs
+  (suivi de progression, annulation)
+- profiler=True, qui exécute la résolution sous cProfile (résultat dans `profil`)
+Sans objet stats, les solveurs ne sont pas instrumentés et ne paient rien.
+Quand un noyau généré est utilisé (voir noyaux_EDO), `noyau` indique son mode
+et le temps passé dans f n'est pas séparé de celui de l'intégrateur.
+"""
+
+import cProfile
+import inspect
+import pstats
+import time
+from dataclasses import dataclass, field
+
+
+@dataclass
+class StatsSolveur:
+    """Statistiques d'une résolution (remplies par le solveur)."""
+    rappel: object = None              # rappel(i, t_i, y_i) après chaque pas
+    profiler: bool = False
+    periode_rappel: int = 0            # > 0 : rappel toléré tous les periode_rappel pas seulement
+    methode: str = ''
+    nfev: int = 0                      # appels au second membre (jacobien par différences compris)
+    n_pas: int = 0                     # pas acceptés
+    n_rejetes: int = 0                 # pas rejetés (méthode adaptative)
+    n_iter_newton: int = 0
+    n_jacobiens: int = 0
+    n_factorisations: int = 0
+    temps_total: float = 0.0
+    temps_rhs: float = 0.0
+    phases: dict = field(default_factory=dict)  # durées nommées (ex: démarrage des méthodes multipas)
+    profil: object = None              # pstats.Stats si profiler est vrai
+    noyau: str = ''                    # mode du noyau généré utilisé (voir noyaux_EDO), sinon ''
+    bascules: list = field(default_factory=list)  # (t, méthode) de chaque segment de la méthode Auto
+
+    @property
+    def temps_integrateur(self):
+        """Temps hors second membre (schéma, Newton, allocations)."""
+        return self.temps_total - self.temps_rhs
+
+    @property
+    def pas_par_seconde(self):
+        return self.n_pas / self.temps_total if self.temps_total > 0 else float('nan')
+
+    def reinitialiser(self):
+        """Remet les compteurs à zéro (le rappel et les options sont conservés)."""
+        self.__init__(rappel=self.rappel, profiler=self.profiler, periode_rappel=self.periode_rappel)
+
+    def ajouter_newton(self, newton):
+        """Reporte les compteurs d'un NewtonSimplifie."""
+        self.n_iter_newton += newton.n_iter
+        self.n_jacobiens += newton.n_jac
+        self.n_factorisations += newton.n_lu
+
+    def __str__(self):
+        texte = f"{self.n_pas} pas, {self.nfev} appels à f"
+        if self.n_rejetes:
+            texte += f", {self.n_rejetes} pas rejetés"
+        if self.n_iter_newton:
+            texte += f", Newton : {self.n_iter_newton} itérations, {self.n_jacobiens} jacobiens"
+        if len(self.bascules) > 1:
+            texte += f", {len(self.bascules) - 1} bascule(s) " + " → ".join(m for _, m in self.bascules)
+        if self.noyau:
+            # f est recopiée dans la boucle du noyau : son temps n'est pas mesurable à part
+            return texte + f" — {self.temps_total:.3f} s (noyau généré), {self.pas_par_seconde:,.0f} pas/s"
+        part_rhs = 100 * self.temps_rhs / self.temps_total if self.temps_total > 0 else 0.0
+        return (texte + f" — {self.temps_total:.3f} s (f : {part_rhs:.0f} %, intégrateur : "
+                f"{self.temps_integrateur:.3f} s), {self.pas_par_seconde:,.0f} pas/s")
+
+    def __getstate__(self):
+        # Le rappel et le profil ne passent pas d'un processus à l'autre
+        etat = self.__dict__.copy()
+        etat['rappel'] = None
+        etat['profil'] = None
+        return etat
+
+
+def instrumenter(f, stats):
+    """Enveloppe f pour compter ses appels et mesurer le temps passé dans f."""
+    horloge = time.perf_counter
+    try:
+        avec_out = 'out' in inspect.signature(f).parameters
+    except (TypeError, ValueError):
+        avec_out = False
+
+    if avec_out:
+        def g(t, y, out=None):
+            debut = horloge()
+            resultat = f(t, y, out=out)
+            stats.temps_rhs += horloge() - debut
+            stats.nfev += 1
+            return resultat
+    else:
+        def g(t, y):
+            debut = horloge()
+            resultat = f(t, y)
+            stats.temps_rhs += horloge() - debut
+            stats.nfev += 1
+            return resultat
+    g.source = getattr(f, 'source', None)
+    # Motif creux et vectorisation d'un système compilé (voir creux_EDO)
+    for attribut in ('sparsite', 'vectorise'):
+        if hasattr(f, attribut):
+            setattr(g, attribut, getattr(f, attribut))
+    separe = getattr(f, 'separe', None)
+    if separe is not None:
+        # Système sous forme séparée : chaque moitié évaluée seule compte pour un appel
+        g.separe = tuple(instrumenter(partie, stats) for partie in separe)
+    return g
+
+
+def suivre(stats, methode, resoudre, f, *args, **kwargs):
+    """
+    Exécute resoudre(f_instrumenté, *args, stats=stats, **kwargs) en mesurant
+    le temps total (et sous cProfile si stats.profiler), puis renvoie (t, y).
+    """
+    stats.methode = methode
+    profil = cProfile.Profile() if stats.profiler else None
+    debut = time.perf_counter()
+    if profil is not None:
+        profil.enable()
+    try:
+        t, y = resoudre(instrumenter(f, stats), *args, stats=stats, **kwargs)
+    finally:
+        if profil is not None:
+            profil.disable()
+        stats.temps_total += time.perf_counter() - debut
+    if profil is not None:
+        stats.profil = pstats.Stats(profil)
+    stats.n_pas += len(t) - 1
+    return t, y
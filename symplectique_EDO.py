@@ -0,0 +1,150 @@
+# -*- coding: utf-8 -*-
+"""
+Intégrateurs géométriques pour les systèmes hamiltoniens.
+
+L'état est y = (q, p) : les n premières composantes sont les positions, les
+n suivantes les impulsions (ou vitesses). Sur de longues durées, ces méthodes
+gardent l'énergie bornée autour de sa valeur initiale au lieu de la laisser
+dériver (Euler, RK4, AB3), ce qui permet des pas bien plus grands à précision
+égale.
+- Verlet : Störmer-Verlet (« saute-mouton » demi-impulsion / position /
+  demi-impulsion), symplectique d'ordre 2, une évaluation de chaque moitié
+  du second membre par pas
+- Yoshida4 : composition de trois pas de Verlet (coefficients de Yoshida),
+  symplectique d'ordre 4, trois évaluations de chaque moitié par pas
+- Point-Milieu : point milieu implicite y1 = y0 + h f(t + h/2, (y0 + y1)/2),
+  symplectique d'ordre 2 pour tout hamiltonien (même non séparable), résolu
+  par Newton simplifié (voir newton_EDO)
+
+Verlet et Yoshida4 supposent le système séparable : q' ne dépend que de
+(t, p) et p' que de (t, q). Le second membre peut être donné sous forme
+séparée (vitesse, force), voir compiler_separe dans compilateur_EDO : chaque
+moitié est alors évaluée seule. Sinon le système complet est évalué et seule
+la moitié utile est gardée.
+
+derive_energie mesure l'écart relatif de l'énergie H(t, y) le long d'une
+trajectoire, pour comparer les méthodes.
+"""
+
+import numpy as np
+
+from compilateur_EDO import compiler_rhs
+from newton_EDO import NewtonSimplifie
+from precision_EDO import etat_initial
+
+METHODES_SYMPLECTIQUES = ('Verlet', 'Yoshida4', 'Point-Milieu')
+
+# Coefficients de la composition d'ordre 4 de Yoshida (1990)
+W1 = 1.0 / (2.0 - 2.0 ** (1.0 / 3.0))
+W0 = 1.0 - 2.0 * W1
+COEFFICIENTS_YOSHIDA = (W1, W0, W1)
+
+
+def _parties(f, y0):
+    """
+    Nombre n de positions et fonctions vitesse(t, y), force(t, y) donnant les
+    dérivées de q et de p à partir de l'état complet y.
+    """
+    dim = np.shape(y0)[0] if np.ndim(y0) else 1
+    if dim % 2:
+        raise ValueError("Les méthodes Verlet et Yoshida4 demandent un nombre pair de composantes "
+                         "(positions puis impulsions).")
+    n = dim // 2
+    separe = getattr(f, 'separe', None)
+    if separe is not None:
+        vitesse, force = separe
+        return n, (lambda t, y: vitesse(t, y[n:])), (lambda t, y: force(t, y[:n]))
+    return n, (lambda t, y: np.asarray(f(t, y))[:n]), (lambda t, y: np.asarray(f(t, y))[n:])
+
+
+# Générateurs de pas : chacun produit indéfiniment y[i + 1] à partir de y[i] (voir flux_EDO)
+
+def pas_verlet(f, t0, y0, h, coefficients=(1.0,)):
+    """
+    Pas de Störmer-Verlet, ou composition de sous-pas de Verlet de longueurs
+    c * h pour c dans coefficients. La force de fin d'un sous-pas sert au
+    début du suivant.
+    """
+    n, vitesse, force = _parties(f, y0)
+    y, i = etat_initial(y0), 0
+    a = force(t0, y)
+    while True:
+        y = y.copy()
+        q, p = y[:n], y[n:]
+        t = t0 + i * h
+        for c in coefficients:
+            p += (0.5 * c * h) * a
+            q += (c * h) * vitesse(t + 0.5 * c * h, y)
+            t += c * h
+            a = force(t, y)
+            p += (0.5 * c * h) * a
+        i += 1
+        yield y
+
+
+def pas_yoshida4(f, t0, y0, h):
+    return pas_verlet(f, t0, y0, h, COEFFICIENTS_YOSHIDA)
+
+
+def pas_point_milieu(f, t0, y0, h, jac=None, newton=None):
+    """
+    Pas du point milieu implicite : z = y + h/2 f(t + h/2, z), puis y1 = 2 z - y.
+    Le point de départ de Newton est extrapolé des deux derniers pas.
+    """
+    newton = newton or NewtonSimplifie(f, jac)
+    y, y_prec, i = etat_initial(y0), None, 0
+    while True:
+        depart = y if y_prec is None else y + 0.5 * (y - y_prec)
+        z = newton.resoudre(t0 + (i + 0.5) * h, y, 0.5 * h, depart)
+        y_prec, y = y, 2.0 * z - y
+        i += 1
+        yield y
+
+
+def _trajectoire(pas, t0, y0, h, N, stats, dtype=None):
+    t = np.linspace(t0, t0 + N * h, N + 1)
+    y = np.zeros((N + 1,) + np.shape(y0), dtype=dtype or etat_initial(y0).dtype)
+    y[0] = y0
+    rappel = getattr(stats, 'rappel', None)
+    for i in range(N):
+        y[i + 1] = next(pas)
+        if rappel is not None and rappel(i + 1, t[i + 1], y[i + 1]):
+            return t[:i + 2], y[:i + 2]
+    return t, y
+
+
+def stormer_verlet(f, t0, y0, h, N, stats=None, dtype=None):
+    return _trajectoire(pas_verlet(f, t0, y0, h), t0, y0, h, N, stats, dtype)
+
+
+def yoshida_4(f, t0, y0, h, N, stats=None, dtype=None):
+    return _trajectoire(pas_yoshida4(f, t0, y0, h), t0, y0, h, N, stats, dtype)
+
+
+def point_milieu(f, t0, y0, h, N, jac=None, stats=None, dtype=None):
+    # Tolérance serrée : une itération de Newton arrêtée trop tôt casse la symplecticité ;
+    # le jacobien du début du pas converge lentement aux grands pas, d'où iter_max plus grand
+    newton = NewtonSimplifie(f, jac, tol=1e-12, iter_max=20)
+    solution = _trajectoire(pas_point_milieu(f, t0, y0, h, newton=newton), t0, y0, h, N, stats, dtype)
+    if stats is not None:
+        stats.ajouter_newton(newton)
+    return solution
+
+
+def derive_energie(t, y, hamiltonien):
+    """
+    Écart relatif |H(t_i, y_i) - H(t_0, y_0)| / |H(t_0, y_0)| en chaque point
+    d'une trajectoire.
+    - hamiltonien : fonction H(t, y) ou expression (ex: '0.5 * y[1]**2 - np.cos(y[0])')
+    H est d'abord évaluée en une fois sur tous les points (y de forme (dim, n)),
+    puis point par point si elle ne s'y prête pas.
+    """
+    H = compiler_rhs(hamiltonien)
+    t, y = np.asarray(t, dtype=float), np.asarray(y, dtype=float)
+    try:
+        energie = np.asarray(H(t, y.T), dtype=float)
+    except (TypeError, ValueError, IndexError):
+        energie = None
+    if energie is None or energie.shape != t.shape:
+        energie = np.array([H(ti, yi) for ti, yi in zip(t, y)], dtype=float)
+    return np.abs(energie - energie[0]) / max(abs(energie[0]), np.finfo(float).tiny)
@@ -0,0 +1,184 @@
+# -*- coding: utf-8 -*-
+"""
+Exécution des simulations en arrière-plan.
+
+Un Executeur (à garder d'une réexécution Streamlit à l'autre, par exemple
+avec st.cache_resource) lance chaque simulation dans un fil d'exécution et
+renvoie aussitôt une Tache, la poignée du calcul :
+- progression (0 à 1) et message, mis à jour par la fonction exécutée, en
+  particulier à partir des pas signalés par les solveurs (suivi_solveur)
+- annuler() : la demande est vue au pas suivant du solveur, qui s'arrête en
+  levant TacheAnnulee
+- resultats : résultats publiés au fil du calcul (affichables avant la fin)
+- partiels : trajectoires en cours de calcul, un point sur quelques-uns
+
+La fonction soumise reçoit la tache en premier argument. Le calcul continue
+pendant que l'interface se réexécute ; il suffit de conserver l'identifiant
+de la tache (par exemple dans st.session_state) pour la retrouver.
+"""
+
+import itertools
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+class TacheAnnulee(Exception):
+    """Levée dans le calcul quand l'annulation de la tache a été demandée."""
+
+
+class Tache:
+    """
+    Poignée d'un calcul soumis à un Executeur.
+    - description : texte libre affiché par l'interface
+    - parametres : données de la simulation utiles à l'affichage des résultats
+    """
+
+    def __init__(self, identifiant, description='', parametres=None):
+        self.identifiant = identifiant
+        self.description = description
+        self.parametres = parametres or {}
+        self.progression = 0.0
+        self.message = "En attente"
+        self.resultats = {}
+        self.partiels = {}
+        self.resultat = None     # valeur renvoyée par la fonction soumise
+        self.erreur = None       # exception levée par la fonction soumise
+        self.debut = None
+        self.fin = None
+        self._annulation = threading.Event()
+        self._futur = None
+
+    @property
+    def terminee(self):
+        return self._futur is not None and self._futur.done()
+
+    @property
+    def annulee(self):
+        return self._annulation.is_set()
+
+    @property
+    def etat(self):
+        if not self.terminee:
+            return 'en cours' if self.debut is not None else 'en attente'
+        if self.annulee:
+            return 'annulée'
+        return 'échec' if self.erreur is not None else 'terminée'
+
+    @property
+    def duree(self):
+        if self.debut is None:
+            return 0.0
+        return (self.fin or time.time()) - self.debut
+
+    def annuler(self):
+        """Demande l'arrêt du calcul (sans effet s'il est terminé)."""
+        if self.terminee:
+            return
+        self._annulation.set()
+        if self._futur is not None:
+            self._futur.cancel()
+
+    def attendre(self, timeout=None):
+        """Attend la fin du calcul (ou l'expiration du délai) ; renvoie terminee."""
+        if self._futur is not None:
+            try:
+                self._futur.exception(timeout)
+            except Exception:
+                pass
+        return self.terminee
+
+    def verifier(self):
+        """Lève TacheAnnulee si l'annulation a été demandée."""
+        if self._annulation.is_set():
+            raise TacheAnnulee(self.description)
+
+    def avancer(self, progression, message=None):
+        """Met à jour la progression (et le message), puis vérifie l'annulation."""
+        self.progression = min(max(progression, 0.0), 1.0)
+        if message is not None:
+            self.message = message
+        self.verifier()
+
+    def publier(self, cle, valeur):
+        """Rend un résultat disponible avant la fin du calcul."""
+        self.resultats[cle] = valeur
+        self.partiels.pop(cle, None)
+
+    def suivi_solveur(self, cle, t0, t_fin, debut=0.0, part=1.0, n_points=2000):
+        """
+        Rappel rappel(i, t_i, y_i) à passer à un solveur (StatsSolveur(rappel=...)) :
+        la progression va de debut à debut + part quand t va de t0 à t_fin,
+        environ n_points points de la trajectoire sont gardés dans partiels[cle],
+        et l'annulation est vérifiée à chaque pas.
+        """
+        liste_t, liste_y = [], []
+        self.partiels[cle] = (liste_t, liste_y)
+        annulation = self._annulation
+        duree = (t_fin - t0) or 1.0
+        ecart = duree / n_points
+        prochain = [t0]
+
+        def rappel(i, t, y):
+            if annulation.is_set():
+                raise TacheAnnulee(self.description)
+            if t >= prochain[0]:
+                prochain[0] = t + ecart
+                liste_t.append(float(t))
+                liste_y.append(y.copy() if hasattr(y, 'copy') else y)
+                self.progression = debut + part * min((t - t0) / duree, 1.0)
+        return rappel
+
+
+class Executeur:
+    """
+    Fils d'exécution des simulations et registre des taches soumises.
+    - max_taches : nombre de calculs menés en parallèle
+    """
+
+    def __init__(self, max_taches=2):
+        self._pool = ThreadPoolExecutor(max_workers=max_taches, thread_name_prefix='tache_EDO')
+        self._taches = {}
+        self._compteur = itertools.count(1)
+        self._verrou = threading.Lock()
+
+    def soumettre(self, fonction, *args, description='', parametres=None, **kwargs):
+        """Lance fonction(tache, *args, **kwargs) en arrière-plan et renvoie la tache."""
+        with self._verrou:
+            tache = Tache(f"tache-{next(self._compteur)}", description, parametres)
+            self._taches[tache.identifiant] = tache
+        tache._futur = self._pool.submit(self._executer, tache, fonction, args, kwargs)
+        return tache
+
+    @staticmethod
+    def _executer(tache, fonction, args, kwargs):
+        tache.debut = time.time()
+        tache.message = "En cours"
+        try:
+            tache.verifier()
+            tache.resultat = fonction(tache, *args, **kwargs)
+            tache.progression = 1.0
+            tache.message = "Terminée"
+        except TacheAnnulee:
+            tache.message = "Annulée"
+        except Exception as e:
+            tache.erreur = e
+            tache.message = f"Échec : {e}"
+        finally:
+            tache.fin = time.time()
+
+    def tache(self, identifiant):
+        """Tache d'identifiant donné, ou None."""
+        with self._verrou:
+            return self._taches.get(identifiant)
+
+    def taches(self):
+        with self._verrou:
+            return list(self._taches.values())
+
+    def oublier(self, identifiant):
+        """Annule la tache si elle tourne encore et la retire du registre (ses résultats sont libérés)."""
+        with self._verrou:
+            tache = self._taches.pop(identifiant, None)
+        if tache is not None:
+            tache.annuler()
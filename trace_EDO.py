@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+"""
+Réduction du nombre de points d'une courbe avant son tracé.
+
+Au-delà de quelques milliers de points, matplotlib passe plus de temps à
+tracer que les solveurs à calculer, sans que l'image y gagne. Les courbes sont
+donc réduites à environ `n_points` points en gardant leur forme visuelle :
+- 'minmax' : dans chaque paquet de points consécutifs, on garde le minimum et
+  le maximum (les pics et les oscillations rapides restent visibles)
+- 'lttb' : Largest-Triangle-Three-Buckets, un point par paquet, choisi pour
+  maximiser l'aire du triangle formé avec ses voisins
+Les tableaux d'origine ne sont pas modifiés : l'export utilise toujours la
+résolution complète.
+"""
+
+import numpy as np
+
+# Nombre de points par courbe utilisé par défaut dans les interfaces
+N_POINTS_TRACE = 3000
+
+
+def reduire_minmax(t, y, n_points=N_POINTS_TRACE):
+    """Garde le minimum et le maximum de n_points // 2 paquets (plus les extrémités)."""
+    t, y = np.asarray(t), np.asarray(y)
+    n = len(t)
+    if n <= n_points:
+        return t, y
+    n_paquets = max(1, n_points // 2)
+    taille = -(-(n - 2) // n_paquets)
+    interieur = y[1:-1]
+    complets = (len(interieur) // taille) * taille
+    paquets = interieur[:complets].reshape(-1, taille)
+    decalages = np.arange(len(paquets)) * taille + 1
+    indices = [[0, n - 1], decalages + paquets.argmin(axis=1), decalages + paquets.argmax(axis=1)]
+    if complets < len(interieur):
+        reste = interieur[complets:]
+        indices.append([complets + 1 + reste.argmin(), complets + 1 + reste.argmax()])
+    indices = np.unique(np.concatenate(indices))
+    return t[indices], y[indices]
+
+
+def reduire_lttb(t, y, n_points=N_POINTS_TRACE):
+    """Largest-Triangle-Three-Buckets : n_points points, extrémités comprises."""
+    t, y = np.asarray(t), np.asarray(y)
+    n = len(t)
+    if n <= n_points or n_points < 3:
+        return t, y
+    tf, yf = t.astype(float), y.astype(float)
+    bornes = np.linspace(1, n - 1, n_points - 1).astype(int)
+    indices = np.empty(n_points, dtype=int)
+    indices[0], indices[-1] = 0, n - 1
+    a = 0
+    for i in range(n_points - 2):
+        debut, fin = bornes[i], bornes[i + 1]
+        # Sommet C : moyenne du paquet suivant (ou dernier point)
+        suivant = slice(fin, bornes[i + 2]) if i + 2 < len(bornes) else slice(n - 1, n)
+        tc, yc = tf[suivant].mean(), yf[suivant].mean()
+        # Double de l'aire du triangle (A, B, C) pour chaque candidat B du paquet
+        aires = np.abs((tf[a] - tc) * (yf[debut:fin] - yf[a]) - (tf[a] - tf[debut:fin]) * (yc - yf[a]))
+        a = debut + int(np.argmax(aires))
+        indices[i + 1] = a
+    return t[indices], y[indices]
+
+
+_REDUCTIONS = {'minmax': reduire_minmax, 'lttb': reduire_lttb}
+
+
+def reduire(t, y, n_points=N_POINTS_TRACE, methode='minmax'):
+    """
+    Réduit une courbe (t, y) à environ n_points points pour le tracé.
+    - y : tableau 1-D (une composante) ; pour un système, réduire chaque
+          composante y[:, i] séparément
+    - n_points : nombre de points visé (None ou 0 : pas de réduction)
+    - methode : 'minmax' ou 'lttb'
+    """
+    if not n_points:
+        return np.asarray(t), np.asarray(y)
+    if methode not in _REDUCTIONS:
+        raise ValueError(f"Réduction inconnue : {methode}. Choisissez parmi : {', '.join(_REDUCTIONS)}.")
+    return _REDUCTIONS[methode](t, y, n_points)
+
+
+def options_trace(conteneur):
+    """Choix de la réduction des courbes dans l'interface (renvoie (n_points, methode))."""
+    n_points = conteneur.number_input("Points par courbe (tracé)", min_value=100, max_value=100000,
+                                      value=N_POINTS_TRACE, step=500)
+    methode = conteneur.selectbox("Réduction des courbes", options=list(_REDUCTIONS))
+    return int(n_points), methode